@@ -1,19 +1,29 @@
+import hashlib
 import json
 from io import StringIO
 
+from app.config import CV_PROCESSING_DEADLINE_SECONDS, COALESCE_REQUESTS
 from app.services.file_info_extraction import extract_fields_user_v1
+from app.services.rate_limiter import INTERACTIVE
+from app.services.single_flight import SingleFlight
 from fastapi import APIRouter, File, UploadFile, HTTPException, Form, Query
 from typing import Dict, Any, List, Optional
 
+from app.utils.deadline import DeadlineExceeded, request_deadline
 from app.utils.pdf_conversion import file_to_text
 
 router = APIRouter()
 
+# Concurrent uploads of the same CV (retries, double submits) share one extraction
+extraction_flight = SingleFlight("cv_extraction", COALESCE_REQUESTS)
+
 
 @router.post("/")
 async def extract_cv_fields(
         file: UploadFile = File(None),
         cv_text: Optional[str] = Form(None),
+        deadline: float = Query(CV_PROCESSING_DEADLINE_SECONDS, gt=0, le=300,
+                                description="Latency budget in seconds, LLM calls included"),
 ) -> Dict[str, Any]:
     if not file and not cv_text:
         raise HTTPException(status_code=400, detail="Either file or text must be provided")
@@ -23,7 +33,12 @@ async def extract_cv_fields(
             await validate_file(file)
             cv_text = await file_to_text(file)
 
-        response = await extract_fields_user_v1(text=cv_text)
+        # Someone is waiting on this one: ahead of batch ingestion in the limiter, and hedged
+        with request_deadline(deadline):
+            response = await extraction_flight.run(
+                hashlib.sha256((cv_text or "").encode("utf-8")).hexdigest(),
+                lambda: extract_fields_user_v1(text=cv_text, priority=INTERACTIVE),
+            )
 
         if "error" in response:
             raise HTTPException(status_code=422, detail=response.get("error_message", "Unknown error occurred"))
@@ -32,6 +47,8 @@ async def extract_cv_fields(
 
     except HTTPException:
         raise
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"CV processing deadline exceeded: {str(e)}")
     except json.JSONDecodeError as je:
         raise HTTPException(status_code=422, detail=f"Invalid JSON in response: {str(je)}")
     except (ValueError, IOError) as e:
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.services.cv_export import stream_export
+from app.services.db_service import DatabaseService
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+@router.get("/cvs")
+def export_cvs(
+        format: str = Query("parquet", pattern="^(parquet|arrow)$",
+                            description="parquet, or arrow for an Arrow IPC stream"),
+        since_id: int = Query(0, ge=0, description="Only CVs with a larger id (incremental exports)"),
+        include_text: bool = Query(False, description="Add the raw cv_text column"),
+) -> StreamingResponse:
+    """Stream the CVs, skill score map and companies as a columnar file, one batch at a time."""
+    try:
+        conn = DatabaseService().conn
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {str(e)}")
+
+    def body():
+        try:
+            yield from stream_export(conn, format, since_id, include_text)
+        finally:
+            conn.close()
+
+    filename = f"cvs-since-{since_id}.{format}"
+    return StreamingResponse(body(), media_type=MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
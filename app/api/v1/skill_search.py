@@ -0,0 +1,61 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Any
+
+from app.services.skill_matrix import get_skill_matrix
+
+router = APIRouter()
+
+
+def parse_skill_values(value: str, cast) -> Dict[str, Any]:
+    """Parse "python:70,docker:50" into {"python": 70, "docker": 50}."""
+    result = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        skill, separator, number = item.rpartition(":")
+        if not separator or not skill.strip():
+            raise HTTPException(status_code=400, detail=f"Expected skill:value, got '{item}'")
+        try:
+            result[skill.strip()] = cast(number)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid value in '{item}'")
+    return result
+
+
+@router.get("/search")
+async def skill_search(
+        min_scores: str = Query("", description="Thresholds, e.g. python:70,docker:50"),
+        weights: str = Query("", description="Ranking weights, e.g. python:1,docker:0.5 (default: 1 per filtered skill)"),
+        limit: int = Query(10, ge=1, le=1000),
+) -> Dict[str, Any]:
+    """Filter and rank candidates by skill scores from the in-memory skill matrix, without an LLM or SQL round trip."""
+    thresholds = parse_skill_values(min_scores, int)
+    ranking = parse_skill_values(weights, float)
+    if not thresholds and not ranking:
+        raise HTTPException(status_code=400, detail="Provide min_scores and/or weights")
+    if any(not 0 <= score <= 100 for score in thresholds.values()):
+        raise HTTPException(status_code=400, detail="Scores must be between 0 and 100")
+
+    try:
+        matrix = await asyncio.to_thread(get_skill_matrix)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Skill matrix unavailable: {str(e)}")
+
+    thresholds = matrix.canonical_skills(thresholds)
+    ranking = matrix.canonical_skills(ranking) or {skill: 1.0 for skill in thresholds}
+    results, total_matches = matrix.rank(ranking, limit, thresholds)
+    for result in results:
+        result.update(matrix.candidates.get(result["cv_id"], {}))
+
+    return {
+        "status": "success",
+        "min_scores": thresholds,
+        "weights": ranking,
+        "total_matches": total_matches,
+        "results": results,
+    }
+
+
+@router.get("/stats")
+async def skill_matrix_stats() -> Dict[str, Any]:
+    matrix = await asyncio.to_thread(get_skill_matrix)
+    return matrix.stats()
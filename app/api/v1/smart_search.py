@@ -1,20 +1,42 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Any, Optional
 
+from app.config import SEARCH_DEADLINE_SECONDS
+from app.services.federated_search import federated_search
 from app.services.query_generator import QueryGenerator
+from app.utils.deadline import DeadlineExceeded, request_deadline
 
 router = APIRouter()
 
 @router.get("/search")
-async def smart_search(question: str) -> Dict[str, Any]:
+async def smart_search(
+        question: str,
+        mode: str = Query("sql", pattern="^(sql|federated)$",
+                          description="sql: LLM-generated SQL only; federated: SQL and vector search in parallel"),
+        limit: int = Query(10, ge=1, le=100, description="Result count in federated mode"),
+        deadline: Optional[float] = Query(None, gt=0, le=60,
+                                          description="Latency budget in seconds, LLM calls included "
+                                                      "(default: SEARCH_DEADLINE_SECONDS in federated mode, none in sql mode)"),
+) -> Dict[str, Any]:
     """Search for candidates using natural language query."""
+    # sql mode is one LLM round trip and the query, bounded by OPENAI_TIMEOUT_SECONDS unless a deadline is given
+    if deadline is None and mode == "federated":
+        deadline = SEARCH_DEADLINE_SECONDS
     try:
-        generator = QueryGenerator()
-        results = await generator.smart_search(question)
+        with request_deadline(deadline):
+            if mode == "federated":
+                results = await federated_search(question, limit=limit, deadline=deadline)
+            else:
+                generator = QueryGenerator()
+                results = await generator.smart_search(question)
         
         if results["status"] == "error":
             raise HTTPException(status_code=422, detail=results["message"])
             
         return results
+    except HTTPException:
+        raise
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Search deadline exceeded: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
@@ -0,0 +1,38 @@
+from app.services.db_service import DatabaseService
+from app.services.fingerprint import store_fingerprint
+
+BATCH_SIZE = 500
+
+
+def backfill_fingerprints() -> int:
+    """Fingerprint the stored CVs that predate near-duplicate detection."""
+    db_service = DatabaseService()
+    conn = db_service.conn
+    total = 0
+    try:
+        while True:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT cv.id, cv.cv_text FROM cv
+                    WHERE cv.cv_text IS NOT NULL
+                      AND NOT EXISTS (SELECT 1 FROM cv_fingerprint f WHERE f.cv_id = cv.id)
+                    ORDER BY cv.id
+                    LIMIT %s
+                """, (BATCH_SIZE,))
+                rows = cur.fetchall()
+                for cv_id, cv_text in rows:
+                    store_fingerprint(cur, cv_id, cv_text)
+            conn.commit()
+            total += len(rows)
+            if len(rows) < BATCH_SIZE:
+                break
+            print(f"Fingerprinted {total} CVs...")
+    finally:
+        conn.close()
+
+    print(f"Fingerprinted {total} CVs")
+    return total
+
+
+if __name__ == "__main__":
+    backfill_fingerprints()
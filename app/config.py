@@ -3,5 +3,97 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Repository root, so data files resolve the same whatever the working directory
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 OPENAI_ASSISTANT_ID = os.getenv('OPENAI_ASSISTANT_ID')
+# Point at an OpenAI-compatible server instead of api.openai.com (e.g. the load-test stub)
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')
+
+# DEBUG enables per-stage trace lines; at INFO and above tracing costs nothing
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
+DATABASE_NAME = os.getenv('DATABASE_NAME', 'clerk_ai')
+DATABASE_USER = os.getenv('DATABASE_USER', 'postgres')
+DATABASE_PASSWORD = os.getenv('DATABASE_PASSWORD', 'secret')
+DATABASE_HOST = os.getenv('DATABASE_HOST', 'localhost')
+DATABASE_PORT = os.getenv('DATABASE_PORT', '5432')
+
+# Shared OpenAI rate limiter (defaults are conservative tier limits for gpt-4o-mini)
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '500'))
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv('OPENAI_TOKENS_PER_MINUTE', '200000'))
+OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', '8'))
+OPENAI_TARGET_LATENCY_SECONDS = float(os.getenv('OPENAI_TARGET_LATENCY_SECONDS', '20'))
+
+# Longest a single chat completion may take when the request sets no tighter deadline
+OPENAI_TIMEOUT_SECONDS = float(os.getenv('OPENAI_TIMEOUT_SECONDS', '60'))
+
+# Interactive LLM calls slower than HEDGE_PERCENTILE of recent ones are sent a second time and the
+# first answer wins; hedges stay below HEDGE_BUDGET of all calls. HEDGE_PERCENTILE=0 disables hedging
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '95'))
+HEDGE_BUDGET = float(os.getenv('HEDGE_BUDGET', '0.05'))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+
+# Latency budget of POST /v1/cv_processing/ (overridable per request with ?deadline=)
+CV_PROCESSING_DEADLINE_SECONDS = float(os.getenv('CV_PROCESSING_DEADLINE_SECONDS', '60'))
+
+# Concurrent searches with the same normalized question, and uploads with the same CV text, share
+# one in-flight computation per worker instead of each calling the LLM
+COALESCE_REQUESTS = os.getenv('COALESCE_REQUESTS', 'true').lower() == 'true'
+
+# uvicorn worker processes (uvicorn reads WEB_CONCURRENCY itself); the OpenAI
+# request and token budgets above are split evenly between them
+WEB_CONCURRENCY = max(1, int(os.getenv('WEB_CONCURRENCY', '1')))
+
+# Two-tier cache: an in-process LRU per worker in front of a tier shared by all workers.
+# CACHE_BACKEND is sqlite (a file on a shared volume), redis (CACHE_URL), memory (LRU only) or none
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'sqlite').lower()
+CACHE_PATH = os.getenv('CACHE_PATH', os.path.join(PROJECT_ROOT, 'data', 'cache', 'clerk_cache.sqlite3'))
+CACHE_URL = os.getenv('CACHE_URL', 'redis://localhost:6379/0')
+CACHE_LOCAL_MAX_ITEMS = int(os.getenv('CACHE_LOCAL_MAX_ITEMS', '1024'))
+CACHE_LLM_TTL_SECONDS = float(os.getenv('CACHE_LLM_TTL_SECONDS', '604800'))
+CACHE_EMBEDDING_TTL_SECONDS = float(os.getenv('CACHE_EMBEDDING_TTL_SECONDS', '2592000'))
+CACHE_VOCABULARY_TTL_SECONDS = float(os.getenv('CACHE_VOCABULARY_TTL_SECONDS', '60'))
+CACHE_SEARCH_TTL_SECONDS = float(os.getenv('CACHE_SEARCH_TTL_SECONDS', '300'))
+
+# Vector index written by app.create_rag and served by the federated search
+RAG_INDEX_PATH = os.getenv('RAG_INDEX_PATH', os.path.join(PROJECT_ROOT, 'data', 'rag_index'))
+# How CVs are split into RAG documents: sections (one per CV section, token-budgeted),
+# summary (one compact summary node per CV) or full (profile plus the whole raw text)
+RAG_DOCUMENT_MODE = os.getenv('RAG_DOCUMENT_MODE', 'sections').lower()
+# Two-stage vector search: rank every node on the first RAG_COARSE_DIMENSIONS dimensions (0 = off),
+# then rescore the best top_k * RAG_SHORTLIST_FACTOR with the full vectors
+RAG_COARSE_DIMENSIONS = int(os.getenv('RAG_COARSE_DIMENSIONS', '256'))
+RAG_SHORTLIST_FACTOR = int(os.getenv('RAG_SHORTLIST_FACTOR', '10'))
+# Latency budget of a federated search: a branch still running at the deadline is dropped
+# (sql-mode searches only get a deadline when the request passes one)
+SEARCH_DEADLINE_SECONDS = float(os.getenv('SEARCH_DEADLINE_SECONDS', '8'))
+
+# How often each worker tops up its in-memory skill matrix with CVs ingested elsewhere
+SKILL_MATRIX_REFRESH_SECONDS = float(os.getenv('SKILL_MATRIX_REFRESH_SECONDS', '30'))
+# and how often it is rebuilt from scratch, for skills renamed or merged elsewhere
+SKILL_MATRIX_RELOAD_SECONDS = float(os.getenv('SKILL_MATRIX_RELOAD_SECONDS', '600'))
+
+# Extract email, phone and country with local patterns before the LLM call, which then only
+# generates the remaining fields
+LOCAL_CONTACT_EXTRACTION = os.getenv('LOCAL_CONTACT_EXTRACTION', 'true').lower() == 'true'
+
+# Near-duplicate CVs (estimated Jaccard similarity of the text) are detected before extraction.
+# DUPLICATE_ACTION: link (record the file against the existing CV), replace (extract and
+# replace the existing CV), skip (ignore the file) or off (no check)
+DUPLICATE_THRESHOLD = float(os.getenv('DUPLICATE_THRESHOLD', '0.85'))
+DUPLICATE_ACTION = os.getenv('DUPLICATE_ACTION', 'link').lower()
+
+# Folder watcher: a file is ingested once it has not changed for WATCH_DEBOUNCE_SECONDS
+WATCH_DEBOUNCE_SECONDS = float(os.getenv('WATCH_DEBOUNCE_SECONDS', '2'))
+WATCH_CONCURRENCY = int(os.getenv('WATCH_CONCURRENCY', '2'))
+
+# Columnar exports (python -m app.export_cvs, GET /v1/export/cvs): rows per Parquet row group / Arrow batch
+EXPORT_PATH = os.getenv('EXPORT_PATH', os.path.join(PROJECT_ROOT, 'data', 'exports'))
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '5000'))
+
+# Dead-letter retries for CVs that failed ingestion
+DEAD_LETTER_BASE_DELAY_SECONDS = float(os.getenv('DEAD_LETTER_BASE_DELAY_SECONDS', '60'))
+DEAD_LETTER_MAX_DELAY_SECONDS = float(os.getenv('DEAD_LETTER_MAX_DELAY_SECONDS', '21600'))
+DEAD_LETTER_MAX_ATTEMPTS = int(os.getenv('DEAD_LETTER_MAX_ATTEMPTS', '8'))
@@ -1,64 +1,149 @@
 import asyncio
 import os
+import time
+import psycopg2
+from app.config import DUPLICATE_THRESHOLD, DUPLICATE_ACTION
 from app.services.db_service import DatabaseService
+from app.services.dead_letter import DeadLetterQueue, UnreadableCVError
+from app.services.rate_limiter import BATCH, RETRY
 from app.utils.pdf_conversion import file_path_to_text
 from app.services.file_info_extraction import extract_fields_user_v1
-from fastapi import HTTPException
 
-async def process_single_cv_to_db(file_path: str) -> dict:
-    """Process a single CV file and store it in the database."""
+
+async def process_single_cv_to_db(file_path: str, priority: int = BATCH, replace_existing: bool = False) -> dict:
+    """
+    Process a single CV file and store it in the database.
+
+    replace_existing re-ingests a file that is already stored (it changed on disk)
+    instead of skipping it.
+    """
+    db_service = None
     try:
         filename = os.path.basename(file_path)
         cv_directory = os.path.dirname(file_path)
         error_directory = os.path.join(os.path.dirname(cv_directory), "error_cvs")
         
         # Create error directory if it doesn't exist
-        if not os.path.exists(error_directory):
-            os.makedirs(error_directory)
-        
-        # Check if CV already exists by filename
-        db_service = DatabaseService()
-        existing_cv = await db_service.get_cv_info(filename)
-        
-        if existing_cv:
-            return {
-                "status": "skipped",
-                "message": f"CV already exists: {filename}",
-                "existing_data": existing_cv
-            }
-
-        # Only proceed with text extraction and processing if file doesn't exist
-        cv_text = file_path_to_text(file_path)
-        if not cv_text:
-            return {"status": "error", "message": f"Failed to extract text from {filename}"}
+        dead_letter = DeadLetterQueue(error_directory)
 
         try:
+            # Inside the try, so a database outage is recorded like any other transient failure
+            db_service = DatabaseService()
+            if priority != RETRY:
+                # Dead-letter retries in every process yield while this is held
+                await db_service.begin_fresh_ingestion()
+
+            # Check if CV already exists by filename
+            existing_cv = await db_service.get_cv_info(filename)
+
+            # The stored version stays until the new one is extracted and stored in its place
+            replaced_cv_id = None
+            if existing_cv and replace_existing:
+                if existing_cv["filename"] == filename:
+                    replaced_cv_id = existing_cv["id"]
+            elif existing_cv:
+                return {
+                    "status": "skipped",
+                    "message": f"CV already exists: {filename}",
+                    "existing_data": existing_cv
+                }
+
+            # Only proceed with text extraction and processing if file doesn't exist
+            cv_text = file_path_to_text(file_path)
+            if not cv_text:
+                raise UnreadableCVError(f"Failed to extract text from {filename}")
+
+            # A new version of a stored CV (cv_final.pdf vs cv_final_v2.pdf) is caught before any paid call
+            duplicate = None
+            if DUPLICATE_ACTION != "off":
+                duplicate = await db_service.find_near_duplicate(cv_text, DUPLICATE_THRESHOLD, replaced_cv_id)
+            if duplicate and DUPLICATE_ACTION != "replace":
+                if DUPLICATE_ACTION == "link":
+                    await db_service.link_duplicate(filename, duplicate["cv_id"], duplicate["similarity"])
+                return {
+                    "status": "skipped",
+                    "message": f"Near-duplicate of {duplicate['filename']} ({duplicate['similarity']:.0%} similar)",
+                    "duplicate_of": duplicate
+                }
+
             # Process the CV
-            cv_json = await extract_fields_user_v1(cv_text)
+            cv_json = await extract_fields_user_v1(cv_text, priority=priority)
             cv_json['filename'] = filename
             
-            # Store in database
-            cv_id = await db_service.store_cv_data(cv_json)
+            # Store in database; in replace mode the new upload also supersedes the near-duplicate
+            cv_id = await db_service.store_cv_data(
+                cv_json, replaces=[replaced_cv_id, duplicate["cv_id"] if duplicate else None])
             
             return {
                 "status": "success",
                 "cv_id": cv_id,
                 "name": cv_json.get("name", ""),
                 "email": cv_json.get("email", ""),
-                "filename": filename
+                "filename": filename,
+                "replaced": duplicate
             }
-        except HTTPException as he:
-            # Move file to error directory instead of deleting
-            error_file_path = os.path.join(error_directory, filename)
-            os.rename(file_path, error_file_path)
+        except Exception as e:
+            # Park the file in the dead-letter queue instead of deleting it
+            entry = dead_letter.record_failure(file_path, e)
             return {
                 "status": "error",
-                "message": f"{str(he.detail)} - File moved to error_cvs",
-                "file_moved": True
+                "message": f"{entry['reason']} - File moved to error_cvs ({entry['failure_type']} failure)",
+                "file_moved": True,
+                "failure_type": entry["failure_type"]
             }
 
     except Exception as e:
         return {"status": "error", "message": str(e)}
+    finally:
+        if db_service is not None:
+            # Also releases the fresh-ingestion lock
+            db_service.conn.close()
+
+
+async def retry_dead_letters(cv_directory: str) -> dict:
+    """Retry the dead-lettered CVs that are due, one at a time and only while no fresh ingestion runs."""
+    dead_letter = DeadLetterQueue(os.path.join(os.path.dirname(cv_directory), "error_cvs"))
+    recovered = []
+    failed = []
+
+    for entry in dead_letter.due_entries():
+        try:
+            db_service = DatabaseService()
+            try:
+                busy = await db_service.fresh_ingestion_running()
+            finally:
+                db_service.conn.close()
+        except psycopg2.OperationalError:
+            # The database is down; every retry would fail anyway
+            break
+        if busy:
+            break
+
+        filename = entry["filename"]
+        print(f"Retrying {filename} (attempt {entry['attempts'] + 1})")
+        result = await process_single_cv_to_db(os.path.join(dead_letter.error_directory, filename), priority=RETRY)
+
+        if result["status"] in ("success", "skipped"):
+            dead_letter.resolve(filename, cv_directory)
+            recovered.append(filename)
+        else:
+            failed.append({"file": filename, "error": result["message"]})
+
+    return {"recovered": recovered, "failed": failed}
+
+
+async def run_dead_letter_worker(cv_directory: str, poll_interval: float = 60.0):
+    """Retry dead-lettered CVs in the background, sleeping until the next one is due."""
+    dead_letter = DeadLetterQueue(os.path.join(os.path.dirname(cv_directory), "error_cvs"))
+    while True:
+        result = await retry_dead_letters(cv_directory)
+        if result["recovered"] or result["failed"]:
+            print(f"Dead-letter retry: {len(result['recovered'])} recovered, {len(result['failed'])} failed")
+
+        next_retry_at = dead_letter.next_retry_at()
+        delay = poll_interval if next_retry_at is None else max(1.0, min(poll_interval, next_retry_at - time.time()))
+        await asyncio.sleep(delay)
+
 
 async def process_cv_directory():
     # Get the project root directory
@@ -95,9 +180,15 @@ async def process_cv_directory():
         for error in errors:
             print(f"- {error['file']}: {error['error']}")
 
+    # Fresh CVs are done, now give due dead-letter retries a go
+    retried = await retry_dead_letters(cv_directory)
+    if retried["recovered"]:
+        print(f"\nRecovered from error_cvs: {len(retried['recovered'])} CVs")
+
     return {
         "status": "success",
         "processed": len(results),
+        "recovered": len(retried["recovered"]),
         "errors": errors if errors else None
     }
 
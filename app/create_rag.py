@@ -17,6 +17,9 @@ async def create_rag():
         # Process all CVs in the directory
         result = await rag_system.process_cv_directory(cv_directory)
         print(f"Directory processing complete: {result}")
+        if rag_system.index is not None:
+            rag_system.persist()
+            print("Index saved for the API's federated search")
 
         # Perform a query test
         queries = [
@@ -45,6 +48,10 @@ async def create_rag():
                 print(f"Country: {metadata.get('country', 'N/A')}")
                 print(f"Skills: {metadata.get('skills_text', 'N/A')}")
                 print(f"Summary: {metadata.get('summary', 'No summary available.')}")
+                # The index keeps no CV text; it is loaded for the result being shown
+                cv_texts = await rag_system.load_cv_texts([metadata.get('cv_id')])
+                cv_text = cv_texts.get(metadata.get('cv_id')) or ''
+                print(f"CV: {' '.join(cv_text.split())[:200]}")
                 print(f"Relevance Score: {node.score if hasattr(node, 'score') else 'N/A'}")
                 print("-" * 50)
 
@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+import time
+
+from app.config import EXPORT_PATH
+from app.services.cv_export import FORMATS, export_cvs, last_exported_id
+from app.services.db_service import DatabaseService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export CVs with their skill scores and companies to Parquet/Arrow files")
+    parser.add_argument("--output", default=EXPORT_PATH, help="Export directory (one part file per run)")
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+    parser.add_argument("--since-id", type=int, help="Export CVs after this id (default: after the last exported part)")
+    parser.add_argument("--full", action="store_true", help="Export every CV; the directory must hold no parts yet")
+    parser.add_argument("--include-text", action="store_true", help="Add the raw cv_text column")
+    args = parser.parse_args()
+
+    since_id = args.since_id
+    if args.full:
+        if last_exported_id(args.output):
+            sys.exit(f"{args.output} already holds export parts; use a new directory for a full export")
+        since_id = 0
+
+    db_service = DatabaseService()
+    start = time.perf_counter()
+    try:
+        path = export_cvs(db_service.conn, args.output, args.format, since_id, args.include_text)
+    finally:
+        db_service.conn.close()
+
+    if path is None:
+        print("No new CVs to export")
+    else:
+        print(f"Wrote {path} ({os.path.getsize(path) / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
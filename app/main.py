@@ -1,16 +1,66 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, generate_latest
 from app.api.v1.cv_processing import router as cv_processing_router
+from app.api.v1.export import router as export_router
 from app.api.v1.smart_search import router as smart_search_router
+from app.api.v1.skill_search import router as skill_search_router
+from app.config import LOG_LEVEL
+from app.services.file_info_extraction import get_client
+from app.services.query_generator import load_view_definition
+from app.services.rate_limiter import openai_limiter
+from app.utils.metrics import RateLimiterCollector, logger, trace_stage
+from app.utils.text_compaction import count_tokens
 import uvicorn
 
-app = FastAPI()
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+# The OpenAI SDK logs every HTTP request at INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
+REGISTRY.register(RateLimiterCollector(openai_limiter))
+
+
+def prewarm() -> None:
+    """Pay the one-off costs of the first request (heavy imports, client, tokenizer, SQL view, vector index) up front."""
+    with trace_stage("prewarm"):
+        import pymupdf  # noqa: F401
+        get_client()
+        count_tokens("")
+        load_view_definition()
+        from app.services.rag_service import get_rag_system
+        get_rag_system()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(prewarm)
+    logger.info("Prewarm complete")
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(cv_processing_router, prefix="/v1/cv_processing", tags=["cv_processing"])
 app.include_router(smart_search_router, prefix="/v1/smart_search", tags=["smart_search"])
+app.include_router(skill_search_router, prefix="/v1/skill_search", tags=["skill_search"])
+app.include_router(export_router, prefix="/v1/export", tags=["export"])
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage timings, LLM token usage and the OpenAI limiter."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/metrics/rate_limiter")
+async def rate_limiter_metrics():
+    return openai_limiter.get_metrics()
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
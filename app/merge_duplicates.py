@@ -0,0 +1,92 @@
+import sys
+from typing import Dict, List, Tuple
+
+from app.services.canonicalizer import Canonicalizer
+from app.services.db_service import DatabaseService
+
+
+def _load_by_usage(cur, table: str, link_table: str, link_column: str) -> List[Tuple[int, str]]:
+    """(id, name) rows, most used first, so variants collapse onto the most common spelling."""
+    cur.execute(f"""
+        SELECT t.id, t.name
+        FROM {table} t
+        LEFT JOIN {link_table} l ON l.{link_column} = t.id
+        GROUP BY t.id, t.name
+        ORDER BY COUNT(l.cv_id) DESC, t.id
+    """)
+    return cur.fetchall()
+
+
+def plan_merges(rows: List[Tuple[int, str]], canonical_name) -> Dict[str, List[Tuple[int, str]]]:
+    """Group rows by canonical name; only groups that need a merge or rename are returned."""
+    groups: Dict[str, List[Tuple[int, str]]] = {}
+    for row_id, name in rows:
+        groups.setdefault(canonical_name(name), []).append((row_id, name))
+    return {canonical: members for canonical, members in groups.items()
+            if canonical and (len(members) > 1 or members[0][1] != canonical)}
+
+
+def apply_merges(cur, table: str, link_table: str, link_column: str,
+                 merges: Dict[str, List[Tuple[int, str]]], upsert_link: str) -> None:
+    for canonical, members in merges.items():
+        # Keep the row already named canonically, otherwise the most used one, and rename it
+        target_id = next((row_id for row_id, name in members if name == canonical), members[0][0])
+        for row_id, _ in members:
+            if row_id == target_id:
+                continue
+            cur.execute(upsert_link, (target_id, row_id))
+            cur.execute(f"DELETE FROM {link_table} WHERE {link_column} = %s", (row_id,))
+            cur.execute(f"DELETE FROM {table} WHERE id = %s", (row_id,))
+        cur.execute(f"UPDATE {table} SET name = %s WHERE id = %s AND name <> %s", (canonical, target_id, canonical))
+
+
+def merge_duplicates(dry_run: bool = False) -> Dict[str, int]:
+    """Collapse duplicate skill and company rows onto their canonical names."""
+    db_service = DatabaseService()
+    conn = db_service.conn
+    # Start empty: the vocabulary is built in usage order while planning
+    canonicalizer = Canonicalizer()
+
+    try:
+        with conn.cursor() as cur:
+            skill_merges = plan_merges(_load_by_usage(cur, "skill", "cv_skill", "skill_id"),
+                                       canonicalizer.canonical_skill)
+            company_merges = plan_merges(_load_by_usage(cur, "company", "cv_company", "company_id"),
+                                         canonicalizer.canonical_company)
+
+            for label, merges in (("Skills", skill_merges), ("Companies", company_merges)):
+                print(f"\n{label}: {len(merges)} canonical names to merge or rename")
+                for canonical, members in sorted(merges.items()):
+                    print(f"  {canonical} <- {', '.join(name for _, name in members)}")
+
+            if dry_run:
+                conn.rollback()
+                print("\nDry run, nothing changed")
+            else:
+                apply_merges(cur, "skill", "cv_skill", "skill_id", skill_merges, """
+                    INSERT INTO cv_skill (cv_id, skill_id, value)
+                    SELECT cv_id, %s, value FROM cv_skill WHERE skill_id = %s
+                    ON CONFLICT (cv_id, skill_id) DO UPDATE SET value = GREATEST(cv_skill.value, EXCLUDED.value)
+                """)
+                apply_merges(cur, "company", "cv_company", "company_id", company_merges, """
+                    INSERT INTO cv_company (cv_id, company_id)
+                    SELECT cv_id, %s FROM cv_company WHERE company_id = %s
+                    ON CONFLICT (cv_id, company_id) DO NOTHING
+                """)
+                cur.execute("REFRESH MATERIALIZED VIEW cv_aggregated")
+                conn.commit()
+                print("\nMerged and refreshed cv_aggregated")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return {
+        "skills_merged": sum(len(members) - 1 for members in skill_merges.values()),
+        "companies_merged": sum(len(members) - 1 for members in company_merges.values()),
+    }
+
+
+if __name__ == "__main__":
+    merge_duplicates(dry_run="--dry-run" in sys.argv)
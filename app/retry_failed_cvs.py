@@ -0,0 +1,29 @@
+import asyncio
+import os
+import sys
+
+from app.create_db import retry_dead_letters, run_dead_letter_worker
+from app.services.dead_letter import DeadLetterQueue
+
+
+async def retry_failed_cvs(once: bool = False):
+    # Get the project root directory
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cv_directory = os.path.join(project_root, "data", "cv_storage")
+    dead_letter = DeadLetterQueue(os.path.join(project_root, "data", "error_cvs"))
+
+    entries = dead_letter.get_entries()
+    print(f"Dead-lettered CVs: {len(entries)} "
+          f"({sum(1 for e in entries if e['next_retry_at'] is not None)} scheduled for retry)")
+
+    if once:
+        result = await retry_dead_letters(cv_directory)
+        print(f"Recovered: {len(result['recovered'])}, still failing: {len(result['failed'])}")
+        return result
+
+    print("Watching error_cvs for due retries (Ctrl+C to stop)")
+    await run_dead_letter_worker(cv_directory)
+
+
+if __name__ == "__main__":
+    asyncio.run(retry_failed_cvs(once="--once" in sys.argv))
@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from prometheus_client import Counter
+
+from app.config import CACHE_BACKEND, CACHE_PATH, CACHE_URL, CACHE_LOCAL_MAX_ITEMS
+from app.utils.metrics import logger
+
+CACHE_REQUESTS = Counter(
+    "clerk_cache_requests_total",
+    "Cache lookups by namespace and the tier that answered them",
+    ["namespace", "result"],
+)
+
+# Purge expired rows from the shared tier every this many writes
+PURGE_EVERY_WRITES = 1000
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable key for any JSON-serializable parts (prompts, texts, model names...)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Bounded in-process tier. Values are stored serialized so callers never share mutable objects."""
+
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._items[key] = (value, expires_at)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+
+class SQLiteCache:
+    """
+    Shared tier in a local SQLite file, for several workers on the same host or volume.
+
+    WAL mode lets readers in every worker proceed while one of them writes.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return row[0]
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                               (key, value, expires_at))
+            self._writes += 1
+            if self._writes % PURGE_EVERY_WRITES == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                                   (time.time(),))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+class RedisCache:
+    """Shared tier on any Redis-protocol server (Redis, Valkey, KeyDB or a local stand-in)."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis needs the redis package: pip install redis")
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, decode_responses=True)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self._client.set(key, value, ex=int(ttl) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+
+class TieredCache:
+    """
+    In-process LRU in front of the shared tier, scoped to one namespace.
+
+    Shared-tier hits are copied into the LRU, so a value computed by any worker is
+    served from memory by every worker after its first lookup. Shared-tier errors are
+    logged and treated as misses; the cache never fails a request.
+    """
+
+    def __init__(self, namespace: str, local: LRUCache, shared: Optional[Any] = None, ttl: Optional[float] = None):
+        self.namespace = namespace
+        self.local = local
+        self.shared = shared
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"clerk:{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        key = self._key(key)
+        value = self.local.get(key)
+        if value is not None:
+            CACHE_REQUESTS.labels(self.namespace, "local_hit").inc()
+            return json.loads(value)
+        if self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except Exception as e:
+                logger.warning("Shared cache read failed: %s", e)
+            if value is not None:
+                CACHE_REQUESTS.labels(self.namespace, "shared_hit").inc()
+                self.local.set(key, value, self.ttl)
+                return json.loads(value)
+        CACHE_REQUESTS.labels(self.namespace, "miss").inc()
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        key = self._key(key)
+        serialized = json.dumps(value, default=str)
+        self.local.set(key, serialized, self.ttl)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, serialized, self.ttl)
+            except Exception as e:
+                logger.warning("Shared cache write failed: %s", e)
+
+    def delete(self, key: str) -> None:
+        key = self._key(key)
+        self.local.delete(key)
+        if self.shared is not None:
+            try:
+                self.shared.delete(key)
+            except Exception as e:
+                logger.warning("Shared cache delete failed: %s", e)
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """get() without blocking the event loop on the shared tier."""
+        if self.shared is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def set_async(self, key: str, value: Any) -> None:
+        if self.shared is None:
+            self.set(key, value)
+            return
+        await asyncio.to_thread(self.set, key, value)
+
+
+_local_tier = None
+_shared_tier = None
+_shared_tier_loaded = False
+_tiers_lock = threading.Lock()
+
+
+def _build_shared_tier() -> Optional[Any]:
+    if CACHE_BACKEND == "sqlite":
+        return SQLiteCache(CACHE_PATH)
+    if CACHE_BACKEND == "redis":
+        return RedisCache(CACHE_URL)
+    if CACHE_BACKEND in ("memory", "none"):
+        return None
+    raise ValueError(f"Unknown CACHE_BACKEND: {CACHE_BACKEND}")
+
+
+def get_cache(namespace: str, ttl: Optional[float] = None) -> TieredCache:
+    """
+    Cache for one namespace (llm, embedding, vocabulary, search...).
+
+    All namespaces share one LRU and one shared-tier connection per process, both
+    created on first use so importing this module stays cheap.
+    """
+    global _local_tier, _shared_tier, _shared_tier_loaded
+    with _tiers_lock:
+        if _local_tier is None:
+            # CACHE_BACKEND=none disables caching altogether (e.g. for load tests)
+            _local_tier = LRUCache(0 if CACHE_BACKEND == "none" else CACHE_LOCAL_MAX_ITEMS)
+        if not _shared_tier_loaded:
+            try:
+                _shared_tier = _build_shared_tier()
+            except Exception as e:
+                logger.warning("Shared cache unavailable, using the in-process tier only: %s", e)
+            _shared_tier_loaded = True
+    return TieredCache(namespace, _local_tier, _shared_tier, ttl)
@@ -0,0 +1,207 @@
+import difflib
+import re
+import threading
+import unicodedata
+from typing import Dict, Any, List, Iterable, Optional
+
+# Variants the model keeps producing, keyed by their compact form (lowercase, no separators).
+# Values follow the naming rules of the FIELDS_AND_SCORE prompt. Only spellings and synonyms of one
+# skill belong here: merge_duplicates rewrites stored rows with this table, so related but distinct
+# skills (swift and ios, asp.net and dotnet) must stay apart.
+SKILL_ALIASES = {
+    "reactjs": "react",
+    "reactnative": "react_native",
+    "nextjs": "next_js",
+    "nuxtjs": "nuxt",
+    "vuejs": "vue",
+    "vue3": "vue",
+    "angularjs": "angular",
+    "nodejs": "node",
+    "expressjs": "express",
+    "js": "javascript",
+    "es6": "javascript",
+    "javascriptes6": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "golang": "go",
+    "python3": "python",
+    "py": "python",
+    "java8": "java",
+    "csharp": "c#",
+    "cpp": "c++",
+    "cplusplus": "c++",
+    "net": "dotnet",
+    "netcore": "dotnet",
+    "html5": "html",
+    "css3": "css",
+    "scss": "sass",
+    "tailwind": "tailwind_css",
+    "tailwindcss": "tailwind_css",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "mssql": "sql_server",
+    "sqlserver": "sql_server",
+    "amazonwebservices": "aws",
+    "googlecloud": "gcp",
+    "googlecloudplatform": "gcp",
+    "microsoftazure": "azure",
+    "ml": "machine_learning",
+    "machinelearning": "machine_learning",
+    "ai": "artificial_intelligence",
+    "ci": "ci_cd",
+    "cicd": "ci_cd",
+    "androiddevelopment": "android",
+    "androidsdk": "android",
+    "iosdevelopment": "ios",
+}
+
+# Legal-form suffixes ignored when comparing company names
+COMPANY_SUFFIXES = re.compile(
+    r"[\s,]+(s\.?\s?a\.?\s?u?|s\.?\s?l\.?\s?u?|inc|ltd|llc|gmbh|corp(oration)?|co|plc|ag|sp\.?\s?z\s?o\.?\s?o)\.?$",
+    re.IGNORECASE,
+)
+
+# Fuzzy matching only for names at least this long: short ones collide too easily (go/git, r/c)
+MIN_FUZZY_LENGTH = 5
+SKILL_FUZZY_CUTOFF = 0.9
+COMPANY_FUZZY_CUTOFF = 0.92
+
+
+def _strip_accents(value: str) -> str:
+    return unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode()
+
+
+def normalize_skill_name(name: str) -> str:
+    """Lowercase, underscore-separated, no special characters except # and +."""
+    name = _strip_accents(name.strip().lower())
+    name = re.sub(r"[\s\-./]+", "_", name)
+    name = re.sub(r"[^a-z0-9_#+]", "", name)
+    return name.strip("_")
+
+
+def skill_compact_key(name: str) -> str:
+    """Separator-free form, so react, react_js and React.js compare as reactjs/react."""
+    return normalize_skill_name(name).replace("_", "")
+
+
+def company_compact_key(name: str) -> str:
+    name = _strip_accents(" ".join(name.split())).lower()
+    name = COMPANY_SUFFIXES.sub("", name)
+    return re.sub(r"[^a-z0-9]", "", name)
+
+
+class Canonicalizer:
+    """
+    Deterministic skill and company canonicalization against the known vocabulary.
+
+    Lookups go alias table -> exact compact match -> fuzzy match (difflib, cutoff-bound),
+    and unknown names become known as they are seen, so variants arriving later
+    collapse onto the first spelling.
+    """
+
+    def __init__(self, known_skills: Iterable[str] = (), known_companies: Iterable[str] = ()):
+        self._skills: Dict[str, str] = {}
+        self._companies: Dict[str, str] = {}
+        self._resolved: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        for canonical in SKILL_ALIASES.values():
+            self._skills.setdefault(skill_compact_key(canonical), canonical)
+        for skill in known_skills:
+            self.add_skill(skill)
+        for company in known_companies:
+            self.add_company(company)
+
+    def add_skill(self, name: str) -> None:
+        key = skill_compact_key(name)
+        if key:
+            with self._lock:
+                self._skills.setdefault(key, normalize_skill_name(name))
+
+    def add_company(self, name: str) -> None:
+        key = company_compact_key(name)
+        if key:
+            with self._lock:
+                self._companies.setdefault(key, " ".join(name.split()))
+
+    def _match(self, key: str, known: Dict[str, str], cutoff: float) -> Optional[str]:
+        if key in known:
+            return known[key]
+        if len(key) < MIN_FUZZY_LENGTH:
+            return None
+        # Known names of very different length can never reach the cutoff
+        candidates = [k for k in known if abs(len(k) - len(key)) <= len(key) * (1 - cutoff) * 2 + 1]
+        matches = difflib.get_close_matches(key, candidates, n=1, cutoff=cutoff)
+        return known[matches[0]] if matches else None
+
+    def canonical_skill(self, name: str, learn: bool = True) -> str:
+        """Canonical name for a skill; learn=False resolves without adding unknown names (for queries)."""
+        normalized = normalize_skill_name(name)
+        key = normalized.replace("_", "")
+        if not key:
+            return ""
+        resolved = self._resolved.get(("skill", key))
+        if resolved is not None:
+            return resolved
+
+        canonical = SKILL_ALIASES.get(key)
+        if canonical is None:
+            # "vue.js" style suffixes on an otherwise known skill
+            if key.endswith("js") and key[:-2] in self._skills:
+                canonical = self._skills[key[:-2]]
+            else:
+                canonical = self._match(key, self._skills, SKILL_FUZZY_CUTOFF) or normalized
+        if learn:
+            self.add_skill(canonical)
+            self._resolved[("skill", key)] = canonical
+        return canonical
+
+    def canonical_company(self, name: str) -> str:
+        key = company_compact_key(name)
+        if not key:
+            return " ".join(name.split())
+        resolved = self._resolved.get(("company", key))
+        if resolved is not None:
+            return resolved
+
+        canonical = self._match(key, self._companies, COMPANY_FUZZY_CUTOFF) or " ".join(name.split())
+        self.add_company(canonical)
+        self._resolved[("company", key)] = canonical
+        return canonical
+
+    def canonicalize_skills(self, skills: Dict[str, int]) -> Dict[str, int]:
+        """Canonical names; when several variants collapse the highest score wins."""
+        result: Dict[str, int] = {}
+        for name, score in skills.items():
+            canonical = self.canonical_skill(name)
+            if canonical:
+                result[canonical] = max(score, result.get(canonical, score))
+        return result
+
+    def canonicalize_companies(self, companies: List[str]) -> List[str]:
+        return list(dict.fromkeys(filter(None, (self.canonical_company(c) for c in companies))))
+
+    def canonicalize(self, cv_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Canonicalize the skills and companies of an extraction result in place."""
+        cv_data["skills"] = self.canonicalize_skills(cv_data.get("skills", {}))
+        cv_data["companies"] = self.canonicalize_companies(cv_data.get("companies", []))
+        return cv_data
+
+
+_canonicalizer = None
+_canonicalizer_lock = threading.Lock()
+
+
+def get_canonicalizer(conn) -> Canonicalizer:
+    """Process-wide canonicalizer, seeded once from the skill and company tables."""
+    global _canonicalizer
+    with _canonicalizer_lock:
+        if _canonicalizer is None:
+            with conn.cursor() as cur:
+                cur.execute("SELECT name FROM skill")
+                skills = [row[0] for row in cur.fetchall()]
+                cur.execute("SELECT name FROM company")
+                companies = [row[0] for row in cur.fetchall()]
+            _canonicalizer = Canonicalizer(skills, companies)
+    return _canonicalizer
@@ -1,12 +1,13 @@
-
 import json
 from typing import List, Sequence, Any
 
 from llama_index.core.node_parser import JSONNodeParser
-from llama_index.core.schema import BaseNode
+from llama_index.core.schema import BaseNode, TextNode, NodeRelationship
 
 
 class CustomJSONNodeParser(JSONNodeParser):
+    """Turn {"summary": ...} documents into a single summary node each (see build_summary_document)."""
+
     def _parse_nodes(
         self, nodes: Sequence[BaseNode], show_progress: bool = False, **kwargs: Any
     ) -> List[BaseNode]:
@@ -14,27 +15,23 @@ class CustomJSONNodeParser(JSONNodeParser):
         for node in nodes:
             try:
                 # Load the JSON content
-                data = json.loads(node.get_content(metadata_mode="NONE"))
-                
+                data = json.loads(node.get_content(metadata_mode="none"))
+
                 # Extract summary and metadata
                 summary = data.get("summary", "")
-                metadata = node.metadata
+                if not summary:
+                    continue
 
-                # Create a node for the summary with metadata
-                summary_node = BaseNode(
-                    id_=self.id_func(),
+                # Create a node for the summary with the document's metadata
+                summary_node = TextNode(
                     text=summary,
-                    metadata={
-                        "source_file": metadata.get("source_file", ""),
-                        "name": metadata.get("name", ""),
-                        "email": metadata.get("email", ""),
-                        "country": metadata.get("country", ""),
-                        "skills": metadata.get("skills", []),
-                        "summary": summary
-                    }
+                    metadata={**node.metadata, "summary": summary},
+                    excluded_embed_metadata_keys=list(node.excluded_embed_metadata_keys),
+                    excluded_llm_metadata_keys=list(node.excluded_llm_metadata_keys),
+                    relationships={NodeRelationship.SOURCE: node.as_related_node_info()},
                 )
                 all_nodes.append(summary_node)
 
             except json.JSONDecodeError:
                 continue
-        return all_nodes 
\ No newline at end of file
+        return all_nodes
@@ -0,0 +1,227 @@
+import json
+import re
+import sys
+from typing import Dict, Any, List, Tuple
+
+from llama_index.core.schema import BaseNode, Document, NodeRelationship, RelatedNodeInfo, TextNode
+
+from app.utils.text_compaction import count_tokens, FALLBACK_CHARS_PER_TOKEN
+
+# Section headings as they appear in English and Spanish CVs, alone on a line or followed by ":"
+SECTION_HEADINGS = {
+    "profile": ["summary", "profile", "about me", "about", "objective", "professional summary",
+                "resumen", "perfil", "sobre mí", "sobre mi", "extracto"],
+    "experience": ["experience", "work experience", "professional experience", "employment", "employment history",
+                   "work history", "experiencia", "experiencia laboral", "experiencia profesional"],
+    "education": ["education", "academic background", "studies", "formación", "formacion",
+                  "formación académica", "formacion academica", "educación", "educacion", "estudios"],
+    "skills": ["skills", "technical skills", "technologies", "tech stack", "competencies",
+               "habilidades", "aptitudes", "conocimientos", "tecnologías", "tecnologias"],
+    "other": ["languages", "certifications", "certificates", "courses", "projects", "interests", "hobbies",
+              "references", "idiomas", "certificaciones", "cursos", "proyectos", "intereses", "referencias"],
+}
+
+_HEADING_PATTERN = re.compile(
+    r"^\s*(?P<heading>" + "|".join(
+        re.escape(heading) for headings in SECTION_HEADINGS.values()
+        for heading in sorted(headings, key=len, reverse=True)
+    ) + r")\s*(:\s*(?P<rest>.*))?$",
+    re.IGNORECASE,
+)
+_SECTION_BY_HEADING = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# What each section contributes to the index. Sections with embed=False are not indexed; the
+# skills section is synthesized from the extracted scores rather than taken from the raw text.
+SECTION_POLICIES = {
+    "profile": {"embed": True, "max_tokens": 200},
+    "skills": {"embed": True, "max_tokens": 200},
+    "experience": {"embed": True, "max_tokens": 300},  # per company
+    "education": {"embed": True, "max_tokens": 120},
+    "other": {"embed": False, "max_tokens": 0},
+}
+
+# Metadata the re-ranking reads but that must not be embedded (or sent to an LLM) with every chunk
+NON_EMBEDDED_METADATA = ["cv_id", "source_file", "email", "key_skills", "companies", "section", "company", "summary"]
+
+# Metadata the indexed nodes keep once embedded; the rest is stored once per CV in its CVCard
+NODE_METADATA = ["cv_id", "section", "company"]
+
+
+def split_cv_sections(cv_text: str) -> List[Tuple[str, str]]:
+    """Split raw CV text at known headings into (section, text); text before the first heading is "profile"."""
+    sections: List[Tuple[str, List[str]]] = [("profile", [])]
+    for line in cv_text.splitlines():
+        match = _HEADING_PATTERN.match(line)
+        if match:
+            sections.append((_SECTION_BY_HEADING[match.group("heading").lower()], []))
+            if match.group("rest"):
+                sections[-1][1].append(match.group("rest"))
+        else:
+            sections[-1][1].append(line)
+    return [(section, "\n".join(lines).strip()) for section, lines in sections if "\n".join(lines).strip()]
+
+
+def split_experience_by_company(text: str, companies: List[str]) -> List[Tuple[str, str]]:
+    """Split an experience section into (company, text) at the lines naming an extracted company."""
+    patterns = [(company, re.compile(re.escape(company), re.IGNORECASE)) for company in companies if company]
+    entries: List[Tuple[str, List[str]]] = [("", [])]
+    for line in text.splitlines():
+        company = next((name for name, pattern in patterns if pattern.search(line)), None)
+        if company and company != entries[-1][0]:
+            entries.append((company, []))
+        entries[-1][1].append(line)
+    return [(company, "\n".join(lines).strip()) for company, lines in entries if "\n".join(lines).strip()]
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep whole lines up to max_tokens (the first line is cut if it alone is longer)."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    kept = []
+    for line in text.splitlines():
+        if count_tokens("\n".join(kept + [line])) > max_tokens:
+            break
+        kept.append(line)
+    return "\n".join(kept) if kept else text[:max_tokens * FALLBACK_CHARS_PER_TOKEN]
+
+
+def skills_text(skills: Dict[str, int]) -> str:
+    """Skills grouped by level, strongest first: "Expert: python, docker. Advanced: aws." """
+    levels = [("Expert", 90), ("Advanced", 70), ("Intermediate", 50), ("Basic", 0)]
+    groups = {label: [] for label, _ in levels}
+    for skill, score in sorted(skills.items(), key=lambda item: -item[1]):
+        groups[next(label for label, minimum in levels if score >= minimum)].append(skill.lower())
+    return ". ".join(f"{label}: {', '.join(names)}" for label, names in groups.items() if names) + "."
+
+
+def cv_metadata(cv_json: Dict[str, Any], cv_id: int, filename: str) -> Dict[str, Any]:
+    """The metadata the vector search filters and re-ranks on."""
+    companies = cv_json.get("companies", [])
+    return {
+        "source_file": filename,
+        "cv_id": cv_id,
+        "name": cv_json.get("name", ""),
+        "email": cv_json.get("email", ""),
+        "country": cv_json.get("country", ""),
+        "key_skills": json.dumps({k: v for k, v in cv_json.get("skills", {}).items() if v >= 50}),
+        "companies": json.dumps(list(companies.keys()) if isinstance(companies, dict) else companies),
+    }
+
+
+def _document(text: str, metadata: Dict[str, Any]) -> Document:
+    return Document(
+        text=text,
+        metadata=metadata,
+        excluded_embed_metadata_keys=NON_EMBEDDED_METADATA,
+        excluded_llm_metadata_keys=NON_EMBEDDED_METADATA,
+    )
+
+
+def build_section_documents(cv_json: Dict[str, Any], cv_id: int, filename: str, cv_text: str) -> List[Document]:
+    """
+    One document per CV section (profile, skills, each company of the experience, education),
+    each cut to its SECTION_POLICIES token budget. The raw text is never embedded whole.
+    """
+    metadata = cv_metadata(cv_json, cv_id, filename)
+    companies = json.loads(metadata["companies"])
+    header = f"{cv_json.get('name', '')} ({cv_json.get('country', '')})"
+    parts: List[Tuple[str, str, str]] = []
+
+    for section, text in split_cv_sections(cv_text or ""):
+        if section == "experience":
+            parts.extend((section, company, text) for company, text in split_experience_by_company(text, companies))
+        elif section != "skills":
+            parts.append((section, "", text))
+    # Extracted scores say more than the CV's own skills list
+    parts.append(("skills", "", skills_text(cv_json.get("skills", {}))))
+    if cv_json.get("comment"):
+        parts.append(("profile", "", cv_json["comment"]))
+
+    documents = []
+    for section, company, text in parts:
+        policy = SECTION_POLICIES[section]
+        if not policy["embed"]:
+            continue
+        label = f"{section.capitalize()}{' at ' + company if company else ''}"
+        body = truncate_to_tokens(text, policy["max_tokens"])
+        documents.append(_document(f"{header} - {label}:\n{body}", {**metadata, "section": section, "company": company}))
+    return documents
+
+
+def build_summary_document(cv_json: Dict[str, Any], cv_id: int, filename: str) -> Document:
+    """
+    A single JSON document {"summary": ...} for CustomJSONNodeParser, which turns it into one
+    compact node per CV: profile, skills by level, companies and the extraction comment only.
+    """
+    metadata = cv_metadata(cv_json, cv_id, filename)
+    companies = ", ".join(json.loads(metadata["companies"]))
+    summary = " ".join(filter(None, [
+        f"{cv_json.get('name', '')} is a professional based in {cv_json.get('country', '')}.",
+        f"Worked at: {companies}." if companies else "",
+        f"Skills: {skills_text(cv_json.get('skills', {}))}",
+        cv_json.get("comment", ""),
+    ]))
+    return _document(json.dumps({"summary": summary}), {**metadata, "section": "summary"})
+
+
+def _json_list(value: Any) -> List[Any]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return []
+    return list(value or [])
+
+
+class CVCard:
+    """
+    The fields of one indexed CV that re-ranking and result display need, shared by all of its nodes.
+
+    Strings are interned and lists are tuples, so a card costs a few hundred bytes however many
+    section nodes the CV has. The raw CV text is not kept; it is read from cv.cv_text when a
+    result is shown (see CVRagSystem.load_cv_texts).
+    """
+
+    __slots__ = ("cv_id", "name", "email", "country", "source_file", "key_skills", "companies", "summary")
+
+    def __init__(self, cv_id: int, name: str = "", email: str = "", country: str = "", source_file: str = "",
+                 key_skills: Tuple[str, ...] = (), companies: Tuple[str, ...] = (), summary: str = ""):
+        self.cv_id = cv_id
+        self.name = name or ""
+        self.email = email or ""
+        self.country = sys.intern(country or "")
+        self.source_file = source_file or ""
+        self.key_skills = tuple(sys.intern(skill) for skill in key_skills)
+        self.companies = tuple(sys.intern(company) for company in companies)
+        self.summary = summary or ""
+
+    @classmethod
+    def from_metadata(cls, metadata: Dict[str, Any]) -> "CVCard":
+        """Card from the metadata cv_metadata() gives the documents (key_skills and companies as JSON)."""
+        return cls(
+            cv_id=metadata.get("cv_id"),
+            name=metadata.get("name", ""),
+            email=metadata.get("email", ""),
+            country=metadata.get("country", ""),
+            source_file=metadata.get("source_file", ""),
+            key_skills=_json_list(metadata.get("key_skills")),
+            companies=_json_list(metadata.get("companies")),
+            summary=metadata.get("summary", ""),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+def lean_node(node: BaseNode) -> TextNode:
+    """
+    Copy of an embedded node without its text and with only NODE_METADATA, for the docstore.
+
+    The embedding is computed before this, so search results are unchanged; the node's fields
+    come back from its CVCard when it is returned.
+    """
+    return TextNode(
+        id_=node.node_id,
+        metadata={key: node.metadata[key] for key in NODE_METADATA if node.metadata.get(key)},
+        relationships={NodeRelationship.SOURCE: RelatedNodeInfo(node_id=node.ref_doc_id)} if node.ref_doc_id else {},
+    )
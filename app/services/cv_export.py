@@ -0,0 +1,231 @@
+import io
+import os
+import re
+from typing import Any, Iterator, List, Optional, Tuple
+
+from app.config import EXPORT_BATCH_SIZE
+from app.utils.metrics import trace_stage
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# CVs are exported in windows of consecutive ids. Each window is three COPY ... TO STDOUT
+# queries (CVs, skills, companies) parsed by Arrow's CSV reader, and the skill map and company
+# list columns are assembled from offsets, so no value goes through Python objects.
+CV_QUERY = "SELECT id, filename, name, email, phone, country, comment{cv_text} FROM cv WHERE {window} ORDER BY id"
+SKILL_QUERY = """
+    SELECT cs.cv_id, s.name, cs.value FROM cv_skill cs JOIN skill s ON s.id = cs.skill_id
+    WHERE {window} ORDER BY cs.cv_id, s.name
+"""
+COMPANY_QUERY = """
+    SELECT cc.cv_id, c.name FROM cv_company cc JOIN company c ON c.id = cc.company_id
+    WHERE {window} ORDER BY cc.cv_id, c.name
+"""
+
+# Incremental part files: cvs-<first id>-<last id>.parquet
+PART_PATTERN = re.compile(r"^cvs-(\d+)-(\d+)\.(parquet|arrow)$")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.csv  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("CV export needs the pyarrow package: pip install pyarrow")
+    return pyarrow
+
+
+def export_schema(include_text: bool = False):
+    """Arrow schema of the export; skills is a map column of skill name to score."""
+    pa = _pyarrow()
+    fields = [
+        pa.field("id", pa.int32(), nullable=False),
+        pa.field("filename", pa.string()),
+        pa.field("name", pa.string()),
+        pa.field("email", pa.string()),
+        pa.field("phone", pa.string()),
+        pa.field("country", pa.string()),
+        pa.field("comment", pa.string()),
+        pa.field("skills", pa.map_(pa.string(), pa.uint8())),
+        pa.field("companies", pa.list_(pa.string())),
+    ]
+    if include_text:
+        fields.append(pa.field("cv_text", pa.string()))
+    return pa.schema(fields)
+
+
+def _copy_table(cur, query: str, params: Tuple, columns: List[Tuple[str, Any]]):
+    """Run query through COPY ... TO STDOUT as CSV and parse it into an Arrow table."""
+    pa = _pyarrow()
+    buffer = io.BytesIO()
+    cur.copy_expert(cur.mogrify(f"COPY ({query}) TO STDOUT WITH (FORMAT csv)", params).decode(), buffer)
+    names = [name for name, _ in columns]
+    if not buffer.tell():
+        return pa.table({name: pa.array([], type=column_type) for name, column_type in columns})
+    buffer.seek(0)
+    return pa.csv.read_csv(
+        buffer,
+        read_options=pa.csv.ReadOptions(column_names=names),
+        parse_options=pa.csv.ParseOptions(newlines_in_values=True),
+        # COPY writes NULL as an empty field and an empty string as ""
+        convert_options=pa.csv.ConvertOptions(column_types=dict(columns), strings_can_be_null=True,
+                                              quoted_strings_can_be_null=False),
+    )
+
+
+def _offsets(owner_ids, ids):
+    """List offsets of each id's rows in owner_ids (both sorted)."""
+    import numpy as np
+
+    pa = _pyarrow()
+    return pa.array(np.append(np.searchsorted(owner_ids, ids), len(owner_ids)).astype(np.int32))
+
+
+def _window_batch(cur, lower: int, upper: Optional[int], schema):
+    pa = _pyarrow()
+    window, params = ("{id} > %s AND {id} <= %s", (lower, upper)) if upper is not None else ("{id} > %s", (lower,))
+    include_text = "cv_text" in schema.names
+    cvs = _copy_table(
+        cur, CV_QUERY.format(cv_text=", cv_text" if include_text else "", window=window.format(id="id")), params,
+        [(field.name, field.type) for field in schema if field.name not in ("skills", "companies")],
+    )
+    skills = _copy_table(cur, SKILL_QUERY.format(window=window.format(id="cs.cv_id")), params,
+                         [("cv_id", pa.int32()), ("key", pa.string()), ("value", pa.uint8())])
+    companies = _copy_table(cur, COMPANY_QUERY.format(window=window.format(id="cc.cv_id")), params,
+                            [("cv_id", pa.int32()), ("name", pa.string())])
+
+    ids = cvs.column("id").to_numpy()
+    columns = {name: cvs.column(name).combine_chunks() for name in cvs.column_names}
+    columns["skills"] = pa.MapArray.from_arrays(
+        _offsets(skills.column("cv_id").to_numpy(), ids),
+        skills.column("key").combine_chunks(), skills.column("value").combine_chunks(),
+    )
+    columns["companies"] = pa.ListArray.from_arrays(
+        _offsets(companies.column("cv_id").to_numpy(), ids), companies.column("name").combine_chunks(),
+    )
+    return pa.RecordBatch.from_arrays([columns[name] for name in schema.names], schema=schema)
+
+
+def iter_cv_batches(conn, since_id: int = 0, include_text: bool = False,
+                    batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Any]:
+    """
+    Stream CVs with id > since_id as Arrow record batches of up to batch_size rows.
+
+    Memory stays at one batch whatever the table size. All windows read the same snapshot
+    (repeatable read), so CVs ingested meanwhile are left for the next incremental export.
+    store_cv_data commits CVs in id order (CV_INSERT_LOCK), so no lower id can commit after the
+    snapshot and the highest exported id is a safe high-water mark. The caller owns the
+    connection; the transaction is rolled back at the end.
+    """
+    schema = export_schema(include_text)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            lower = since_id
+            while True:
+                # Upper bound of the next batch_size ids, or None for the last window
+                cur.execute("SELECT id FROM cv WHERE id > %s ORDER BY id OFFSET %s LIMIT 1", (lower, batch_size - 1))
+                row = cur.fetchone()
+                upper = row[0] if row else None
+                with trace_stage("export_batch") as trace:
+                    batch = _window_batch(cur, lower, upper, schema)
+                    trace["rows"] = batch.num_rows
+                if batch.num_rows:
+                    yield batch
+                if upper is None:
+                    break
+                lower = upper
+    finally:
+        conn.rollback()
+
+
+class _ChunkSink:
+    """Write-only file object collecting what a writer produces, drained after every batch."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def _open_writer(sink, schema, file_format: str):
+    pa = _pyarrow()
+    if file_format == "parquet":
+        return pa.parquet.ParquetWriter(sink, schema, compression="zstd")
+    return pa.ipc.new_stream(sink, schema) if isinstance(sink, _ChunkSink) else pa.ipc.new_file(sink, schema)
+
+
+def stream_export(conn, file_format: str = "parquet", since_id: int = 0, include_text: bool = False) -> Iterator[bytes]:
+    """
+    Serialize the export incrementally for an HTTP response: one Parquet row group (or Arrow
+    IPC stream message) per batch, yielded as soon as it is written.
+    """
+    sink = _ChunkSink()
+    writer = _open_writer(sink, export_schema(include_text), file_format)
+    for batch in iter_cv_batches(conn, since_id, include_text):
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def last_exported_id(directory: str) -> int:
+    """Highest CV id already written to the part files of an export directory."""
+    if not os.path.isdir(directory):
+        return 0
+    ids = [int(match.group(2)) for match in map(PART_PATTERN.match, os.listdir(directory)) if match]
+    return max(ids, default=0)
+
+
+def export_cvs(conn, directory: str, file_format: str = "parquet", since_id: Optional[int] = None,
+               include_text: bool = False) -> Optional[str]:
+    """
+    Write the CVs after since_id (default: after the last part in `directory`) to a new part
+    file named after its id range. Returns its path, or None when there was nothing new.
+
+    Arrow files are written in the IPC file format, which readers can memory-map.
+    Only inserts are picked up: deleted or re-extracted CVs need a full export into a new directory.
+    """
+    os.makedirs(directory, exist_ok=True)
+    if since_id is None:
+        since_id = last_exported_id(directory)
+    temp_path = os.path.join(directory, f".cvs-{since_id}{FORMATS[file_format]}.tmp")
+    first_id = last_id = None
+    writer = None
+    try:
+        for batch in iter_cv_batches(conn, since_id, include_text):
+            if writer is None:
+                writer = _open_writer(temp_path, batch.schema, file_format)
+                first_id = batch.column(0)[0].as_py()
+            writer.write_batch(batch)
+            last_id = batch.column(0)[-1].as_py()
+        if writer is None:
+            return None
+        writer.close()
+        writer = None
+        path = os.path.join(directory, f"cvs-{first_id:08d}-{last_id:08d}{FORMATS[file_format]}")
+        os.replace(temp_path, path)
+        return path
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
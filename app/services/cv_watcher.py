@@ -0,0 +1,192 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Any, Callable, Awaitable, Optional, Tuple
+
+from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from watchdog.observers import Observer
+
+from app.utils.metrics import logger
+
+# Editors and browsers write to these first and rename when done
+TEMPORARY_SUFFIXES = (".part", ".crdownload", ".tmp", ".swp")
+
+
+def is_cv_file(path: str) -> bool:
+    filename = os.path.basename(path)
+    return filename.lower().endswith(".pdf") and not filename.startswith((".", "~"))
+
+
+def file_state(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size), or None when the file is gone."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class IngestCursor:
+    """
+    Which files were ingested and in which state, persisted as JSON.
+
+    On restart only files that are new or changed since their recorded state are
+    processed, instead of the whole folder going through the pipeline again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, Tuple[int, int]] = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.files = {name: tuple(state) for name, state in json.load(f)["files"].items()}
+
+    def is_current(self, filename: str, state: Tuple[int, int]) -> bool:
+        return self.files.get(filename) == state
+
+    def mark(self, filename: str, state: Tuple[int, int]) -> None:
+        self.files[filename] = state
+        self._save()
+
+    def forget(self, filename: str) -> None:
+        if self.files.pop(filename, None) is not None:
+            self._save()
+
+    def _save(self) -> None:
+        # Write to a temp file and rename so a crash never leaves a half-written cursor
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"updated_at": time.time(), "files": self.files}, f)
+        os.replace(temp_path, self.path)
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Forwards watchdog events (inotify on Linux) from the observer thread to the event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, on_change: Callable[[str], None],
+                 on_delete: Callable[[str], None]):
+        self.loop = loop
+        self.on_change = on_change
+        self.on_delete = on_delete
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.is_directory:
+            return
+        if event.event_type in ("created", "modified", "closed"):
+            self.loop.call_soon_threadsafe(self.on_change, event.src_path)
+        elif event.event_type == "moved":
+            self.loop.call_soon_threadsafe(self.on_delete, event.src_path)
+            self.loop.call_soon_threadsafe(self.on_change, event.dest_path)
+        elif event.event_type == "deleted":
+            self.loop.call_soon_threadsafe(self.on_delete, event.src_path)
+
+
+class CVWatcher:
+    """
+    Long-running ingestion of a CV folder.
+
+    A file is handed to `process` once it has stopped changing for `debounce` seconds,
+    so half-written uploads and copies are never read. `process(path, replace_existing)`
+    gets replace_existing=True when an already ingested file changed on disk.
+    """
+
+    def __init__(self, cv_directory: str, cursor_path: str,
+                 process: Callable[..., Awaitable[Dict[str, Any]]],
+                 debounce: float = 2.0, concurrency: int = 2):
+        self.cv_directory = cv_directory
+        self.cursor = IngestCursor(cursor_path)
+        self.process = process
+        self.debounce = debounce
+        self.concurrency = concurrency
+        # path -> (monotonic time of the last change, file state seen then)
+        self._pending: Dict[str, Tuple[float, Optional[Tuple[int, int]]]] = {}
+        self._queued = set()
+        # Paths a worker is processing; a change meanwhile waits until it is done
+        self._in_progress = set()
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+
+    def _on_change(self, path: str) -> None:
+        if is_cv_file(path) and not path.endswith(TEMPORARY_SUFFIXES):
+            self._pending[path] = (time.monotonic(), file_state(path))
+
+    def _on_delete(self, path: str) -> None:
+        self._pending.pop(path, None)
+        # Failed CVs are moved to error_cvs; the dead-letter queue owns them now
+        self.cursor.forget(os.path.basename(path))
+
+    def catch_up(self) -> int:
+        """Queue the files that are new or changed since the cursor was last saved."""
+        count = 0
+        with os.scandir(self.cv_directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not is_cv_file(entry.name):
+                    continue
+                stat = entry.stat()
+                if not self.cursor.is_current(entry.name, (stat.st_mtime_ns, stat.st_size)):
+                    self._on_change(entry.path)
+                    count += 1
+        return count
+
+    async def _debounce_loop(self) -> None:
+        while True:
+            await asyncio.sleep(min(0.5, self.debounce))
+            now = time.monotonic()
+            for path, (changed_at, state) in list(self._pending.items()):
+                if now - changed_at < self.debounce:
+                    continue
+                current = file_state(path)
+                if current is None:
+                    del self._pending[path]
+                elif current != state:
+                    # Still being written
+                    self._pending[path] = (now, current)
+                elif path in self._in_progress:
+                    # Picked up again once the running ingestion finishes
+                    self._pending[path] = (now, current)
+                else:
+                    del self._pending[path]
+                    if path not in self._queued:
+                        self._queued.add(path)
+                        self._queue.put_nowait(path)
+
+    async def _worker(self) -> None:
+        while True:
+            path = await self._queue.get()
+            self._queued.discard(path)
+            self._in_progress.add(path)
+            filename = os.path.basename(path)
+            state = file_state(path)
+            try:
+                if state is None or self.cursor.is_current(filename, state):
+                    continue
+                changed = filename in self.cursor.files
+                result = await self.process(path, replace_existing=changed)
+                logger.info("%s %s: %s", "Re-ingested" if changed else "Ingested", filename,
+                            result.get("message", result["status"]))
+                if result["status"] in ("success", "skipped"):
+                    self.cursor.mark(filename, state)
+            except Exception as e:
+                logger.error("Error ingesting %s: %s", filename, e)
+            finally:
+                self._in_progress.discard(path)
+                self._queue.task_done()
+
+    async def run(self) -> None:
+        os.makedirs(self.cv_directory, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        observer = Observer()
+        observer.schedule(_EventHandler(loop, self._on_change, self._on_delete), self.cv_directory, recursive=False)
+        observer.start()
+        try:
+            # Start watching before the scan so nothing landing in between is missed
+            logger.info("Watching %s (%d new or changed files to catch up on)", self.cv_directory, self.catch_up())
+            tasks = [asyncio.create_task(self._debounce_loop())]
+            tasks += [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+            await asyncio.gather(*tasks)
+        finally:
+            observer.stop()
+            observer.join()
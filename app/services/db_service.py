@@ -1,20 +1,50 @@
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional
 import psycopg2
 
+from app.config import DATABASE_NAME, DATABASE_USER, DATABASE_PASSWORD, DATABASE_HOST, DATABASE_PORT
+from app.services.canonicalizer import get_canonicalizer
+from app.services.fingerprint import store_fingerprint, find_near_duplicate
+from app.services.skill_matrix import record_ingested_cv, record_deleted_cv
+from app.utils.metrics import trace_stage
+
+
+# Transaction-level advisory lock taken by store_cv_data before it draws a CV id. CVs then commit
+# in id order, so an incremental export's highest id never has a lower one committing after it
+CV_INSERT_LOCK = 0x436c657278
+
+# Advisory lock held shared by every fresh ingestion, so dead-letter retries in any process can yield to them
+FRESH_INGESTION_LOCK = 0x436c65726b
+
 
 class DatabaseService:
     def __init__(self):
         self.conn = psycopg2.connect(
-            dbname="clerk_ai",
-            user="postgres",
-            password="secret",
-            host="localhost",
-            port="5432"
+            dbname=DATABASE_NAME,
+            user=DATABASE_USER,
+            password=DATABASE_PASSWORD,
+            host=DATABASE_HOST,
+            port=DATABASE_PORT
         )
 
-    async def store_cv_data(self, cv_data: Dict[str, Any]) -> int:
-        """Store CV data in the database and return the CV ID."""
-        with self.conn.cursor() as cur:
+    async def store_cv_data(self, cv_data: Dict[str, Any], replaces: Iterable[int] = ()) -> int:
+        """
+        Store CV data in the database and return the CV ID.
+
+        Skills and companies are canonicalized in place first, so cv_data afterwards
+        holds the names that were actually stored. The CVs in `replaces` are deleted in
+        the same transaction, so an older version is only gone once the new one is stored.
+        """
+        replaces = [cv_id for cv_id in replaces if cv_id is not None]
+        get_canonicalizer(self.conn).canonicalize(cv_data)
+        with trace_stage("db_write", skills=len(cv_data["skills"])), self.conn.cursor() as cur:
+            # Held until commit: a CV with a higher id cannot commit before this one
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (CV_INSERT_LOCK,))
+            # Before the insert: the previous version of the same file holds the filename
+            for old_cv_id in replaces:
+                cur.execute("DELETE FROM cv WHERE id = %s", (old_cv_id,))
+            # Stored on its own now, no longer a near-duplicate of another CV
+            cur.execute("DELETE FROM cv_duplicate WHERE filename = %s", (cv_data["filename"],))
+
             # Insert CV main data
             cur.execute("""
                 INSERT INTO cv (name, email, phone, country, cv_text, comment, filename)
@@ -71,24 +101,57 @@ class DatabaseService:
                     VALUES (%s, %s)
                 """, (cv_id, company_id))
 
+            # Fingerprint for near-duplicate detection of later uploads
+            if cv_data.get("cv_text"):
+                store_fingerprint(cur, cv_id, cv_data["cv_text"])
+
             self.conn.commit()
+            for old_cv_id in replaces:
+                record_deleted_cv(old_cv_id)
+            record_ingested_cv(cv_id, cv_data)
             return cv_id 
 
+    async def begin_fresh_ingestion(self) -> None:
+        """Hold the fresh-ingestion lock until this connection is closed."""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock_shared(%s)", (FRESH_INGESTION_LOCK,))
+        self.conn.commit()
+
+    async def fresh_ingestion_running(self) -> bool:
+        """Whether any process holds the fresh-ingestion lock right now."""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (FRESH_INGESTION_LOCK,))
+            acquired = cur.fetchone()[0]
+            if acquired:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (FRESH_INGESTION_LOCK,))
+        self.conn.commit()
+        return not acquired
+
     async def check_cv_exists(self, filename: str) -> bool:
-        """Check if a CV with the given filename already exists."""
+        """Check if a CV with the given filename (or a file linked to one as a duplicate) already exists."""
         with self.conn.cursor() as cur:
-            cur.execute("SELECT id FROM cv WHERE filename = %s", (filename,))
+            cur.execute("""
+                SELECT id FROM cv WHERE filename = %s
+                UNION ALL
+                SELECT cv_id FROM cv_duplicate WHERE filename = %s
+            """, (filename, filename))
             result = cur.fetchone()
             return result is not None
 
     async def get_cv_info(self, filename: str) -> Dict[str, Any]:
-        """Get basic info about an existing CV."""
+        """Get basic info about an existing CV, also when filename was linked to it as a duplicate."""
         with self.conn.cursor() as cur:
             cur.execute("""
                 SELECT id, name, email, country, filename 
                 FROM cv 
                 WHERE filename = %s
-            """, (filename,))
+                UNION ALL
+                SELECT cv.id, cv.name, cv.email, cv.country, cv.filename
+                FROM cv_duplicate d
+                JOIN cv ON cv.id = d.cv_id
+                WHERE d.filename = %s
+                LIMIT 1
+            """, (filename, filename))
             result = cur.fetchone()
             if result:
                 return {
@@ -98,4 +161,55 @@ class DatabaseService:
                     "country": result[3],
                     "filename": result[4]
                 }
-            return None 
\ No newline at end of file
+            return None
+
+    async def get_cv_data(self, cv_id: int) -> Optional[Dict[str, Any]]:
+        """A stored CV in the shape store_cv_data takes, with its skills and companies."""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT name, email, phone, country, cv_text, comment, filename
+                FROM cv WHERE id = %s
+            """, (cv_id,))
+            row = cur.fetchone()
+            if row is None:
+                return None
+            cv_data = dict(zip(("name", "email", "phone", "country", "cv_text", "comment", "filename"), row))
+            cur.execute("""
+                SELECT s.name, cs.value FROM cv_skill cs JOIN skill s ON s.id = cs.skill_id
+                WHERE cs.cv_id = %s
+            """, (cv_id,))
+            cv_data["skills"] = dict(cur.fetchall())
+            cur.execute("""
+                SELECT c.name FROM cv_company cc JOIN company c ON c.id = cc.company_id
+                WHERE cc.cv_id = %s
+            """, (cv_id,))
+            cv_data["companies"] = [name for (name,) in cur.fetchall()]
+            return cv_data
+
+    async def get_cv_texts(self, cv_ids: List[int]) -> Dict[int, str]:
+        """Raw text of the given CVs by id (missing ids are left out)."""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT id, cv_text FROM cv WHERE id = ANY(%s)", (list(cv_ids),))
+            return dict(cur.fetchall())
+
+    async def find_near_duplicate(self, cv_text: str, threshold: float,
+                                  exclude_cv_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Most similar stored CV whose text is at least `threshold` similar, or None."""
+        return find_near_duplicate(self.conn, cv_text, threshold, exclude_cv_id)
+
+    async def link_duplicate(self, filename: str, cv_id: int, similarity: float) -> None:
+        """Record filename as a near-duplicate of an existing CV instead of storing it again."""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO cv_duplicate (filename, cv_id, similarity)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (filename) DO UPDATE SET cv_id = EXCLUDED.cv_id, similarity = EXCLUDED.similarity
+            """, (filename, cv_id, similarity))
+        self.conn.commit()
+
+    async def delete_cv(self, cv_id: int) -> None:
+        """Delete a CV; skills, companies, fingerprint and duplicate links go with it."""
+        with self.conn.cursor() as cur:
+            cur.execute("DELETE FROM cv WHERE id = %s", (cv_id,))
+        self.conn.commit()
+        record_deleted_cv(cv_id)
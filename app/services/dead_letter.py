@@ -0,0 +1,138 @@
+import fcntl
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+import psycopg2
+from fastapi import HTTPException
+
+from app.config import DEAD_LETTER_BASE_DELAY_SECONDS, DEAD_LETTER_MAX_DELAY_SECONDS, DEAD_LETTER_MAX_ATTEMPTS
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+MANIFEST_FILENAME = "dead_letter.json"
+
+
+class UnreadableCVError(Exception):
+    """Raised when no text can be extracted from a CV file."""
+
+
+def classify_failure(error: Exception) -> str:
+    """Decide whether retrying a failed CV can ever succeed."""
+    if isinstance(error, UnreadableCVError):
+        return PERMANENT
+    if isinstance(error, HTTPException):
+        # The model answered but the CV lacks required data even after the targeted repair
+        if error.status_code == 422 and str(error.detail).startswith("Missing required fields"):
+            return PERMANENT
+        return TRANSIENT
+    if isinstance(error, (psycopg2.IntegrityError, psycopg2.DataError)):
+        return PERMANENT
+    return TRANSIENT
+
+
+class DeadLetterQueue:
+    """
+    Failed CVs parked in the error directory, with their failure reason and retry schedule.
+
+    The state is a JSON manifest next to the files rather than a database table, so that
+    failures caused by the database itself can still be recorded.
+    """
+
+    def __init__(self, error_directory: str):
+        self.error_directory = error_directory
+        self.manifest_path = os.path.join(error_directory, MANIFEST_FILENAME)
+        os.makedirs(error_directory, exist_ok=True)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """
+        Exclusive lock around a read-modify-write of the manifest.
+
+        The watcher, the API and retry_failed_cvs may all record failures at once. The lock
+        is on a separate file because _save replaces the manifest itself.
+        """
+        with open(self.manifest_path + ".lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        # Write to a temp file and rename so a crash never leaves a half-written manifest
+        fd, temp_path = tempfile.mkstemp(dir=self.error_directory, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    @staticmethod
+    def _retry_delay(attempts: int) -> float:
+        """Exponential backoff with jitter: base, 2*base, 4*base... capped."""
+        delay = min(DEAD_LETTER_MAX_DELAY_SECONDS, DEAD_LETTER_BASE_DELAY_SECONDS * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    def record_failure(self, file_path: str, error: Exception) -> Dict[str, Any]:
+        """Move the file into the error directory (if needed) and schedule its next retry."""
+        filename = os.path.basename(file_path)
+        error_file_path = os.path.join(self.error_directory, filename)
+        if os.path.abspath(file_path) != os.path.abspath(error_file_path) and os.path.exists(file_path):
+            shutil.move(file_path, error_file_path)
+
+        with self._locked():
+            entries = self._load()
+            now = time.time()
+            entry = entries.get(filename, {"filename": filename, "attempts": 0, "first_failed_at": now})
+            entry["attempts"] += 1
+            entry["last_failed_at"] = now
+            entry["reason"] = str(error.detail) if isinstance(error, HTTPException) else str(error)
+            entry["failure_type"] = classify_failure(error)
+
+            if entry["failure_type"] == TRANSIENT and entry["attempts"] < DEAD_LETTER_MAX_ATTEMPTS:
+                entry["next_retry_at"] = now + self._retry_delay(entry["attempts"])
+            else:
+                # Permanent failures and exhausted retries wait for a human
+                entry["next_retry_at"] = None
+
+            entries[filename] = entry
+            self._save(entries)
+        return entry
+
+    def resolve(self, filename: str, destination_directory: str) -> None:
+        """Drop a recovered CV from the queue and move it back with the processed CVs."""
+        error_file_path = os.path.join(self.error_directory, filename)
+        if os.path.exists(error_file_path):
+            shutil.move(error_file_path, os.path.join(destination_directory, filename))
+        with self._locked():
+            entries = self._load()
+            if entries.pop(filename, None) is not None:
+                self._save(entries)
+
+    def due_entries(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Transient failures whose retry time has come, oldest first."""
+        now = now or time.time()
+        due = [
+            entry for entry in self._load().values()
+            if entry.get("next_retry_at") is not None and entry["next_retry_at"] <= now
+            and os.path.exists(os.path.join(self.error_directory, entry["filename"]))
+        ]
+        return sorted(due, key=lambda entry: entry["next_retry_at"])
+
+    def next_retry_at(self) -> Optional[float]:
+        scheduled = [e["next_retry_at"] for e in self._load().values() if e.get("next_retry_at") is not None]
+        return min(scheduled) if scheduled else None
+
+    def get_entries(self) -> List[Dict[str, Any]]:
+        return list(self._load().values())
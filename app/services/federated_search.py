@@ -0,0 +1,94 @@
+import asyncio
+from typing import Dict, Any, List
+
+from app.config import SEARCH_DEADLINE_SECONDS
+from app.services.query_generator import QueryGenerator
+from app.utils.metrics import logger, trace_stage
+
+# Reciprocal rank fusion constant: damps the weight of the very first ranks
+RRF_K = 60
+
+
+async def _sql_branch(question: str) -> Dict[str, Any]:
+    """Vocabulary lookup -> LLM-generated SQL -> execution."""
+    results = await QueryGenerator().smart_search(question)
+    if results["status"] == "error":
+        raise ValueError(results["message"])
+    return results
+
+
+async def _vector_branch(question: str, top_k: int) -> List[Dict[str, Any]]:
+    """Query embedding -> vector retrieval -> metadata re-ranking."""
+    # llama_index is heavy; keep it out of the API's import time
+    from app.services.rag_service import get_rag_system
+    rag_system = await asyncio.to_thread(get_rag_system)
+    if rag_system is None:
+        raise LookupError("No vector index, run python -m app.create_rag")
+    response = await rag_system.smart_query_cv_database(question, top_k=top_k)
+    return [
+        {
+            "id": node.metadata.get("cv_id"),
+            "name": node.metadata.get("name", ""),
+            "email": node.metadata.get("email", ""),
+            "country": node.metadata.get("country", ""),
+            "vector_score": round(node.score or 0.0, 4),
+        }
+        for node in getattr(response, "source_nodes", None) or []
+    ]
+
+
+def merge_results(sql_rows: List[Dict[str, Any]], vector_rows: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """Merge both rankings by cv_id with reciprocal rank fusion; candidates found by both rise to the top."""
+    merged: Dict[Any, Dict[str, Any]] = {}
+    for source, rows in (("sql", sql_rows), ("vector", vector_rows)):
+        for rank, row in enumerate(rows, 1):
+            entry = merged.setdefault(row["id"], {"fused_score": 0.0, "sources": []})
+            for key, value in row.items():
+                entry.setdefault(key, value)
+            entry["fused_score"] += 1.0 / (RRF_K + rank)
+            entry["sources"].append(source)
+    ranked = sorted(merged.values(), key=lambda entry: entry["fused_score"], reverse=True)
+    for entry in ranked:
+        entry["fused_score"] = round(entry["fused_score"], 5)
+    return ranked[:limit]
+
+
+async def federated_search(question: str, limit: int = 10, deadline: float = SEARCH_DEADLINE_SECONDS) -> Dict[str, Any]:
+    """
+    Run the SQL and vector searches concurrently and merge what finished within the deadline.
+
+    Latency is bounded by the slower branch (or the deadline), not their sum. A branch that
+    fails or misses the deadline is reported in "branches" and the other one is returned alone.
+    """
+    with trace_stage("federated_search") as trace:
+        tasks = {
+            "sql": asyncio.create_task(_sql_branch(question)),
+            "vector": asyncio.create_task(_vector_branch(question, limit)),
+        }
+        await asyncio.wait(tasks.values(), timeout=deadline)
+
+        branches: Dict[str, str] = {}
+        outputs: Dict[str, Any] = {}
+        for name, task in tasks.items():
+            if not task.done():
+                task.cancel()
+                branches[name] = "timeout"
+            elif task.exception() is not None:
+                branches[name] = f"error: {task.exception()}"
+                logger.warning("Federated search %s branch failed: %s", name, task.exception())
+            else:
+                branches[name] = "ok"
+                outputs[name] = task.result()
+        trace.update(branches)
+
+    if not outputs:
+        return {"status": "error", "message": f"No search branch succeeded: {branches}", "branches": branches}
+
+    sql = outputs.get("sql", {})
+    return {
+        "status": "success",
+        "explanation": sql.get("explanation"),
+        "sql": sql.get("sql"),
+        "branches": branches,
+        "results": merge_results(sql.get("results", []), outputs.get("vector", []), limit),
+    }
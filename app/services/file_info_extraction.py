@@ -1,18 +1,54 @@
+import inspect
 import json
-import re
-from typing import Dict, Any, List
+from typing import Awaitable, Dict, Any, Callable, List, Optional, Union
 from fastapi import UploadFile, HTTPException
-from openai import OpenAI
 
-from app.config import OPENAI_API_KEY
+from app.config import OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_TIMEOUT_SECONDS, CACHE_LLM_TTL_SECONDS, LOCAL_CONTACT_EXTRACTION
+from app.services.cache import get_cache, cache_key
+from app.services.hedging import llm_hedger
+from app.services.rate_limiter import openai_limiter, BATCH, INTERACTIVE
+from app.utils.json_repair import strip_code_fences, parse_partial_json
+from app.utils.metrics import logger, trace_stage, record_llm_usage
 from app.utils.pdf_conversion import file_to_text
 from app.utils.prompts import PROMPTS
+from app.utils.contact_extraction import extract_contact_fields, contact_hints, known_fields_note
+from app.utils.deadline import DeadlineExceeded, remaining
+from app.utils.schemas import CV_FIELD_SCHEMAS, REQUIRED_CV_FIELDS, CONTACT_FIELDS, cv_fields_response_format
+from app.utils.text_compaction import compact_cv_text, count_tokens
 
-# Initialize the OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Shared OpenAI client, created on first use (see get_client)
+client = None
 
+CHAT_MODEL = "gpt-4o-mini"
 
-async def get_gpt_response(prompt: str, text: str = "") -> str:
+# Completion budget for the follow-up request when only contact fields are missing
+MISSING_FIELDS_MAX_TOKENS = 200
+
+
+def get_client():
+    """
+    Return the shared async OpenAI client; the openai package is only imported the first time.
+
+    Async so that cancelling a call (losing hedge, spent deadline) closes its connection
+    instead of leaving a thread waiting on it.
+    """
+    global client
+    if client is None:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
+    return client
+
+
+async def get_gpt_response(prompt: str, text: str = "", response_format: Optional[Dict[str, Any]] = None,
+                           max_tokens: int = 1000, priority: int = BATCH,
+                           cache_if: Optional[Callable[[str], Union[bool, Awaitable[bool]]]] = None) -> str:
+    """
+    Chat completion for prompt (system) and text (user), answered from the "llm" cache when possible.
+
+    An answer is only cached when cache_if(answer) is true, so a truncated or otherwise unusable
+    answer is not replayed to retries of the same request; without cache_if nothing is cached.
+    cache_if may be a coroutine function, for checks that need I/O.
+    """
     try:
         # Prepare the messages for the chat completion
         messages = [
@@ -23,24 +59,115 @@ async def get_gpt_response(prompt: str, text: str = "") -> str:
         if text:
             messages.append({"role": "user", "content": text})
 
-        # Call the OpenAI API
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            max_tokens=1000
-        )
+        # Only constrain the output when a schema is given
+        extra_args = {"response_format": response_format} if response_format else {}
 
-        content = response.choices[0].message.content
-        content = re.sub(r'^```json\s*\n', '', content)
-        content = re.sub(r'\n```\s*$', '', content)
-        return content.strip()
+        # Identical requests (re-uploaded CVs, repeated searches) are answered from the cache
+        cache = get_cache("llm", CACHE_LLM_TTL_SECONDS)
+        key = cache_key(CHAT_MODEL, messages, response_format, max_tokens)
+        cached = await cache.get_async(key)
+        if cached is not None:
+            return cached
+
+        # Bounded by the request deadline; interactive calls are hedged when slow (see LatencyHedger)
+        timeout = remaining(OPENAI_TIMEOUT_SECONDS)
+        estimated_tokens = count_tokens(prompt) + count_tokens(text) + max_tokens
+
+        async def call_openai():
+            async with openai_limiter.limit_async(priority, estimated_tokens):
+                with trace_stage("llm_call", model=CHAT_MODEL, max_tokens=max_tokens) as trace:
+                    response = await get_client().chat.completions.create(
+                        model=CHAT_MODEL,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        timeout=timeout,
+                        **extra_args
+                    )
+                    record_llm_usage(CHAT_MODEL, response.usage, trace)
+            if response.usage:
+                openai_limiter.adjust_tokens(response.usage.total_tokens - estimated_tokens)
+            return response
+
+        hedge_key = f"{response_format['json_schema']['name'] if response_format else 'text'}:{max_tokens}"
+        response = await llm_hedger.run(hedge_key, call_openai, timeout=timeout, hedge=priority == INTERACTIVE)
+
+        content = strip_code_fences(response.choices[0].message.content or "")
+        if cache_if is not None:
+            cacheable = cache_if(content)
+            if inspect.isawaitable(cacheable):
+                cacheable = await cacheable
+            if cacheable:
+                await cache.set_async(key, content)
+        return content
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"GPT response deadline exceeded: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in GPT response: {str(e)}")
 
 
-async def extract_fields_user_v1(text: str) -> Dict[str, Any]:
+def _skills_to_dict(skills: Any) -> Dict[str, int]:
+    """Convert [{"name", "score"}] skills (or a legacy {name: score} map) to {name: score}."""
+    if isinstance(skills, dict):
+        skills = [{"name": name, "score": score} for name, score in skills.items()]
+    if not isinstance(skills, list):
+        return {}
+
+    result = {}
+    for skill in skills:
+        # Entries cut off by a truncated completion may lack their score
+        if not isinstance(skill, dict) or not skill.get("name") or not isinstance(skill.get("score"), (int, float)):
+            continue
+        result[skill["name"]] = max(0, min(100, int(skill["score"])))
+    return result
+
+
+def _apply_fields(result: Dict[str, Any], response_dict: Dict[str, Any]) -> None:
+    """Copy the non-empty fields of a parsed response into the extraction result."""
+    for field in ["name", "email", "country", "phone", "comment"]:
+        value = response_dict.get(field)
+        if isinstance(value, str) and value:
+            result[field] = value
+    if isinstance(response_dict.get("companies"), list) and response_dict["companies"]:
+        result["companies"] = [c for c in response_dict["companies"] if isinstance(c, str) and c]
+    skills = _skills_to_dict(response_dict.get("skills"))
+    if skills:
+        result["skills"] = skills
+
+
+def _missing_fields(result: Dict[str, Any]) -> List[str]:
+    return [field for field in REQUIRED_CV_FIELDS if not result[field]]
+
+
+def _answers(fields: List[str]) -> Callable[[str], bool]:
+    """cache_if for extraction responses: complete JSON that fills every required field among `fields`."""
+    def check(content: str) -> bool:
+        try:
+            response_dict = json.loads(content)
+        except json.JSONDecodeError:
+            return False
+        if not isinstance(response_dict, dict):
+            return False
+        parsed = {"name": "", "email": "", "country": "", "phone": "", "comment": "", "companies": [], "skills": {}}
+        _apply_fields(parsed, response_dict)
+        return not [field for field in _missing_fields(parsed) if field in fields]
+    return check
+
+
+async def extract_fields_user_v1(text: str, priority: int = BATCH) -> Dict[str, Any]:
     prompt = PROMPTS["FIELDS_AND_SCORE"]
-    response = await get_gpt_response(prompt, text)
+    compacted_text, token_stats = compact_cv_text(text)
+    logger.debug("CV text compacted: %s -> %s tokens (%.1f%% saved)", token_stats["tokens_before"],
+                 token_stats["tokens_after"], token_stats["savings_ratio"] * 100)
+
+    # Contact fields found locally are given to the model instead of being generated by it
+    local_fields = extract_contact_fields(compacted_text) if LOCAL_CONTACT_EXTRACTION else {}
+    # Guesses (a country named in the header) are hints only; the model still returns those fields
+    hints = contact_hints(compacted_text, local_fields) if LOCAL_CONTACT_EXTRACTION else {}
+    requested_fields = [field for field in CV_FIELD_SCHEMAS if field not in local_fields]
+    note = known_fields_note(local_fields, hints)
+    user_text = f"{compacted_text}\n\n{note}" if note else compacted_text
+    response = await get_gpt_response(prompt, user_text, response_format=cv_fields_response_format(requested_fields),
+                                      priority=priority, cache_if=_answers(requested_fields))
 
     result = {
         "name": "",
@@ -52,26 +179,42 @@ async def extract_fields_user_v1(text: str) -> Dict[str, Any]:
         "comment": "",
         "response": response,
         "cv_text": text,
+        "token_stats": token_stats,
+        "repaired_fields": [],
+        "local_fields": list(local_fields),
     }
+    result.update(local_fields)
 
+    # Salvage whatever is usable, even from a truncated or malformed response
     try:
-        response_dict = json.loads(response)
-        result["name"] = response_dict.get("name", "")
-        result["email"] = response_dict.get("email", "")
-        result["country"] = response_dict.get("country", "")
-        result["phone"] = response_dict.get("phone", "")
-        result["companies"] = response_dict.get("companies", [])
-        result["skills"] = response_dict.get("skills", {})
-        if "comment" in response_dict:
-            result["comment"] = response_dict["comment"]
-        print(response_dict)
+        _apply_fields(result, parse_partial_json(response))
     except json.JSONDecodeError as e:
-        raise HTTPException(status_code=422, detail=f"Invalid JSON response: {str(e)}")
+        logger.warning("Could not recover JSON from response, requesting required fields only: %s", e)
+
+    # Ask only for what is missing instead of failing the whole CV
+    missing_fields = _missing_fields(result)
+    if missing_fields:
+        logger.info("Requesting missing fields: %s", ", ".join(missing_fields))
+        repair_response = await get_gpt_response(
+            PROMPTS["MISSING_FIELDS"].format(fields=", ".join(missing_fields)),
+            compacted_text,
+            response_format=cv_fields_response_format(missing_fields),
+            max_tokens=1000 if "skills" in missing_fields else MISSING_FIELDS_MAX_TOKENS,
+            priority=priority,
+            cache_if=_answers(missing_fields)
+        )
+        try:
+            _apply_fields(result, parse_partial_json(repair_response))
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid JSON response: {str(e)}")
+        result["repaired_fields"] = missing_fields
 
     # Validate required fields
-    required_fields = ["name", "email", "country", "skills"]
-    missing_fields = [field for field in required_fields if not result[field]]
+    missing_fields = _missing_fields(result)
     if missing_fields:
         raise HTTPException(status_code=422, detail=f"Missing required fields: {', '.join(missing_fields)}")
+    missing_contact = [field for field in CONTACT_FIELDS if not result[field]]
+    if missing_contact:
+        logger.info("CV stored without %s", ", ".join(missing_contact))
 
     return result
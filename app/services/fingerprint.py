@@ -0,0 +1,104 @@
+import hashlib
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.metrics import trace_stage
+
+# 128 permutations in 16 bands of 8 rows: pairs above ~0.7 Jaccard almost always share a
+# bucket, pairs below ~0.5 almost never do; candidates are then checked exactly
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_WORDS = 3
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: signatures are stored, so the permutations must never change between runs
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.randint(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingles(text: str) -> List[str]:
+    """Overlapping word 3-grams of the lowercased text, so layout and page breaks don't matter."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return words
+    return [" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)]
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature (uint32[NUM_PERMUTATIONS]) of the text's shingle set."""
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in set(shingles(text))),
+        dtype=np.uint64,
+    )
+    if hashes.size == 0:
+        return np.full(NUM_PERMUTATIONS, _MAX_HASH, dtype=np.uint32)
+    # a * x + b stays below 2^64 for 32-bit a, b and x, so no overflow before the modulo
+    permuted = ((hashes[:, None] * _A + _B) % _MERSENNE_PRIME) & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def lsh_buckets(signature: np.ndarray) -> List[Tuple[int, int]]:
+    """(band, bucket) pairs; bucket is a signed 64-bit hash of the band's rows (fits BIGINT)."""
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+        bucket = int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), "little", signed=True)
+        buckets.append((band, bucket))
+    return buckets
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def store_fingerprint(cur, cv_id: int, text: str) -> None:
+    """Store a CV's signature and LSH buckets (inside the caller's transaction)."""
+    signature = minhash(text)
+    cur.execute("""
+        INSERT INTO cv_fingerprint (cv_id, minhash) VALUES (%s, %s)
+        ON CONFLICT (cv_id) DO UPDATE SET minhash = EXCLUDED.minhash
+    """, (cv_id, signature.tobytes()))
+    cur.execute("DELETE FROM cv_fingerprint_band WHERE cv_id = %s", (cv_id,))
+    cur.executemany("INSERT INTO cv_fingerprint_band (band, bucket, cv_id) VALUES (%s, %s, %s)",
+                    [(band, bucket, cv_id) for band, bucket in lsh_buckets(signature)])
+
+
+def find_near_duplicate(conn, text: str, threshold: float, exclude_cv_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Most similar stored CV at or above the threshold, as {"cv_id", "filename", "similarity"}.
+
+    exclude_cv_id leaves out the CV being replaced, the previous version of the same file.
+
+    Only CVs sharing an LSH bucket are compared, so the lookup is one indexed query
+    whatever the number of stored CVs.
+    """
+    with trace_stage("near_duplicate_check") as trace:
+        signature = minhash(text)
+        buckets = lsh_buckets(signature)
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT f.cv_id, f.minhash, cv.filename
+                FROM cv_fingerprint f
+                JOIN cv ON cv.id = f.cv_id
+                WHERE f.cv_id IN (
+                    SELECT cv_id FROM cv_fingerprint_band
+                    WHERE (band, bucket) IN ({", ".join(["(%s, %s)"] * len(buckets))})
+                )
+            """, [value for pair in buckets for value in pair])
+            candidates = cur.fetchall()
+        trace["candidates"] = len(candidates)
+
+        best = None
+        for cv_id, stored, filename in candidates:
+            if cv_id == exclude_cv_id:
+                continue
+            score = similarity(signature, np.frombuffer(bytes(stored), dtype=np.uint32))
+            if score >= threshold and (best is None or score > best["similarity"]):
+                best = {"cv_id": cv_id, "filename": filename, "similarity": round(score, 3)}
+        return best
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from prometheus_client import Counter, Gauge
+
+from app.config import HEDGE_PERCENTILE, HEDGE_BUDGET, HEDGE_MIN_SAMPLES
+from app.utils.deadline import DeadlineExceeded
+
+T = TypeVar("T")
+
+HEDGE_OUTCOMES = Counter(
+    "clerk_llm_hedge_outcomes_total",
+    "LLM calls by hedging outcome: not_hedged, budget_exhausted, primary_won, hedge_won, timeout, error, cancelled",
+    ["key", "outcome"],
+)
+HEDGE_DELAY = Gauge(
+    "clerk_llm_hedge_delay_seconds",
+    "Latency after which a duplicate request is sent",
+    ["key"],
+)
+
+# Most recent latencies kept per call kind for the percentile
+LATENCY_WINDOW = 200
+
+# Unused hedge credit is capped so a quiet period cannot be followed by a burst of hedges
+MAX_HEDGE_CREDIT = 10.0
+
+
+class LatencyHedger:
+    """
+    Tail-latency hedging for idempotent calls.
+
+    A call still running after the `percentile` of the recent latencies of its kind gets a
+    duplicate, and whichever answers first wins; the other is cancelled. Every call
+    earns `budget` hedge credits and every hedge spends one, so duplicates stay below that
+    fraction of calls even when the service slows down across the board.
+    """
+
+    def __init__(self, percentile: float, budget: float, min_samples: int):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._credit = 0.0
+        self._lock = threading.Lock()
+
+    def delay(self, key: str) -> Optional[float]:
+        """When to hedge a call of this kind, or None until enough latencies are known."""
+        if self.percentile <= 0 or self.budget <= 0:
+            return None
+        with self._lock:
+            samples = sorted(self._latencies.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        delay = samples[min(len(samples) - 1, int(len(samples) * self.percentile / 100))]
+        HEDGE_DELAY.labels(key).set(delay)
+        return delay
+
+    def observe(self, key: str, latency: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=LATENCY_WINDOW)).append(latency)
+
+    def _earn_credit(self) -> None:
+        with self._lock:
+            self._credit = min(MAX_HEDGE_CREDIT, self._credit + self.budget)
+
+    def _spend_credit(self) -> bool:
+        with self._lock:
+            if self._credit < 1:
+                return False
+            self._credit -= 1
+            return True
+
+    async def run(self, key: str, call: Callable[[], Awaitable[T]], timeout: Optional[float] = None,
+                  hedge: bool = True) -> T:
+        """
+        Await call(), hedged with a second call() when it is slow.
+
+        Args:
+            key (str): Kind of call; latencies are tracked per key
+            call (Callable[[], Awaitable[T]]): Starts one attempt
+            timeout (Optional[float]): Seconds to wait for an answer before raising DeadlineExceeded
+            hedge (bool): False only applies the timeout (and still records the latency)
+
+        Returns:
+            T: The first successful result
+        """
+        self._earn_credit()
+        delay = self.delay(key) if hedge else None
+        start = time.monotonic()
+        attempts = [asyncio.ensure_future(call())]
+        outcome = "not_hedged"
+        try:
+            if delay is not None and (timeout is None or delay < timeout):
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done:
+                    if self._spend_credit():
+                        attempts.append(asyncio.ensure_future(call()))
+                        outcome = "hedged"
+                    else:
+                        outcome = "budget_exhausted"
+
+            pending, error = set(attempts), None
+            while pending:
+                wait = None if timeout is None else max(0.0, start + timeout - time.monotonic())
+                done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    outcome = "timeout"
+                    raise DeadlineExceeded(f"No answer within {timeout:.2f}s")
+                for attempt in done:
+                    if attempt.exception() is None:
+                        self.observe(key, time.monotonic() - start)
+                        if outcome == "hedged":
+                            outcome = "primary_won" if attempt is attempts[0] else "hedge_won"
+                        return attempt.result()
+                    error = attempt.exception()
+            outcome = "error"
+            raise error
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            HEDGE_OUTCOMES.labels(key, outcome).inc()
+            for attempt in attempts:
+                attempt.cancel()
+
+
+# Shared by every LLM caller in the process (see get_gpt_response)
+llm_hedger = LatencyHedger(HEDGE_PERCENTILE, HEDGE_BUDGET, HEDGE_MIN_SAMPLES)
@@ -1,6 +1,14 @@
+import asyncio
 import json
+import os
+from functools import lru_cache
 from typing import List, Dict, Any
+from app.config import PROJECT_ROOT, CACHE_VOCABULARY_TTL_SECONDS, CACHE_SEARCH_TTL_SECONDS, COALESCE_REQUESTS
+from app.services.cache import get_cache
 from app.services.db_service import DatabaseService
+from app.services.rate_limiter import INTERACTIVE
+from app.services.single_flight import SingleFlight
+from app.utils.metrics import trace_stage
 
 QUERY_PROMPT = """You are an SQL query generator for a CV search system. You will generate queries against a materialized view called cv_aggregated.
 
@@ -8,30 +16,44 @@ Here's the view definition:
 {view_definition}
 
 Your query should:
-1. Always SELECT id, name, email, country, candidate_skills, candidate_companies
+1. Always SELECT id, name, email, country, candidate_skills, candidate_companies and a numeric relevance column
 2. Use array containment operator (@>) for skill matching to ensure ALL skills are present
 3. Use ILIKE for fuzzy text matching when needed
-4. Order results by candidate_skills DESC for relevance
+4. Rank by numeric relevance, never by candidate_skills (it is plain text):
+   - when the question names skills, use cv_relevance(skill_scores, ARRAY[...the same skills...]) AS relevance
+     and ORDER BY relevance DESC
+   - otherwise use skill_total AS relevance and ORDER BY skill_total DESC
 5. Limit results to 10 unless specified otherwise
 
 Example queries (and make sure your queries are similar to these with the same structure):
 
 1. Finding candidates with specific skills and country:
-SELECT id, name, email, country, candidate_skills, candidate_companies
+SELECT id, name, email, country, candidate_skills, candidate_companies,
+       cv_relevance(skill_scores, ARRAY['c#', 'devops']) AS relevance
 FROM cv_aggregated
 WHERE skills @> ARRAY['c#', 'devops']::varchar[]
   AND country ILIKE '%spain%'
-ORDER BY candidate_skills DESC
+ORDER BY relevance DESC
 LIMIT 10;
 
 2. Finding candidates who worked at specific companies:
-SELECT id, name, email, country, candidate_skills, candidate_companies
+SELECT id, name, email, country, candidate_skills, candidate_companies,
+       skill_total AS relevance
 FROM cv_aggregated
 WHERE EXISTS (
     SELECT 1 FROM unnest(companies) company
     WHERE company ILIKE '%google%'
 )
-ORDER BY candidate_skills DESC
+ORDER BY skill_total DESC
+LIMIT 10;
+
+3. Finding candidates with a minimum level in a skill:
+SELECT id, name, email, country, candidate_skills, candidate_companies,
+       cv_relevance(skill_scores, ARRAY['python', 'docker']) AS relevance
+FROM cv_aggregated
+WHERE skills @> ARRAY['python', 'docker']::varchar[]
+  AND (skill_scores ->> 'python')::int >= 70
+ORDER BY relevance DESC
 LIMIT 10;
 
 Available Skills in database:
@@ -49,23 +71,42 @@ Respond in JSON format:
 }}
 """
 
+VIEW_DEFINITION_PATH = os.path.join(PROJECT_ROOT, "database", "materialized-view.sql")
+
+# Concurrent searches for the same normalized question share one LLM call and SQL execution
+search_flight = SingleFlight("search", COALESCE_REQUESTS)
+
+
+@lru_cache(maxsize=1)
+def load_view_definition() -> str:
+    """Read the cv_aggregated view definition once per process."""
+    with open(VIEW_DEFINITION_PATH, 'r') as file:
+        return file.read()
+
+
 class QueryGenerator:
     def __init__(self):
         self.db_service = DatabaseService()
-        with open('database/materialized-view.sql', 'r') as file:
-            self.view_definition = file.read()
+        self.view_definition = load_view_definition()
+
+    async def _get_vocabulary(self, table: str) -> List[str]:
+        """All names in the skill or company table, cached briefly across workers."""
+        cache = get_cache("vocabulary", CACHE_VOCABULARY_TTL_SECONDS)
+        names = await cache.get_async(table)
+        if names is None:
+            with self.db_service.conn.cursor() as cur:
+                cur.execute(f"SELECT name FROM {table} ORDER BY name")
+                names = [row[0] for row in cur.fetchall()]
+            await cache.set_async(table, names)
+        return names
 
     async def get_available_skills(self) -> List[str]:
         """Fetch all available skills from the database."""
-        with self.db_service.conn.cursor() as cur:
-            cur.execute("SELECT name FROM skill ORDER BY name")
-            return [row[0] for row in cur.fetchall()]
+        return await self._get_vocabulary("skill")
 
     async def get_available_companies(self) -> List[str]:
         """Fetch all available companies from the database."""
-        with self.db_service.conn.cursor() as cur:
-            cur.execute("SELECT name FROM company ORDER BY name")
-            return [row[0] for row in cur.fetchall()]
+        return await self._get_vocabulary("company")
 
     async def generate_query(self, question: str) -> Dict[str, Any]:
         """Generate SQL query from natural language question."""
@@ -81,7 +122,7 @@ class QueryGenerator:
 
         # Get response from OpenAI
         from app.services.file_info_extraction import get_gpt_response
-        response = await get_gpt_response(prompt=prompt)
+        response = await get_gpt_response(prompt=prompt, priority=INTERACTIVE, cache_if=self._is_runnable)
 
         try:
             query_data = json.loads(response)
@@ -89,18 +130,46 @@ class QueryGenerator:
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
 
+    async def _is_runnable(self, response: str) -> bool:
+        """cache_if for generated queries: valid JSON whose SQL the database can plan (EXPLAIN, not run)."""
+        try:
+            sql = json.loads(response)["sql"]
+        except Exception:
+            return False
+        # psycopg2 blocks; the event loop keeps serving other requests meanwhile
+        return await asyncio.to_thread(self._explains, sql)
+
+    def _explains(self, sql: str) -> bool:
+        try:
+            with self.db_service.conn.cursor() as cur:
+                cur.execute(f"EXPLAIN {sql}")
+            return True
+        except Exception:
+            return False
+        finally:
+            self.db_service.conn.rollback()
+
     async def execute_query(self, sql: str) -> List[Dict[str, Any]]:
         """Execute the generated SQL query and return results."""
-        with self.db_service.conn.cursor() as cur:
+        with trace_stage("sql_execution") as trace, self.db_service.conn.cursor() as cur:
             cur.execute(sql)
             columns = [desc[0] for desc in cur.description]
             results = []
             for row in cur.fetchall():
                 results.append(dict(zip(columns, row)))
+            trace["rows"] = len(results)
             return results
 
     async def smart_search(self, question: str) -> Dict[str, Any]:
         """Complete pipeline: generate query, execute it, and return results."""
+        cache = get_cache("search", CACHE_SEARCH_TTL_SECONDS)
+        key = " ".join(question.lower().split())
+        cached = await cache.get_async(key)
+        if cached is not None:
+            return cached
+        return await search_flight.run(key, lambda: self._search(question, key, cache))
+
+    async def _search(self, question: str, key: str, cache) -> Dict[str, Any]:
         try:
             # Generate query
             query_data = await self.generate_query(question)
@@ -108,12 +177,14 @@ class QueryGenerator:
             # Execute query
             results = await self.execute_query(query_data["sql"])
             
-            return {
+            response = {
                 "status": "success",
                 "explanation": query_data["explanation"],
                 "sql": query_data["sql"],
                 "results": results
             }
+            await cache.set_async(key, response)
+            return response
         except Exception as e:
             return {
                 "status": "error",
@@ -1,78 +1,176 @@
 import json
+import logging
 import os
-from typing import List, Dict, Any, Set
+import threading
+from functools import lru_cache
+from typing import List, Dict, Any, Set, Optional, Callable
 
-from llama_index.core import Settings, VectorStoreIndex, Response
+from llama_index.core import Settings, VectorStoreIndex, Response, load_index_from_storage
+from llama_index.core.base.embeddings.base import BaseEmbedding
 from llama_index.core.schema import Document
 from llama_index.core.storage import StorageContext
-from llama_index.core.vector_stores import SimpleVectorStore
 from llama_index.embeddings.openai import OpenAIEmbedding
 from llama_index.core.storage.docstore import SimpleDocumentStore
 from llama_index.core.storage.index_store import SimpleIndexStore
 
 from app.utils.pdf_conversion import file_to_text, file_path_to_text
 from app.services.file_info_extraction import extract_fields_user_v1, get_gpt_response
+from app.config import (OPENAI_BASE_URL, CACHE_EMBEDDING_TTL_SECONDS, RAG_INDEX_PATH, RAG_DOCUMENT_MODE,
+                        DUPLICATE_THRESHOLD, DUPLICATE_ACTION)
+from app.services.cache import get_cache, cache_key
+from app.services.custom_json_node_parser import CustomJSONNodeParser
+from app.services.cv_documents import (build_section_documents, build_summary_document, CVCard, lean_node,
+                                       NODE_METADATA)
 from app.services.db_service import DatabaseService
+from app.services.rate_limiter import openai_limiter, INTERACTIVE, BATCH
+from app.services.vector_store import TwoStageVectorStore
+from app.utils.metrics import logger, trace_stage
+from app.utils.text_compaction import count_tokens
 
-from nltk.corpus import stopwords
-import nltk
+# Query words that carry no meaning for CV search
+CV_STOP_WORDS = {
+    'find', 'show', 'get', 'someone', 'person', 'people',
+    'buscar', 'mostrar', 'obtener', 'alguien', 'persona', 'gente'
+}
 
 
-async def process_single_cv(file_path: str) -> Dict[str, Any]:
-    """Process a single CV file and extract its information."""
+@lru_cache(maxsize=1)
+def load_stop_words() -> frozenset:
+    """
+    English and Spanish NLTK stopwords plus CV-specific ones, loaded once per process.
+
+    The corpus is installed with the image (see Dockerfile) and never downloaded here,
+    so building a CVRagSystem does not block on the network.
+    """
+    from nltk.corpus import stopwords
     try:
-        filename = os.path.basename(file_path)
-        cv_text = file_path_to_text(file_path)
-        if not cv_text:
-            return {"status": "error", "message": f"Failed to extract text from {filename}"}
+        words = stopwords.words('english') + stopwords.words('spanish')
+    except LookupError:
+        logger.warning("NLTK stopwords not installed, run: python -m nltk.downloader stopwords")
+        words = []
+    return frozenset(words) | CV_STOP_WORDS
+
 
-        cv_json = await extract_fields_user_v1(cv_text)
+# Per-CV fields of an index, saved next to it by CVRagSystem.persist()
+CV_CARDS_FILE = "cv_cards.json"
+
+# Nodes retrieved per wanted candidate: section documents give several nodes per CV
+NODES_PER_CV = {"full": 1, "sections": 4, "summary": 1}
+
+
+async def process_single_cv(file_path: str, document_mode: str = RAG_DOCUMENT_MODE) -> Dict[str, Any]:
+    """
+    RAG documents for a single CV file.
 
-        # Store in database
+    A CV already stored by create_db is indexed from its Postgres row under the same cv_id,
+    so federated search can merge both sides; only new files are extracted and stored here,
+    after the same near-duplicate check as create_db.
+    """
+    db_service = None
+    try:
+        filename = os.path.basename(file_path)
         db_service = DatabaseService()
-        cv_id = await db_service.store_cv_data(cv_json)
-        
-        # Add cv_id to metadata
-        metadata = {
-            "source_file": filename,
-            "name": cv_json.get("name", ""),
-            "email": cv_json.get("email", ""),
-            "country": cv_json.get("country", ""),
-            # Store only skills above 70%
-            "key_skills": json.dumps({k: v for k, v in cv_json.get("skills", {}).items() if v >= 50}),
-            # Store only company names
-            "companies": json.dumps(
-                list(cv_json.get("companies", {}).keys()) if isinstance(cv_json.get("companies"),
-                                                                        dict) else cv_json.get("companies", []))
+        existing_cv = await db_service.get_cv_info(filename)
+
+        if existing_cv and existing_cv["filename"] != filename:
+            # Linked as a near-duplicate; the CV it duplicates is indexed under its own file
+            return {"status": "skipped", "message": f"Near-duplicate of {existing_cv['filename']}"}
+        if existing_cv:
+            cv_id = existing_cv["id"]
+            cv_json = await db_service.get_cv_data(cv_id)
+            cv_text = cv_json["cv_text"]
+        else:
+            cv_text = file_path_to_text(file_path)
+            if not cv_text:
+                return {"status": "error", "message": f"Failed to extract text from {filename}"}
+
+            duplicate = None
+            if DUPLICATE_ACTION != "off":
+                duplicate = await db_service.find_near_duplicate(cv_text, DUPLICATE_THRESHOLD)
+            if duplicate and DUPLICATE_ACTION != "replace":
+                if DUPLICATE_ACTION == "link":
+                    await db_service.link_duplicate(filename, duplicate["cv_id"], duplicate["similarity"])
+                return {
+                    "status": "skipped",
+                    "message": f"Near-duplicate of {duplicate['filename']} ({duplicate['similarity']:.0%} similar)"
+                }
+
+            cv_json = await extract_fields_user_v1(cv_text)
+            cv_json['filename'] = filename
+
+            # Store in database; in replace mode the new file supersedes the near-duplicate
+            cv_id = await db_service.store_cv_data(cv_json, replaces=[duplicate["cv_id"] if duplicate else None])
+
+        return {
+            "status": "success",
+            "documents": build_cv_documents(cv_json, cv_id, filename, cv_text, document_mode)
         }
 
-        # Add cv_id to metadata
-        metadata["cv_id"] = cv_id
-
-        # Create detailed content for the document text
-        skills_details = []
-        for skill, level in cv_json.get("skills", {}).items():
-            if level >= 90:
-                skill_str = f"Expert level proficiency in {skill.lower()}"
-            elif level >= 70:
-                skill_str = f"Advanced proficiency in {skill.lower()}"
-            elif level >= 50:
-                skill_str = f"Intermediate level knowledge of {skill.lower()}"
-            else:
-                skill_str = f"Basic knowledge of {skill.lower()}"
-            skills_details.append(skill_str)
-
-        # Format companies information
-        companies_data = cv_json.get('companies', {})
-        if isinstance(companies_data, dict):
-            companies_list = list(companies_data.keys())
-        elif isinstance(companies_data, list):
-            companies_list = companies_data
-        else:
-            companies_list = []
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+    finally:
+        if db_service is not None:
+            db_service.conn.close()
+
+
+def build_cv_documents(cv_json: Dict[str, Any], cv_id: int, filename: str, cv_text: str,
+                       document_mode: str = RAG_DOCUMENT_MODE) -> List[Document]:
+    """
+    RAG documents for an extracted CV.
 
-        # Create document text with sections
-        document_text = f"""
+    full: one document with the profile, skills and the whole raw text; sections: one per CV
+    section with per-section token budgets; summary: one compact JSON summary per CV, parsed
+    by CustomJSONNodeParser.
+    """
+    if document_mode == "sections":
+        return build_section_documents(cv_json, cv_id, filename, cv_text)
+    if document_mode == "summary":
+        return [build_summary_document(cv_json, cv_id, filename)]
+    return [build_cv_document(cv_json, cv_id, filename, cv_text)]
+
+
+def build_cv_document(cv_json: Dict[str, Any], cv_id: int, filename: str, cv_text: str) -> Document:
+    """Build the single full-text RAG document for an extracted CV."""
+    metadata = {
+        "source_file": filename,
+        "name": cv_json.get("name", ""),
+        "email": cv_json.get("email", ""),
+        "country": cv_json.get("country", ""),
+        # Store only skills above 70%
+        "key_skills": json.dumps({k: v for k, v in cv_json.get("skills", {}).items() if v >= 50}),
+        # Store only company names
+        "companies": json.dumps(
+            list(cv_json.get("companies", {}).keys()) if isinstance(cv_json.get("companies"),
+                                                                    dict) else cv_json.get("companies", []))
+    }
+
+    # Add cv_id to metadata
+    metadata["cv_id"] = cv_id
+
+    # Create detailed content for the document text
+    skills_details = []
+    for skill, level in cv_json.get("skills", {}).items():
+        if level >= 90:
+            skill_str = f"Expert level proficiency in {skill.lower()}"
+        elif level >= 70:
+            skill_str = f"Advanced proficiency in {skill.lower()}"
+        elif level >= 50:
+            skill_str = f"Intermediate level knowledge of {skill.lower()}"
+        else:
+            skill_str = f"Basic knowledge of {skill.lower()}"
+        skills_details.append(skill_str)
+
+    # Format companies information
+    companies_data = cv_json.get('companies', {})
+    if isinstance(companies_data, dict):
+        companies_list = list(companies_data.keys())
+    elif isinstance(companies_data, list):
+        companies_list = companies_data
+    else:
+        companies_list = []
+
+    # Create document text with sections
+    document_text = f"""
     Profile Summary:
     {cv_json.get('name', '')} is a professional based in {cv_json.get('country', '')}.
 
@@ -89,29 +187,85 @@ async def process_single_cv(file_path: str) -> Dict[str, Any]:
     {cv_text}
     """
 
-        # Create Document with text and minimal metadata
-        document = Document(
-            text=document_text,
-            metadata=metadata
-        )
+    # Create Document with text and minimal metadata
+    return Document(
+        text=document_text,
+        metadata=metadata
+    )
 
-        return {
-            "status": "success",
-            "document": document
-        }
 
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+class RateLimitedOpenAIEmbedding(OpenAIEmbedding):
+    """
+    OpenAIEmbedding that goes through the shared OpenAI limiter (queries as interactive,
+    documents as batch) and the embedding cache, so only uncached texts are sent.
+    """
+
+    def _cache_key(self, text: str) -> str:
+        return cache_key(self.model_name, self.dimensions, text)
+
+    def _cached_embeddings(self, texts: List[str], priority: int, fetch: Callable) -> List[List[float]]:
+        cache = get_cache("embedding", CACHE_EMBEDDING_TTL_SECONDS)
+        embeddings = [cache.get(self._cache_key(text)) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            with openai_limiter.limit(priority, sum(count_tokens(text) for text in missing_texts)):
+                with trace_stage("embedding", kind="query" if priority == INTERACTIVE else "text",
+                                 inputs=len(missing_texts)):
+                    fetched = fetch(missing_texts)
+            for i, embedding in zip(missing, fetched):
+                embeddings[i] = embedding
+                cache.set(self._cache_key(texts[i]), embedding)
+        return embeddings
+
+    async def _acached_embeddings(self, texts: List[str], priority: int, fetch: Callable) -> List[List[float]]:
+        cache = get_cache("embedding", CACHE_EMBEDDING_TTL_SECONDS)
+        embeddings = [await cache.get_async(self._cache_key(text)) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            async with openai_limiter.limit_async(priority, sum(count_tokens(text) for text in missing_texts)):
+                with trace_stage("embedding", kind="query" if priority == INTERACTIVE else "text",
+                                 inputs=len(missing_texts)):
+                    fetched = await fetch(missing_texts)
+            for i, embedding in zip(missing, fetched):
+                embeddings[i] = embedding
+                await cache.set_async(self._cache_key(texts[i]), embedding)
+        return embeddings
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        def fetch(texts):
+            return [super(RateLimitedOpenAIEmbedding, self)._get_query_embedding(texts[0])]
+        return self._cached_embeddings([query], INTERACTIVE, fetch)[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        async def fetch(texts):
+            return [await super(RateLimitedOpenAIEmbedding, self)._aget_query_embedding(texts[0])]
+        return (await self._acached_embeddings([query], INTERACTIVE, fetch))[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._cached_embeddings(texts, BATCH, super()._get_text_embeddings)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return await self._acached_embeddings(texts, BATCH, super()._aget_text_embeddings)
 
 
 class CVRagSystem:
-    def __init__(self):
+    def __init__(self, embed_model: Optional[BaseEmbedding] = None, document_mode: str = RAG_DOCUMENT_MODE):
         """Initialize the CV RAG system with in-memory storage."""
-        # Initialize OpenAI embeddings with configuration
-        self.embed_model = OpenAIEmbedding(
+        self.document_mode = document_mode
+        # Initialize OpenAI embeddings with configuration (benchmarks pass a local model instead)
+        self.embed_model = embed_model or RateLimitedOpenAIEmbedding(
             model="text-embedding-3-large",
             dimensions=1536,
-            api_key=os.getenv("OPENAI_API_KEY")
+            api_key=os.getenv("OPENAI_API_KEY"),
+            api_base=OPENAI_BASE_URL
         )
 
         # Configure global settings
@@ -121,7 +275,7 @@ class CVRagSystem:
         Settings.store_embeddings = True
 
         # Initialize storage components
-        vector_store = SimpleVectorStore()
+        vector_store = TwoStageVectorStore()
         docstore = SimpleDocumentStore()
         index_store = SimpleIndexStore()
 
@@ -134,21 +288,10 @@ class CVRagSystem:
 
         # Initialize index as None
         self.index = None
+        # Per-CV fields by cv_id; the indexed nodes only keep NODE_METADATA
+        self.cards: Dict[int, CVCard] = {}
 
-        # Download NLTK data if needed
-        try:
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            nltk.download('stopwords')
-
-        # Get both English and Spanish stopwords
-        self.stop_words = set(stopwords.words('english') + stopwords.words('spanish'))
-
-        # Add some CV-specific stop words
-        self.stop_words.update({
-            'find', 'show', 'get', 'someone', 'person', 'people',
-            'buscar', 'mostrar', 'obtener', 'alguien', 'persona', 'gente'
-        })
+        self.stop_words = load_stop_words()
 
     async def process_cv_directory(self, directory_path: str) -> Dict[str, Any]:
         """Process all CVs in the directory and add them to the RAG system."""
@@ -162,41 +305,20 @@ class CVRagSystem:
             if filename.endswith('.pdf'):
                 print(f"Processing: {filename}")
                 file_path = os.path.join(directory_path, filename)
-                result = await process_single_cv(file_path)
+                result = await process_single_cv(file_path, self.document_mode)
 
                 if result["status"] == "success":
-                    doc = result["document"]
-                    processed_docs.append(doc)
+                    processed_docs.extend(result["documents"])
                     print(f"Successfully processed: {filename}")
+                elif result["status"] == "skipped":
+                    print(f"Skipped {filename}: {result['message']}")
                 else:
                     errors.append({"file": filename, "error": result["message"]})
                     print(f"Error processing {filename}: {result['message']}")
 
         if processed_docs:
             try:
-                print("\nCreating index from documents...")
-                # Configure chunk size in Settings
-                Settings.chunk_size = 2048  # Increased chunk size
-                Settings.chunk_overlap = 20
-
-                # Create index
-                self.index = VectorStoreIndex.from_documents(
-                    documents=processed_docs,
-                    storage_context=self.storage_context,
-                    show_progress=True
-                )
-
-                # Verify index creation
-                if self.index is not None:
-                    print(f"\n✓ Index created successfully with {len(processed_docs)} documents")
-
-                    # Verify vector store
-                    vector_store = self.storage_context.vector_store
-                    print("\nVerifying vector store:")
-
-                else:
-                    raise ValueError("Failed to create index - index is None")
-
+                self.build_index(processed_docs)
             except Exception as e:
                 print(f"Error creating index: {str(e)}")
                 return {"status": "error", "message": f"Failed to create index: {str(e)}"}
@@ -207,13 +329,86 @@ class CVRagSystem:
             "errors": errors if errors else None
         }
 
+    def build_index(self, documents: List[Document]) -> VectorStoreIndex:
+        """Create the vector index from CV documents."""
+        print("\nCreating index from documents...")
+        # Configure chunk size in Settings
+        Settings.chunk_size = 2048  # Increased chunk size
+        Settings.chunk_overlap = 20
+
+        # Create index
+        self.index = VectorStoreIndex.from_documents(
+            documents=documents,
+            storage_context=self.storage_context,
+            transformations=[CustomJSONNodeParser()] if self.document_mode == "summary" else None,
+            show_progress=True
+        )
+
+        # Verify index creation
+        if self.index is None:
+            raise ValueError("Failed to create index - index is None")
+        self.compact_nodes()
+
+        print(f"\n✓ Index created successfully with {len(documents)} documents")
+        return self.index
+
+    def compact_nodes(self) -> None:
+        """
+        Replace the embedded nodes with lean copies (no text, NODE_METADATA only) and move the
+        per-CV fields into self.cards, once per CV instead of once per node. The raw CV text is
+        left to Postgres and read by load_cv_texts() when a result is displayed.
+        """
+        nodes = list(self.storage_context.docstore.docs.values())
+        with trace_stage("rag_node_compaction", nodes=len(nodes)):
+            for node in nodes:
+                cv_id = node.metadata.get("cv_id")
+                if cv_id is not None and cv_id not in self.cards:
+                    self.cards[cv_id] = CVCard.from_metadata(node.metadata)
+            docstore = SimpleDocumentStore()
+            docstore.add_documents([lean_node(node) for node in nodes])
+            self.storage_context.docstore = docstore
+            self.storage_context.vector_store.compact_metadata(NODE_METADATA)
+            self.index = VectorStoreIndex(index_struct=self.index.index_struct, storage_context=self.storage_context)
+
+    def persist(self, persist_dir: str = RAG_INDEX_PATH) -> None:
+        """Save the index so the API can serve vector search without rebuilding it."""
+        self.storage_context.persist(persist_dir=persist_dir)
+        with open(os.path.join(persist_dir, CV_CARDS_FILE), "w") as f:
+            json.dump([card.to_dict() for card in self.cards.values()], f)
+
+    def load(self, persist_dir: str = RAG_INDEX_PATH) -> VectorStoreIndex:
+        """Load an index saved by persist(); indexes saved before CV cards existed are compacted on load."""
+        self.storage_context = StorageContext.from_defaults(
+            persist_dir=persist_dir,
+            vector_store=TwoStageVectorStore.from_persist_dir(persist_dir)
+        )
+        self.index = load_index_from_storage(self.storage_context)
+        cards_path = os.path.join(persist_dir, CV_CARDS_FILE)
+        if os.path.exists(cards_path):
+            with open(cards_path) as f:
+                self.cards = {card["cv_id"]: CVCard(**card) for card in json.load(f)}
+        else:
+            self.compact_nodes()
+        return self.index
+
+    def card(self, node) -> CVCard:
+        """The CVCard of a retrieved node (built from the node's own metadata if it has none)."""
+        return self.cards.get(node.metadata.get("cv_id")) or CVCard.from_metadata(node.metadata)
+
+    async def load_cv_texts(self, cv_ids: List[int]) -> Dict[int, str]:
+        """Raw text of the given CVs, for displaying results; the index does not keep it in memory."""
+        db_service = DatabaseService()
+        try:
+            return await db_service.get_cv_texts(cv_ids)
+        finally:
+            db_service.conn.close()
+
     async def smart_query_cv_database(self, query: str, top_k: int = 10):
         """Vector search with structured metadata matching."""
         if self.index is None:
             raise ValueError("Index has not been created yet. Please process documents first.")
 
-        print(f"\n=== Starting smart query processing ===")
-        print(f"Original query: {query}")
+        logger.debug("Smart query: %s", query)
 
         # Create enhanced query
         enhanced_query = f"""
@@ -221,77 +416,81 @@ class CVRagSystem:
         This includes relevant work history, projects, and technical expertise.
         """
 
-        print("\nCreating query engine...")
         query_engine = self.index.as_query_engine(
-            similarity_top_k=top_k * 2,  # Get more results initially for reranking
+            # Get more results initially for reranking
+            similarity_top_k=top_k * 2 * NODES_PER_CV.get(self.document_mode, 1),
             response_mode="no_text",  # We just want the nodes, not a generated response
         )
 
-        print("\nExecuting query...")
         try:
-            results = query_engine.query(enhanced_query)
+            with trace_stage("vector_retrieval", top_k=top_k * 2) as trace:
+                # aquery embeds the question without blocking the event loop
+                results = await query_engine.aquery(enhanced_query)
+                trace["matches"] = len(getattr(results, 'source_nodes', None) or [])
             if not hasattr(results, 'source_nodes') or not results.source_nodes:
-                print("No results found")
+                logger.debug("No results found")
                 return results
 
-            print(f"\nFound {len(results.source_nodes)} initial matches")
+            debug = logger.isEnabledFor(logging.DEBUG)
+            query_lower = query.lower()
 
             # Rescore results
-            rescored_nodes = []
-            for node in results.source_nodes:
-                try:
-                    base_score = getattr(node, 'score', 0.0)
-                    boost = 0.0
-                    metadata = node.metadata
-
-                    # Check metadata for matches
+            with trace_stage("rerank", candidates=len(results.source_nodes)):
+                rescored_nodes = []
+                for node in results.source_nodes:
                     try:
-                        companies = json.loads(metadata.get('companies', '[]'))
-                        key_skills = json.loads(metadata.get('key_skills', '{}'))
-                        country = metadata.get('country', '')  # Get country as string
+                        base_score = getattr(node, 'score', 0.0)
+                        boost = 0.0
+                        card = self.card(node)
 
                         # Company matches
-                        if any(company.lower() in query.lower() for company in companies):
+                        if any(company.lower() in query_lower for company in card.companies):
                             boost += 0.3  # 30% boost for company match
 
                         # Skill matches
-                        for skill in key_skills:
-                            if skill.lower() in query.lower():
+                        for skill in card.key_skills:
+                            if skill.lower() in query_lower:
                                 boost += 0.3  # 30% boost per matching skill
 
-                        # Country matching - fixed the syntax error
-                        if country and country.lower() in query.lower():
+                        # Country matching
+                        if card.country and card.country.lower() in query_lower:
                             boost += 0.3  # 30% boost for country match
 
-                    except json.JSONDecodeError:
-                        print(f"Warning: Could not parse metadata for {metadata.get('name', 'unknown')}")
-
-                    # Calculate final score
-                    final_score = base_score * (1 + boost)
-                    node.score = final_score
-                    rescored_nodes.append(node)
-
-                    print(f"\nCandidate: {metadata.get('name', 'N/A')}")
-                    print(f"Base score: {base_score:.3f}")
-                    print(f"Boost: {boost:.3f}")
-                    print(f"Final score: {final_score:.3f}")
-
-                except Exception as e:
-                    print(f"Error processing node: {str(e)}")
-                    continue
-
-            # Sort and select top results
-            rescored_nodes.sort(key=lambda x: x.score, reverse=True)
-            results.source_nodes = rescored_nodes[:top_k]
-
-            print("\n=== Final Rankings ===")
-            for i, node in enumerate(results.source_nodes, 1):
-                print(f"{i}. {node.metadata.get('name', 'N/A')} - Score: {node.score:.3f}")
+                        # Calculate final score
+                        final_score = base_score * (1 + boost)
+                        node.score = final_score
+                        rescored_nodes.append(node)
+
+                        if debug:
+                            logger.debug("Candidate: %s base=%.3f boost=%.3f final=%.3f",
+                                         card.name or 'N/A', base_score, boost, final_score)
+
+                    except Exception as e:
+                        logger.warning("Error processing node: %s", e)
+                        continue
+
+                # Sort and select top results, best node per CV (section documents give several)
+                rescored_nodes.sort(key=lambda x: x.score, reverse=True)
+                seen = set()
+                best_nodes = []
+                for node in rescored_nodes:
+                    cv_id = node.metadata.get('cv_id', node.node_id)
+                    if cv_id not in seen:
+                        seen.add(cv_id)
+                        best_nodes.append(node)
+                results.source_nodes = best_nodes[:top_k]
+                # Only the returned nodes get their CV's fields back
+                for node in results.source_nodes:
+                    node.node.metadata.update(self.card(node).to_dict())
+
+            if debug:
+                for i, node in enumerate(results.source_nodes, 1):
+                    logger.debug("%d. %s - Score: %.3f", i, node.metadata.get('name', 'N/A'), node.score)
 
             return results
 
         except Exception as e:
-            print(f"Error during query execution: {str(e)}")
+            logger.error("Error during query execution: %s", e)
             raise
 
     async def query_cv_database(self, query: str, top_k: int = 10):
@@ -305,3 +504,19 @@ class CVRagSystem:
         )
 
         return vector_query_engine.query(query)
+
+
+_rag_system = None
+_rag_system_lock = threading.Lock()
+
+
+def get_rag_system() -> Optional[CVRagSystem]:
+    """Process-wide RAG system loaded from RAG_INDEX_PATH, or None when no index was built yet."""
+    global _rag_system
+    with _rag_system_lock:
+        if _rag_system is None and os.path.exists(os.path.join(RAG_INDEX_PATH, "docstore.json")):
+            with trace_stage("rag_index_load"):
+                rag_system = CVRagSystem()
+                rag_system.load()
+            _rag_system = rag_system
+    return _rag_system
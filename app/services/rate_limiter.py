@@ -0,0 +1,254 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.config import (
+    OPENAI_REQUESTS_PER_MINUTE,
+    OPENAI_TOKENS_PER_MINUTE,
+    OPENAI_MAX_CONCURRENCY,
+    OPENAI_TARGET_LATENCY_SECONDS,
+    WEB_CONCURRENCY,
+)
+
+# Priority classes, lower runs first
+INTERACTIVE = 0
+BATCH = 1
+RETRY = 2
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch", RETRY: "retry"}
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most one minute worth of capacity."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be consumed (requests larger than the bucket wait for a full one)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        # May go negative when usage is corrected upwards after a call
+        self.tokens -= amount
+
+
+class AdaptiveRateLimiter:
+    """
+    Process-wide limiter for OpenAI traffic.
+
+    Callers are admitted in priority order when a concurrency slot is free and both the
+    requests/min and tokens/min buckets have room. The concurrency limit adapts AIMD-style:
+    it grows by one slot per window of successful calls, is halved on a 429 and shrunk
+    when latency goes above the target. Cancelled and otherwise failed calls leave it unchanged.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_concurrency: int,
+                 target_latency: float, min_concurrency: int = 1):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.target_latency = target_latency
+        self.concurrency_limit = float(max_concurrency)
+
+        self._condition = threading.Condition()
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+        self._metrics: Dict[str, Any] = {
+            "requests": 0,
+            "rate_limited": 0,
+            "slow_responses": 0,
+            "queue_wait": {
+                name: {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+                for name in PRIORITY_NAMES.values()
+            },
+        }
+
+    def _try_admit(self, entry: Tuple[int, int], tokens: int, start: float) -> Optional[float]:
+        """
+        Admit `entry` if it is first in line and capacity allows. Must hold the lock.
+
+        Returns 0 once admitted, the seconds until the buckets refill, or None when the
+        caller has to wait for another call to finish.
+        """
+        if self._waiters[0] != entry or self._in_flight >= int(self.concurrency_limit):
+            return None
+        now = time.monotonic()
+        delay = max(self.request_bucket.wait_time(1, now), self.token_bucket.wait_time(tokens, now))
+        if delay > 0:
+            return delay
+
+        heapq.heappop(self._waiters)
+        self.request_bucket.consume(1)
+        self.token_bucket.consume(tokens)
+        self._in_flight += 1
+
+        waited = now - start
+        wait_metrics = self._metrics["queue_wait"].setdefault(
+            PRIORITY_NAMES.get(entry[0], str(entry[0])), {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        wait_metrics["count"] += 1
+        wait_metrics["total_seconds"] += waited
+        wait_metrics["max_seconds"] = max(wait_metrics["max_seconds"], waited)
+        self._notify()
+        return 0.0
+
+    def _notify(self) -> None:
+        """Wake every waiter, blocking or async. Must hold the lock."""
+        self._condition.notify_all()
+        for loop, event in self._async_waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def _leave_queue(self, entry: Tuple[int, int]) -> None:
+        with self._condition:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._notify()
+
+    def acquire(self, priority: int = BATCH, tokens: int = 0) -> float:
+        """Block until the call may proceed. Returns the time spent queued in seconds."""
+        start = time.monotonic()
+        entry = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    delay = self._try_admit(entry, tokens, start)
+                    if delay == 0:
+                        return time.monotonic() - start
+                    self._condition.wait(delay)
+            except BaseException:
+                self._leave_queue(entry)
+                raise
+
+    async def acquire_async(self, priority: int = BATCH, tokens: int = 0) -> float:
+        """Like acquire(), but waits on the event loop instead of tying up a thread."""
+        start = time.monotonic()
+        entry = (priority, next(self._sequence))
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            self._async_waiters.append(waiter)
+        try:
+            while True:
+                with self._condition:
+                    waiter[1].clear()
+                    delay = self._try_admit(entry, tokens, start)
+                if delay == 0:
+                    return time.monotonic() - start
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._leave_queue(entry)
+            raise
+        finally:
+            with self._condition:
+                self._async_waiters.remove(waiter)
+
+    def release(self, latency: float, rate_limited: bool = False, completed: bool = True) -> None:
+        """
+        Free the slot taken by acquire() and adapt the concurrency limit.
+
+        Only a completed call says the upstream has room, so `completed=False` (cancelled or
+        failed for another reason) frees the slot without touching the limit.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._metrics["requests"] += 1
+            if rate_limited:
+                self._metrics["rate_limited"] += 1
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+            elif not completed:
+                pass
+            elif latency > self.target_latency:
+                self._metrics["slow_responses"] += 1
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit * 0.75)
+            else:
+                self.concurrency_limit = min(self.max_concurrency,
+                                             self.concurrency_limit + 1 / self.concurrency_limit)
+            self._notify()
+
+    def adjust_tokens(self, delta: int) -> None:
+        """Correct the token bucket once actual usage of a call is known."""
+        with self._condition:
+            self.token_bucket.consume(delta)
+            self._notify()
+
+    @contextmanager
+    def limit(self, priority: int = BATCH, tokens: int = 0):
+        """Hold a slot for the duration of a blocking OpenAI call."""
+        self.acquire(priority, tokens)
+        start = time.monotonic()
+        rate_limited = completed = False
+        try:
+            yield
+            completed = True
+        except Exception as e:
+            rate_limited = getattr(e, "status_code", None) == 429
+            raise
+        finally:
+            self.release(time.monotonic() - start, rate_limited, completed)
+
+    @asynccontextmanager
+    async def limit_async(self, priority: int = BATCH, tokens: int = 0):
+        """Like limit(), but waits for the slot without blocking the event loop."""
+        await self.acquire_async(priority, tokens)
+        start = time.monotonic()
+        rate_limited = completed = False
+        try:
+            yield
+            completed = True
+        except Exception as e:
+            rate_limited = getattr(e, "status_code", None) == 429
+            raise
+        finally:
+            self.release(time.monotonic() - start, rate_limited, completed)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Snapshot of limiter state and queue wait times per priority class."""
+        with self._condition:
+            queue_wait = {}
+            for name, wait in self._metrics["queue_wait"].items():
+                queue_wait[name] = {
+                    **wait,
+                    "avg_seconds": wait["total_seconds"] / wait["count"] if wait["count"] else 0.0,
+                }
+            return {
+                "concurrency_limit": int(self.concurrency_limit),
+                "in_flight": self._in_flight,
+                "queued": len(self._waiters),
+                "requests": self._metrics["requests"],
+                "rate_limited": self._metrics["rate_limited"],
+                "slow_responses": self._metrics["slow_responses"],
+                "queue_wait": queue_wait,
+            }
+
+
+# Shared by every OpenAI caller in the process; each worker gets its share of the account limits
+openai_limiter = AdaptiveRateLimiter(
+    requests_per_minute=max(1, OPENAI_REQUESTS_PER_MINUTE // WEB_CONCURRENCY),
+    tokens_per_minute=max(1, OPENAI_TOKENS_PER_MINUTE // WEB_CONCURRENCY),
+    max_concurrency=OPENAI_MAX_CONCURRENCY,
+    target_latency=OPENAI_TARGET_LATENCY_SECONDS,
+)
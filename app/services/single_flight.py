@@ -0,0 +1,78 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from prometheus_client import Counter
+
+from app.utils.deadline import DeadlineExceeded, remaining, without_deadline
+
+T = TypeVar("T")
+
+COALESCED_REQUESTS = Counter(
+    "clerk_coalesced_requests_total",
+    "Calls by single-flight group: leader (ran the work) or coalesced (awaited an identical call in flight)",
+    ["group", "result"],
+)
+
+
+class _Flight:
+    def __init__(self, task: "asyncio.Future"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Request coalescing: the first caller of a key runs the call, and callers arriving with the
+    same key while it is in flight await its result (or exception) instead of running it again.
+
+    The call runs in its own task, so it outlives any one caller giving up and is cancelled
+    only when all of them have. It runs without a deadline, as a later caller may have more time
+    than the first; every caller waits no longer than its own. Results are shared, so callers
+    must not mutate them.
+    Coalescing is per worker process; the cache covers duplicates that arrive after a call finished.
+    """
+
+    def __init__(self, group: str, enabled: bool = True):
+        self.group = group
+        self.enabled = enabled
+        self._flights: Dict[str, _Flight] = {}
+
+    def _land(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def run(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await call(), or the identical call already in flight for `key`.
+
+        Args:
+            key (str): Identity of the call; callers with equal keys share one result
+            call (Callable[[], Awaitable[T]]): Starts the work
+
+        Returns:
+            T: The result of the single call made for this key
+        """
+        if not self.enabled:
+            return await call()
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(without_deadline(lambda: asyncio.ensure_future(call())))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._land(key, flight))
+            COALESCED_REQUESTS.labels(self.group, "leader").inc()
+        else:
+            COALESCED_REQUESTS.labels(self.group, "coalesced").inc()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), remaining())
+        except asyncio.TimeoutError:
+            if flight.task.done():
+                raise
+            raise DeadlineExceeded("Request deadline exceeded")
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Nobody is waiting any more; a new caller starts afresh
+                flight.task.cancel()
+                self._land(key, flight)
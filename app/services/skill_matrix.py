@@ -0,0 +1,260 @@
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import SKILL_MATRIX_REFRESH_SECONDS, SKILL_MATRIX_RELOAD_SECONDS
+from app.services.canonicalizer import Canonicalizer
+from app.utils.metrics import trace_stage
+
+INITIAL_ROWS = 1024
+INITIAL_COLUMNS = 256
+
+
+class SkillMatrix:
+    """
+    Dense cv x skill score matrix (uint8, 0 = skill not listed) for structured filtering.
+
+    Stored column-major, so the columns of the few skills a filter mentions are contiguous
+    and every filter or ranking is a handful of vectorized passes over them. Memory is
+    rows x columns bytes: 20k CVs over a 2k-skill canonical vocabulary take 40 MB.
+    """
+
+    def __init__(self):
+        self._scores = np.zeros((INITIAL_ROWS, INITIAL_COLUMNS), dtype=np.uint8, order="F")
+        self._active = np.zeros(INITIAL_ROWS, dtype=bool)
+        self._cv_ids = np.zeros(INITIAL_ROWS, dtype=np.int64)
+        self._row_of: Dict[int, int] = {}
+        self._column_of: Dict[str, int] = {}
+        self.skill_names: List[str] = []
+        self.candidates: Dict[int, Dict[str, Any]] = {}
+        # Highest cv id read from the database; local ingests don't move it, so a refresh
+        # still picks up lower ids committed meanwhile by other workers
+        self.synced_cv_id = 0
+        self.loaded_at: Optional[float] = None
+        # Query-side canonicalizer over the matrix columns, rebuilt when new skills appear
+        self._canonicalizer: Optional[Canonicalizer] = None
+        self._canonicalizer_columns = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def active_count(self) -> int:
+        """CVs currently in the matrix (removed rows are kept but inactive)."""
+        with self._lock:
+            return int(self._active[:len(self._row_of)].sum())
+
+    def _grow(self, rows: int, columns: int) -> None:
+        old_rows, old_columns = self._scores.shape
+        if rows <= old_rows and columns <= old_columns:
+            return
+        # Double on overflow so incremental inserts stay amortized O(1)
+        new_rows = old_rows if rows <= old_rows else max(rows, old_rows * 2)
+        new_columns = old_columns if columns <= old_columns else max(columns, old_columns * 2)
+        scores = np.zeros((new_rows, new_columns), dtype=np.uint8, order="F")
+        scores[:old_rows, :old_columns] = self._scores
+        self._scores = scores
+        if new_rows > old_rows:
+            self._active = np.concatenate([self._active, np.zeros(new_rows - old_rows, dtype=bool)])
+            self._cv_ids = np.concatenate([self._cv_ids, np.zeros(new_rows - old_rows, dtype=np.int64)])
+
+    def _column(self, skill: str) -> int:
+        column = self._column_of.get(skill)
+        if column is None:
+            column = len(self.skill_names)
+            self._grow(self._scores.shape[0], column + 1)
+            self._column_of[skill] = column
+            self.skill_names.append(skill)
+        return column
+
+    def upsert_cv(self, cv_id: int, skills: Dict[str, int], info: Optional[Dict[str, Any]] = None) -> None:
+        """Add or replace one CV's scores; called after every ingestion."""
+        with self._lock:
+            row = self._row_of.get(cv_id)
+            if row is None:
+                row = len(self._row_of)
+                self._grow(row + 1, self._scores.shape[1])
+                self._row_of[cv_id] = row
+                self._cv_ids[row] = cv_id
+            # Resolve columns first: adding one may reallocate the matrix
+            columns = [(self._column(skill), max(0, min(100, int(score)))) for skill, score in skills.items()]
+            self._scores[row, :] = 0
+            for column, score in columns:
+                self._scores[row, column] = score
+            self._active[row] = True
+            if info is not None:
+                self.candidates[cv_id] = info
+
+    def remove_cv(self, cv_id: int) -> None:
+        with self._lock:
+            row = self._row_of.get(cv_id)
+            if row is not None:
+                self._active[row] = False
+                self._scores[row, :] = 0
+            self.candidates.pop(cv_id, None)
+
+    def load(self, conn, since_cv_id: int = 0) -> int:
+        """Load scores (all, or only CVs newer than since_cv_id) from cv_skill; returns the CVs loaded."""
+        with trace_stage("skill_matrix_load", since_cv_id=since_cv_id) as trace, conn.cursor() as cur:
+            cur.execute("SELECT id, name, email, country FROM cv WHERE id > %s", (since_cv_id,))
+            info = {row[0]: {"name": row[1], "email": row[2], "country": row[3]} for row in cur.fetchall()}
+            cur.execute("""
+                SELECT cs.cv_id, s.name, cs.value
+                FROM cv_skill cs
+                JOIN skill s ON s.id = cs.skill_id
+                WHERE cs.cv_id > %s
+            """, (since_cv_id,))
+            rows = cur.fetchall()
+            trace["cvs"] = len(info)
+
+        skills_by_cv: Dict[int, Dict[str, int]] = {cv_id: {} for cv_id in info}
+        for cv_id, skill, value in rows:
+            skills_by_cv.setdefault(cv_id, {})[skill] = value or 0
+        with self._lock:
+            for cv_id, skills in skills_by_cv.items():
+                self.upsert_cv(cv_id, skills, info.get(cv_id))
+            self.synced_cv_id = max([self.synced_cv_id, *info])
+            self.loaded_at = time.monotonic()
+        return len(skills_by_cv)
+
+    def _resolve(self, skills: Dict[str, Any]) -> Tuple[List[int], List[Any], bool]:
+        """Columns for the requested skills; the flag is False when one is unknown."""
+        columns, values = [], []
+        for skill, value in skills.items():
+            column = self._column_of.get(skill)
+            if column is None:
+                return [], [], False
+            columns.append(column)
+            values.append(value)
+        return columns, values, True
+
+    def _mask(self, min_scores: Dict[str, int]) -> np.ndarray:
+        rows = len(self._row_of)
+        mask = self._active[:rows].copy()
+        required = {skill: score for skill, score in min_scores.items() if score > 0}
+        columns, thresholds, known = self._resolve(required)
+        if not known:
+            return np.zeros(rows, dtype=bool)
+        for column, threshold in zip(columns, thresholds):
+            mask &= self._scores[:rows, column] >= threshold
+        return mask
+
+    def filter(self, min_scores: Dict[str, int]) -> List[int]:
+        """CV ids scoring at least min_scores[skill] on every listed skill."""
+        with self._lock:
+            mask = self._mask(min_scores)
+            return self._cv_ids[:len(mask)][mask].tolist()
+
+    def top_n(self, weights: Dict[str, float], n: int = 10,
+              min_scores: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """
+        Rank CVs by sum(weight * score) over the weighted skills, optionally after a threshold filter.
+
+        Returns the best n as {"cv_id", "score", "skills": {skill: score}}, highest first.
+        """
+        return self.rank(weights, n, min_scores)[0]
+
+    def rank(self, weights: Dict[str, float], n: int = 10,
+             min_scores: Optional[Dict[str, int]] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        top_n() plus the number of CVs that matched. Without thresholds, only CVs with a
+        non-zero combined score match (a CV without any weighted skill is not a result).
+        """
+        with self._lock:
+            mask = self._mask(min_scores or {})
+            rows = len(mask)
+            known_weights = {skill: weight for skill, weight in weights.items() if skill in self._column_of}
+            columns, column_weights, _ = self._resolve(known_weights)
+            if columns:
+                combined = self._scores[:rows, columns].astype(np.float32) @ np.asarray(column_weights, np.float32)
+            else:
+                combined = np.zeros(rows, dtype=np.float32)
+            if not any(score > 0 for score in (min_scores or {}).values()):
+                mask &= combined != 0
+            candidates = np.flatnonzero(mask)
+            matches = len(candidates)
+            if len(candidates) > n:
+                best = np.argpartition(-combined[candidates], n - 1)[:n]
+                candidates = candidates[best]
+            order = candidates[np.argsort(-combined[candidates], kind="stable")]
+
+            report_columns, _, _ = self._resolve({skill: 0 for skill in {**(min_scores or {}), **known_weights}})
+            report_skills = [self.skill_names[column] for column in report_columns]
+            return [{
+                "cv_id": int(self._cv_ids[row]),
+                "score": round(float(combined[row]), 2),
+                "skills": {skill: int(self._scores[row, column]) for skill, column in zip(report_skills, report_columns)},
+            } for row in order], matches
+
+    def canonical_skills(self, skills: Dict[str, Any]) -> Dict[str, Any]:
+        """Map user-typed skill names onto the matrix columns (React.js -> react)."""
+        with self._lock:
+            if self._canonicalizer is None or self._canonicalizer_columns != len(self.skill_names):
+                self._canonicalizer = Canonicalizer(self.skill_names)
+                self._canonicalizer_columns = len(self.skill_names)
+            return {self._canonicalizer.canonical_skill(skill, learn=False): value for skill, value in skills.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cvs": len(self),
+                "skills": len(self.skill_names),
+                "memory_bytes": int(self._scores.nbytes),
+                "synced_cv_id": self.synced_cv_id,
+            }
+
+
+_skill_matrix = SkillMatrix()
+_load_lock = threading.Lock()
+
+
+_fully_loaded_at: Optional[float] = None
+
+
+def _cv_count(conn) -> int:
+    with conn.cursor() as cur:
+        cur.execute("SELECT count(*) FROM cv")
+        return cur.fetchone()[0]
+
+
+def get_skill_matrix(db_service=None) -> SkillMatrix:
+    """
+    The process-wide matrix: fully loaded on first use, then topped up with CVs ingested by
+    other workers every SKILL_MATRIX_REFRESH_SECONDS (this worker's own ingests land immediately).
+
+    Top-ups only see new ids. A CV count that no longer matches (a delete or replace made
+    by another process) triggers a full reload, and so does SKILL_MATRIX_RELOAD_SECONDS
+    passing, which also picks up skills renamed or merged by app.merge_duplicates.
+    """
+    global _skill_matrix, _fully_loaded_at
+    with _load_lock:
+        now = time.monotonic()
+        if _skill_matrix.loaded_at is not None and now - _skill_matrix.loaded_at <= SKILL_MATRIX_REFRESH_SECONDS:
+            return _skill_matrix
+        if db_service is None:
+            from app.services.db_service import DatabaseService
+            db_service = DatabaseService()
+        reload = _fully_loaded_at is None or now - _fully_loaded_at > SKILL_MATRIX_RELOAD_SECONDS
+        if not reload:
+            _skill_matrix.load(db_service.conn, since_cv_id=_skill_matrix.synced_cv_id)
+            reload = _skill_matrix.active_count() != _cv_count(db_service.conn)
+        if reload:
+            # Built aside and swapped in, so searches keep the old matrix until the new one is ready
+            matrix = SkillMatrix()
+            matrix.load(db_service.conn)
+            _skill_matrix, _fully_loaded_at = matrix, now
+    return _skill_matrix
+
+
+def record_ingested_cv(cv_id: int, cv_data: Dict[str, Any]) -> None:
+    """Update the matrix after store_cv_data, if this process has loaded it."""
+    if _skill_matrix.loaded_at is not None:
+        _skill_matrix.upsert_cv(cv_id, cv_data.get("skills", {}), {
+            "name": cv_data.get("name"), "email": cv_data.get("email"), "country": cv_data.get("country")
+        })
+
+
+def record_deleted_cv(cv_id: int) -> None:
+    _skill_matrix.remove_cv(cv_id)
@@ -0,0 +1,189 @@
+import json
+import os
+from typing import Any, List, Optional
+
+import fsspec
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores import SimpleVectorStore
+from llama_index.core.vector_stores.simple import DEFAULT_PERSIST_DIR, DEFAULT_PERSIST_FNAME
+from llama_index.core.vector_stores.types import VectorStoreQuery, VectorStoreQueryResult, VectorStoreQueryMode
+
+from app.config import RAG_COARSE_DIMENSIONS, RAG_SHORTLIST_FACTOR
+from app.utils.metrics import trace_stage
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class TwoStageVectorStore(SimpleVectorStore):
+    """
+    SimpleVectorStore with a two-stage cosine search.
+
+    text-embedding-3 vectors are trained so that their leading dimensions work on their own,
+    so a truncated, renormalized copy (coarse_dimensions wide) ranks the whole corpus first and
+    only the best similarity_top_k * shortlist_factor nodes are rescored with the full vectors.
+    Both matrices are built once from the stored embeddings instead of on every query, and
+    the matrix then replaces the embedding lists, which take several times its memory; they are
+    put back (normalized) only while SimpleVectorStore code needs them. persist() saves the
+    matrix as .npy next to the JSON store.
+    coarse_dimensions=0 keeps single-stage exact search (still on the cached matrix).
+    Metadata-filtered and non-default queries fall back to SimpleVectorStore.
+    """
+
+    _coarse_dimensions: int = PrivateAttr(default=RAG_COARSE_DIMENSIONS)
+    _shortlist_factor: int = PrivateAttr(default=RAG_SHORTLIST_FACTOR)
+    _ids: Optional[List[str]] = PrivateAttr(default=None)
+    _full: Optional[np.ndarray] = PrivateAttr(default=None)
+    _coarse: Optional[np.ndarray] = PrivateAttr(default=None)
+
+    def __init__(self, *args: Any, coarse_dimensions: int = RAG_COARSE_DIMENSIONS,
+                 shortlist_factor: int = RAG_SHORTLIST_FACTOR, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._coarse_dimensions = coarse_dimensions
+        self._shortlist_factor = max(1, shortlist_factor)
+
+    def _embedding_lists(self) -> dict:
+        if self._ids is None:
+            return self.data.embedding_dict
+        return {node_id: row.tolist() for node_id, row in zip(self._ids, self._full)}
+
+    def _invalidate(self) -> None:
+        """Move the embeddings back into the lists before SimpleVectorStore code changes them."""
+        self.data.embedding_dict = self._embedding_lists()
+        self._ids = self._full = self._coarse = None
+
+    def add(self, nodes: List[BaseNode], **add_kwargs: Any) -> List[str]:
+        self._invalidate()
+        return super().add(nodes, **add_kwargs)
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        self._invalidate()
+        super().delete(ref_doc_id, **delete_kwargs)
+
+    def delete_nodes(self, *args: Any, **kwargs: Any) -> None:
+        self._invalidate()
+        super().delete_nodes(*args, **kwargs)
+
+    def clear(self) -> None:
+        self._invalidate()
+        super().clear()
+
+    def compact_metadata(self, keys: List[str]) -> None:
+        """
+        Keep only `keys` of the metadata stored per node. SimpleVectorStore keeps a full copy of
+        every node's metadata for filtered queries, which then can only filter on these keys.
+        """
+        for node_id, metadata in self.data.metadata_dict.items():
+            self.data.metadata_dict[node_id] = {key: metadata[key] for key in keys if metadata.get(key)}
+
+    def _set_matrices(self, ids: List[str], full: np.ndarray) -> None:
+        self._ids = ids
+        self._full = _normalize(full.reshape(len(ids), -1))
+        if 0 < self._coarse_dimensions < self._full.shape[1]:
+            self._coarse = _normalize(self._full[:, :self._coarse_dimensions])
+        else:
+            self._coarse = None
+        self.data.embedding_dict = {}
+
+    def _build_matrices(self) -> None:
+        with trace_stage("vector_matrix_build", nodes=len(self.data.embedding_dict)):
+            ids = list(self.data.embedding_dict)
+            full = np.asarray([self.data.embedding_dict[node_id] for node_id in ids], dtype=np.float32)
+            self._set_matrices(ids, full)
+
+    def matrix(self) -> np.ndarray:
+        """The normalized embeddings, one row per node."""
+        if self._ids is None:
+            self._build_matrices()
+        return self._full
+
+    def memory_bytes(self) -> dict:
+        """Size of the search matrices, the only copy of the embeddings kept."""
+        if self._ids is None:
+            self._build_matrices()
+        return {
+            "full": int(self._full.nbytes),
+            "coarse": int(self._coarse.nbytes) if self._coarse is not None else 0,
+        }
+
+    def get(self, text_id: str) -> List[float]:
+        if self._ids is None:
+            return super().get(text_id)
+        return self._full[self._ids.index(text_id)].tolist()
+
+    def persist(self, persist_path: str = os.path.join(DEFAULT_PERSIST_DIR, DEFAULT_PERSIST_FNAME),
+                fs: Optional[fsspec.AbstractFileSystem] = None) -> None:
+        """Save the JSON store without embeddings, and the matrix and its node ids next to it."""
+        if self._ids is None and self.data.embedding_dict:
+            self._build_matrices()
+        super().persist(persist_path, fs)
+        if self._ids is None:
+            return
+        fs = fs or self._fs
+        base = os.path.splitext(persist_path)[0]
+        with fs.open(base + ".npy", "wb") as f:
+            np.save(f, self._full)
+        with fs.open(base + ".ids.json", "w") as f:
+            json.dump(self._ids, f)
+
+    @classmethod
+    def from_persist_path(cls, persist_path: str,
+                          fs: Optional[fsspec.AbstractFileSystem] = None) -> "TwoStageVectorStore":
+        """Load a store saved by persist(); stores saved with embedding lists in the JSON load too."""
+        store = super().from_persist_path(persist_path, fs=fs)
+        fs = fs or fsspec.filesystem("file")
+        base = os.path.splitext(persist_path)[0]
+        if fs.exists(base + ".npy"):
+            with fs.open(base + ".npy", "rb") as f:
+                full = np.load(f)
+            with fs.open(base + ".ids.json", "r") as f:
+                store._set_matrices(json.load(f), full)
+        return store
+
+    def _restrict(self, node_ids: Optional[List[str]]) -> Optional[np.ndarray]:
+        """Row indexes allowed by node_ids, or None for all (the index retriever passes every node id)."""
+        if node_ids is None:
+            return None
+        allowed = set(node_ids)
+        if allowed.issuperset(self._ids):
+            return None
+        return np.fromiter((i for i, node_id in enumerate(self._ids) if node_id in allowed), dtype=np.int64)
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.filters is not None or query.mode != VectorStoreQueryMode.DEFAULT:
+            # The lists exist only for this query; the matrices stay the kept copy
+            embeddings = self.data.embedding_dict
+            self.data.embedding_dict = self._embedding_lists()
+            try:
+                return super().query(query, **kwargs)
+            finally:
+                self.data.embedding_dict = embeddings
+        if self._ids is None:
+            self._build_matrices()
+        rows = self._restrict(query.node_ids)
+        count = len(self._ids) if rows is None else len(rows)
+        if count == 0:
+            return VectorStoreQueryResult(similarities=[], ids=[])
+
+        top_k = min(query.similarity_top_k, count)
+        query_vector = np.asarray(query.query_embedding, dtype=np.float32)
+        with trace_stage("vector_search", nodes=count, two_stage=self._coarse is not None):
+            if self._coarse is not None and top_k * self._shortlist_factor < count:
+                coarse = self._coarse if rows is None else self._coarse[rows]
+                coarse_scores = coarse @ _normalize(query_vector[:self._coarse_dimensions])
+                candidates = np.argpartition(-coarse_scores, top_k * self._shortlist_factor)[:top_k * self._shortlist_factor]
+            else:
+                candidates = np.arange(count)
+            if rows is not None:
+                candidates = rows[candidates]
+
+            scores = self._full[candidates] @ _normalize(query_vector)
+            best = np.argsort(-scores)[:top_k]
+        return VectorStoreQueryResult(
+            similarities=[float(scores[i]) for i in best],
+            ids=[self._ids[candidates[i]] for i in best],
+        )
@@ -0,0 +1,189 @@
+import re
+from typing import Dict, Optional
+
+# Contact details usually sit in the CV header; country hints further down are often
+# employers' or universities' locations rather than the candidate's
+HEADER_LINES = 15
+
+EMAIL_PATTERN = re.compile(r"(?<![\w.+-])[A-Za-z0-9][\w.+-]*@[A-Za-z0-9-]+(\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+PHONE_LABEL_PATTERN = re.compile(r"\b(phone|tel[eé]fono|tel|mobile|m[oó]vil|cell|celular|whatsapp|telefon)\b", re.IGNORECASE)
+PHONE_PATTERN = re.compile(r"(?<![\w+(])(\+|00|\()?\d[\d \t().-]{7,18}\d(?!\w)")
+COUNTRY_LABEL_PATTERN = re.compile(
+    r"^\s*(country|pa[ií]s|location|ubicaci[oó]n|address|direcci[oó]n|residence|residencia|kraj)\s*:\s*(?P<value>.+)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Year ranges ("2019 - 2023") and dates look like phone numbers to the pattern above
+DATE_LIKE_PATTERN = re.compile(r"^(19|20)\d{2}\s*[-/.]\s*((19|20)\d{2}|\d{1,2})$|^\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}$")
+
+MIN_PHONE_DIGITS = 9
+MAX_PHONE_DIGITS = 15
+
+# Canonical (English) country names and the spellings found in CVs
+COUNTRY_ALIASES = {
+    "Spain": ["spain", "españa", "espana", "hiszpania"],
+    "Venezuela": ["venezuela"],
+    "Poland": ["poland", "polska", "polonia"],
+    "Argentina": ["argentina"],
+    "Mexico": ["mexico", "méxico"],
+    "Colombia": ["colombia"],
+    "Chile": ["chile"],
+    "Peru": ["peru", "perú"],
+    "Ecuador": ["ecuador"],
+    "Uruguay": ["uruguay"],
+    "Cuba": ["cuba"],
+    "Dominican Republic": ["dominican republic", "república dominicana", "republica dominicana"],
+    "United Kingdom": ["united kingdom", "uk", "england", "scotland", "reino unido", "great britain"],
+    "United States": ["united states", "usa", "u.s.a.", "estados unidos", "eeuu", "ee.uu."],
+    "Portugal": ["portugal"],
+    "France": ["france", "francia"],
+    "Germany": ["germany", "alemania", "deutschland", "niemcy"],
+    "Italy": ["italy", "italia"],
+    "Netherlands": ["netherlands", "países bajos", "holanda"],
+    "Ireland": ["ireland", "irlanda"],
+    "Ukraine": ["ukraine", "ucrania", "ukraina"],
+    "Romania": ["romania", "rumanía", "rumania"],
+    "Brazil": ["brazil", "brasil"],
+    "India": ["india"],
+}
+
+# International dialing codes of the countries above, longest first when matching
+DIALING_CODES = {
+    "34": "Spain", "58": "Venezuela", "48": "Poland", "54": "Argentina", "52": "Mexico", "57": "Colombia",
+    "56": "Chile", "51": "Peru", "593": "Ecuador", "598": "Uruguay", "53": "Cuba", "44": "United Kingdom",
+    "351": "Portugal", "33": "France", "49": "Germany", "39": "Italy", "31": "Netherlands",
+    "353": "Ireland", "380": "Ukraine", "40": "Romania", "55": "Brazil", "91": "India",
+}
+
+# Codes shared by several countries (+1 is the whole North American Numbering Plan: the United States,
+# Canada, the Dominican Republic...); they only give a hint
+SHARED_DIALING_CODES = {"1": "United States"}
+
+_COUNTRY_PATTERN = re.compile(
+    r"(?<!\w)(" + "|".join(
+        re.escape(alias) for alias in sorted(
+            (alias for aliases in COUNTRY_ALIASES.values() for alias in aliases), key=len, reverse=True
+        )
+    ) + r")(?!\w)",
+    re.IGNORECASE,
+)
+_COUNTRY_BY_ALIAS = {alias: country for country, aliases in COUNTRY_ALIASES.items() for alias in aliases}
+
+
+def _digits(value: str) -> str:
+    return re.sub(r"\D", "", value)
+
+
+def extract_email(text: str) -> str:
+    """First email address in the text, without trailing punctuation."""
+    match = EMAIL_PATTERN.search(text)
+    return match.group(0).rstrip(".") if match else ""
+
+
+def extract_phone(text: str) -> str:
+    """
+    The phone number on a phone-labelled line, else the first international (+NN / 00NN)
+    number (9 to 15 digits, not a date or a year range). Returned as written in the CV.
+
+    Unlabelled local-format numbers are left to the model: references, IDs and account
+    numbers look the same.
+    """
+    candidates = []
+    for line in text.splitlines():
+        for match in PHONE_PATTERN.finditer(line):
+            value = match.group(0).strip(" .-")
+            if DATE_LIKE_PATTERN.match(value) or not MIN_PHONE_DIGITS <= len(_digits(value)) <= MAX_PHONE_DIGITS:
+                continue
+            if PHONE_LABEL_PATTERN.search(line):
+                return value
+            if value.startswith(("+", "00")):
+                candidates.append(value)
+    return candidates[0] if candidates else ""
+
+
+def country_from_phone(phone: str, shared: bool = False) -> Optional[str]:
+    """
+    Country of an international (+NN / 00NN) phone number. Codes shared by several countries
+    only count with shared=True, and then give the most likely one.
+    """
+    phone = phone.strip()
+    if not phone.startswith(("+", "00")):
+        return None
+    codes = {**DIALING_CODES, **SHARED_DIALING_CODES} if shared else DIALING_CODES
+    digits = _digits(phone)[2 if phone.startswith("00") else 0:]
+    for length in (3, 2, 1):
+        if digits[:length] in codes:
+            return codes[digits[:length]]
+    return None
+
+
+def _country_in(text: str) -> Optional[str]:
+    match = _COUNTRY_PATTERN.search(text)
+    return _COUNTRY_BY_ALIAS[match.group(1).lower()] if match else None
+
+
+def extract_country(text: str, phone: str = "") -> str:
+    """
+    Country of residence from a labelled country/location line, else from the phone's dialing
+    code unless the header names another country (the model then decides between them).
+    """
+    for match in COUNTRY_LABEL_PATTERN.finditer(text):
+        country = _country_in(match.group("value"))
+        if country:
+            return country
+    country = country_from_phone(phone)
+    if country and guess_country(text) in ("", country):
+        return country
+    return ""
+
+
+def guess_country(text: str) -> str:
+    """
+    First country named in the header. Often right, but it may be an employer's or a
+    university's, so it is only passed to the model as a hint.
+    """
+    header = "\n".join(text.splitlines()[:HEADER_LINES])
+    return _country_in(header) or ""
+
+
+def extract_contact_fields(text: str) -> Dict[str, str]:
+    """
+    Extract email, phone and country locally, before the LLM call.
+
+    Args:
+        text (str): CV text (raw or compacted)
+
+    Returns:
+        Dict[str, str]: The fields that were found; missing ones are left out
+    """
+    phone = extract_phone(text)
+    fields = {
+        "email": extract_email(text),
+        "phone": phone,
+        "country": extract_country(text, phone),
+    }
+    return {field: value for field, value in fields.items() if value}
+
+
+def contact_hints(text: str, fields: Dict[str, str]) -> Dict[str, str]:
+    """Likely values of the contact fields extract_contact_fields could not settle."""
+    hints = {}
+    if "country" not in fields:
+        # A country named in the text is more telling than a shared dialing code
+        hints["country"] = guess_country(text) or country_from_phone(fields.get("phone", ""), shared=True) or ""
+    return {field: value for field, value in hints.items() if value}
+
+
+def known_fields_note(fields: Dict[str, str], hints: Optional[Dict[str, str]] = None) -> str:
+    """
+    Lines appended to the CV text telling the model which fields are already known, and
+    which guesses it should confirm or correct (those stay in the requested schema).
+    """
+    lines = []
+    if fields:
+        lines.append("Already extracted (do not return): "
+                     + "; ".join(f"{field}: {value}" for field, value in fields.items()))
+    if hints:
+        lines.append("Likely, confirm or correct from the CV: "
+                     + "; ".join(f"{field}: {value}" for field, value in hints.items()))
+    return "\n".join(lines)
+
@@ -0,0 +1,50 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Absolute time.monotonic() by which the current request must answer. Context variables follow
+# asyncio tasks and asyncio.to_thread, so every call made on behalf of a request sees it.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("clerk_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the request's latency budget is spent before a call could be made."""
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]):
+    """Give the enclosed work `seconds` to finish; a tighter enclosing deadline still applies."""
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """Seconds left before the current deadline, capped at `default` (which also applies without one)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return default
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return left if default is None else min(left, default)
+
+
+def without_deadline(fn: Callable[..., T], *args) -> T:
+    """
+    Call fn outside any request deadline. Tasks it starts keep running without one, for work
+    shared by several requests that each enforce their own budget while awaiting it.
+    """
+    context = contextvars.copy_context()
+    context.run(_deadline.set, None)
+    return context.run(fn, *args)
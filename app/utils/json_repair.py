@@ -0,0 +1,86 @@
+import json
+import re
+from typing import Dict, Any, List, Tuple
+
+
+def strip_code_fences(content: str) -> str:
+    """Remove a surrounding ```json ... ``` fence if the model added one."""
+    content = re.sub(r'^\s*```(?:json)?\s*\n', '', content)
+    content = re.sub(r'\n?```\s*$', '', content)
+    return content.strip()
+
+
+def parse_partial_json(content: str) -> Dict[str, Any]:
+    """
+    Parse a JSON object, salvaging as much as possible when it is malformed or truncated.
+
+    The text is scanned once, tracking open strings and brackets. If the object never
+    closes (e.g. the completion hit max_tokens), the longest prefix ending on a complete
+    value (a closed string or bracket, or a number or literal) is closed off and parsed, so
+    every fully generated field is kept.
+
+    Args:
+        content (str): Raw model output, optionally wrapped in a code fence or prose
+
+    Returns:
+        Dict[str, Any]: The parsed (possibly partial) object
+
+    Raises:
+        json.JSONDecodeError: If no JSON object can be recovered at all
+    """
+    content = strip_code_fences(content)
+    start = content.find('{')
+    if start == -1:
+        raise json.JSONDecodeError("No JSON object found", content, 0)
+    content = content[start:]
+
+    stack: List[str] = []
+    cut_points: List[Tuple[int, str]] = []
+    in_string = False
+    escaped = False
+
+    for i, char in enumerate(content):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+                # End of a complete string; closing off after a key fails to parse and is skipped
+                cut_points.append((i + 1, ''.join(reversed(stack))))
+            continue
+
+        if char.isspace() and i and content[i - 1].isalnum():
+            # End of a complete number or literal (true, false, null)
+            cut_points.append((i, ''.join(reversed(stack))))
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]':
+            if not stack:
+                break
+            stack.pop()
+            closers = ''.join(reversed(stack))
+            cut_points.append((i + 1, closers))
+            if not stack:
+                # Complete object, ignore any trailing text
+                return json.loads(content[:i + 1])
+        elif char == ',':
+            cut_points.append((i, ''.join(reversed(stack))))
+
+    # Truncated: close off at the last position that ended on a complete value. A value
+    # cut mid-way (e.g. half an email) is dropped rather than guessed at. A number or literal
+    # running up to the end is kept when it parses ("tru" does not, "85" does).
+    if not in_string and content[-1:].isalnum():
+        cut_points.append((len(content), ''.join(reversed(stack))))
+    for end, closers in reversed([(1, '}')] + cut_points):
+        try:
+            result = json.loads(content[:end] + closers)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(result, dict):
+            return result
+
+    raise json.JSONDecodeError("Could not recover JSON object", content, 0)
@@ -0,0 +1,92 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Any
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+
+logger = logging.getLogger("clerk_ai")
+
+# Buckets from 1 ms to 2 min: SQL and re-ranking sit at the low end, LLM calls at the high end
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_DURATION = Histogram(
+    "clerk_stage_duration_seconds",
+    "Time spent per pipeline stage",
+    ["stage", "status"],
+    buckets=STAGE_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "clerk_llm_tokens_total",
+    "Tokens reported by OpenAI in response.usage",
+    ["model", "type"],
+)
+
+
+@contextmanager
+def trace_stage(stage: str, **attributes: Any):
+    """
+    Time a pipeline stage into clerk_stage_duration_seconds and emit a debug trace line.
+
+    Yields a dict the caller can add attributes to (e.g. token counts) for the trace line.
+    Formatting only happens when DEBUG logging is enabled, so tracing is free otherwise.
+    """
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield attributes
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_DURATION.labels(stage, status).observe(elapsed)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("stage=%s status=%s duration_ms=%.1f %s", stage, status, elapsed * 1000,
+                         " ".join(f"{key}={value}" for key, value in attributes.items()))
+
+
+def record_llm_usage(model: str, usage: Any, trace: Dict[str, Any] = None) -> None:
+    """Count prompt/completion tokens from an OpenAI response.usage object."""
+    if usage is None:
+        return
+    LLM_TOKENS.labels(model, "prompt").inc(usage.prompt_tokens or 0)
+    LLM_TOKENS.labels(model, "completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+    if trace is not None:
+        trace["prompt_tokens"] = usage.prompt_tokens
+        trace["completion_tokens"] = getattr(usage, "completion_tokens", 0)
+
+
+class RateLimiterCollector:
+    """Exposes the shared OpenAI limiter state and queue wait times on /metrics."""
+
+    def __init__(self, limiter: Any):
+        self.limiter = limiter
+
+    def collect(self):
+        snapshot = self.limiter.get_metrics()
+
+        yield GaugeMetricFamily("clerk_openai_concurrency_limit", "Current adaptive concurrency limit",
+                                value=snapshot["concurrency_limit"])
+        yield GaugeMetricFamily("clerk_openai_in_flight", "OpenAI calls in flight", value=snapshot["in_flight"])
+        yield GaugeMetricFamily("clerk_openai_queued", "OpenAI calls waiting for the limiter", value=snapshot["queued"])
+
+        for name in ("requests", "rate_limited", "slow_responses"):
+            yield CounterMetricFamily(f"clerk_openai_{name}", f"OpenAI calls: {name.replace('_', ' ')}",
+                                      value=snapshot[name])
+
+        wait_count = CounterMetricFamily("clerk_openai_queue_admitted", "Calls admitted by the limiter",
+                                         labels=["priority"])
+        wait_total = CounterMetricFamily("clerk_openai_queue_wait_seconds", "Total time queued in the limiter",
+                                         labels=["priority"])
+        wait_max = GaugeMetricFamily("clerk_openai_queue_wait_max_seconds", "Longest time queued in the limiter",
+                                     labels=["priority"])
+        for priority, wait in snapshot["queue_wait"].items():
+            wait_count.add_metric([priority], wait["count"])
+            wait_total.add_metric([priority], wait["total_seconds"])
+            wait_max.add_metric([priority], wait["max_seconds"])
+        yield wait_count
+        yield wait_total
+        yield wait_max
+
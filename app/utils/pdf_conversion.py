@@ -3,7 +3,11 @@ import tempfile
 import os
 from typing import Optional
 from fastapi import UploadFile
-import pymupdf
+
+from app.utils.metrics import logger, trace_stage
+
+# Form feed between pages so later stages can tell page boundaries apart
+PAGE_SEPARATOR = "\f"
 
 
 async def file_to_text(file: UploadFile) -> Optional[str]:
@@ -18,20 +22,20 @@ async def file_to_text(file: UploadFile) -> Optional[str]:
     try:
         if content_type == "application/pdf":
             # Process PDF file
-            doc = pymupdf.open(temp_file_path)
-            full_text = ""
-            for page in doc:
-                full_text += page.get_text()
-            return full_text
+            import pymupdf
+            with trace_stage("pdf_parse", source="upload") as trace:
+                doc = pymupdf.open(temp_file_path)
+                trace["pages"] = doc.page_count
+                return PAGE_SEPARATOR.join(page.get_text() for page in doc)
         elif content_type in ["text/plain", "text/markdown"]:
             # Process text or markdown file
             with open(temp_file_path, 'r', encoding='utf-8') as text_file:
                 return text_file.read()
         else:
-            print(f"Unsupported file type: {content_type}")
+            logger.warning("Unsupported file type: %s", content_type)
             return None
     except Exception as e:
-        print(f"Error processing file: {str(e)}")
+        logger.warning("Error processing file: %s", e)
         return None
     finally:
         # Clean up the temporary file
@@ -50,19 +54,19 @@ def file_path_to_text(file_path: str) -> Optional[str]:
     """
     try:
         if not os.path.exists(file_path):
-            print(f"File not found: {file_path}")
+            logger.warning("File not found: %s", file_path)
             return None
 
         content_type = get_file_type(file_path)
-        print(f"Processing file: {file_path} (type: {content_type})")
+        logger.debug("Processing file: %s (type: %s)", file_path, content_type)
 
         if content_type == "application/pdf":
             # Process PDF file using pymupdf
-            doc = pymupdf.open(file_path)
-            full_text = ""
-            for page in doc:
-                full_text += page.get_text()
-            return full_text
+            import pymupdf
+            with trace_stage("pdf_parse", source="file") as trace:
+                doc = pymupdf.open(file_path)
+                trace["pages"] = doc.page_count
+                return PAGE_SEPARATOR.join(page.get_text() for page in doc)
 
         elif content_type in ["text/plain", "text/markdown"]:
             # Process text or markdown file
@@ -70,11 +74,11 @@ def file_path_to_text(file_path: str) -> Optional[str]:
                 return text_file.read()
 
         else:
-            print(f"Unsupported file type: {content_type}")
+            logger.warning("Unsupported file type: %s", content_type)
             return None
 
     except Exception as e:
-        print(f"Error processing file {file_path}: {str(e)}")
+        logger.warning("Error processing file %s: %s", file_path, e)
         return None
 
 
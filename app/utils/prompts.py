@@ -4,6 +4,7 @@ Analyze the given curriculum vitae critically and provide the requested informat
 
 
 Provide the following in JSON format: name, email, country, phone, companies worked at, skills (with a score from 0 to 100), and an overall comment. Use very high standards for scoring. Only high scores should be given for truly exceptional candidates. Reply ONLY with the JSON, nothing else.
+Fields listed as already extracted after the curriculum are known: leave them out of the JSON.
 
 For skills evaluation, use the following scoring guide:
 - 90-100: Absolutely certain (shows extensive experience over several years)
@@ -56,11 +57,11 @@ Now, given the following curriculum and list of skills to evaluate, respond only
   "country": "candidate's country",
   "phone": "candidate's phone number",
   "companies": ["Company1", "Company2"],
-  "skills": {
-    "skill1": score,
-    "skill2": score,
-    "skill3": score
-  },
+  "skills": [
+    {"name": "skill1", "score": score},
+    {"name": "skill2", "score": score},
+    {"name": "skill3", "score": score}
+  ],
   "comment": "overall evaluation comment"
 }
 ```
@@ -105,11 +106,11 @@ Analysis:
   "country": "United States",
   "phone": "+1 (555) 123-4567",
   "companies": ["Local Supermarket"],
-  "skills": {
-    "java": 35,
-    "html": 30,
-    "css": 30
-  },
+  "skills": [
+    {"name": "java", "score": 35},
+    {"name": "html", "score": 30},
+    {"name": "css", "score": 30}
+  ],
   "comment": "Entry-level candidate with minimal relevant experience. Limited demonstration of technical skills or alignment with company values. Lacks evidence of proactive learning or problem-solving abilities in the software development field."
 }
 ```
@@ -153,13 +154,13 @@ Analysis:
   "country": "United Kingdom",
   "phone": "+44 20 1234 5678",
   "companies": ["Tech Solutions Ltd.", "StartUp Inc."],
-  "skills": {
-    "social_media_marketing": 70,
-    "content_creation": 65,
-    "seo": 60,
-    "google_analytics": 55,
-    "email_marketing": 68
-  },
+  "skills": [
+    {"name": "social_media_marketing", "score": 70},
+    {"name": "content_creation", "score": 65},
+    {"name": "seo", "score": 60},
+    {"name": "google_analytics", "score": 55},
+    {"name": "email_marketing", "score": 68}
+  ],
   "comment": "Competent mid-level marketing specialist with a solid foundation in digital marketing. Shows some evidence of teamwork and communication skills. Demonstrates average alignment with company values, with room for improvement in innovative problem-solving and continuous learning."
 }
 ```
@@ -211,22 +212,30 @@ Analysis:
   "country": "Canada",
   "phone": "+1 (555) 987-6543",
   "companies": ["Tech Innovators Inc.", "Software Solutions Ltd."],
-  "skills": {
-    "python": 95,
-    "javascript": 92,
-    "react": 90,
-    "node.js": 88,
-    "aws": 93,
-    "docker": 89,
-    "kubernetes": 87,
-    "microservices_architecture": 91
-  },
+  "skills": [
+    {"name": "python", "score": 95},
+    {"name": "javascript", "score": 92},
+    {"name": "react", "score": 90},
+    {"name": "node.js", "score": 88},
+    {"name": "aws", "score": 93},
+    {"name": "docker", "score": 89},
+    {"name": "kubernetes", "score": 87},
+    {"name": "microservices_architecture", "score": 91}
+  ],
   "comment": "Exceptional senior software engineer with outstanding technical skills and leadership abilities. Demonstrates excellent alignment with company values, particularly in teamwork, smart work, and continuous learning. Proven track record of delivering high-impact projects, mentoring others, and driving innovation. An ideal candidate who would be a valuable asset to any development team."
 }
 ```
 
 Now, evaluate the given CV and the following skills:
 
+""",
+
+      "MISSING_FIELDS": """
+A previous analysis of the curriculum vitae below did not return some of the requested fields.
+Extract ONLY the following fields from the curriculum: {fields}.
+
+Follow the same rules as before: use lowercase skill names without spaces (underscores if needed), score skills from 0 to 100 with very high standards, and leave a field empty if the information is really not present in the curriculum.
+Reply ONLY with the JSON object containing those fields, nothing else.
 """
 
 }
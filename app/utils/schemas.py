@@ -0,0 +1,58 @@
+from typing import Dict, Any, List, Optional
+
+# Output fields of the FIELDS_AND_SCORE extraction, in generation order. The comment goes
+# last so that a truncated completion loses the least important field first.
+CV_FIELD_SCHEMAS = {
+    "name": {"type": "string"},
+    "email": {"type": "string"},
+    "country": {"type": "string"},
+    "phone": {"type": "string"},
+    "companies": {
+        "type": "array",
+        "items": {"type": "string"},
+    },
+    "skills": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "score": {"type": "integer"},
+            },
+            "required": ["name", "score"],
+            "additionalProperties": False,
+        },
+    },
+    "comment": {"type": "string"},
+}
+
+REQUIRED_CV_FIELDS = ["name", "skills"]
+
+# Extracted locally first (see contact_extraction); a CV is stored even when they stay empty
+CONTACT_FIELDS = ["email", "phone", "country"]
+
+
+def cv_fields_response_format(fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Build a strict json_schema response_format for the CV extraction.
+
+    Args:
+        fields (Optional[List[str]]): Subset of CV_FIELD_SCHEMAS to request, all of them by default
+
+    Returns:
+        Dict[str, Any]: The response_format argument for chat.completions.create
+    """
+    fields = fields or list(CV_FIELD_SCHEMAS)
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "cv_fields",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {field: CV_FIELD_SCHEMAS[field] for field in fields},
+                "required": fields,
+                "additionalProperties": False,
+            },
+        },
+    }
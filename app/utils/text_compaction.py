@@ -0,0 +1,163 @@
+import re
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+
+from app.utils.metrics import logger
+from app.utils.pdf_conversion import PAGE_SEPARATOR
+
+# Encoding used by gpt-4o / gpt-4o-mini
+TOKEN_ENCODING = "o200k_base"
+
+# Lines shorter than this are never treated as repeated headers/footers
+# (bullets, single words like "Skills" legitimately repeat)
+MIN_REPEATED_LINE_LENGTH = 4
+
+# How many lines at the top and bottom of each page are candidate headers/footers
+HEADER_FOOTER_LINES = 3
+
+BOILERPLATE_PATTERNS = [
+    # Page numbering
+    re.compile(r"^\s*(page|p[aá]gina)\s*\d+\s*((of|de)\s*\d+)?\s*$", re.IGNORECASE),
+    re.compile(r"^\s*\d+\s*/\s*\d+\s*$"),
+    # Document titles
+    re.compile(r"^\s*(curriculum\s+vitae|resume|résumé|cv)\s*$", re.IGNORECASE),
+    # Reference and data protection clauses
+    re.compile(r"^\s*references?\s+(are\s+)?available\s+(up)?on\s+request\.?\s*$", re.IGNORECASE),
+    re.compile(r"^.*(processing|process)\s+of\s+my\s+personal\s+data.*$", re.IGNORECASE),
+    re.compile(r"^.*tratamiento\s+de\s+(mis\s+)?datos\s+personales.*$", re.IGNORECASE),
+]
+
+# Parts of hyphenated compounds common in CVs ("full-stack", "front-end", "data-driven"); a line
+# break at their hyphen keeps the hyphen instead of joining the pieces
+COMPOUND_PREFIXES = {
+    "full", "front", "back", "self", "cross", "multi", "non", "co", "real", "part", "open", "e", "high",
+    "low", "end", "team", "user", "client", "server", "hands", "long", "short", "well", "object", "problem",
+    "decision", "mid", "senior", "junior",
+}
+COMPOUND_SUFFIXES = {"driven", "oriented", "based", "solving", "making", "facing", "side", "level"}
+
+_LETTERS = "A-Za-záéíóúñüÁÉÍÓÚÑÜ"
+_HYPHENATED_PATTERN = re.compile(rf"(?<![{_LETTERS}-])([{_LETTERS}]+)-\n([a-záéíóúñü][{_LETTERS}]*)")
+
+# Rough chars-per-token ratio used when the tiktoken encoding cannot be loaded
+FALLBACK_CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_unavailable = False
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens locally with the same encoding the extraction model uses."""
+    global _encoding, _encoding_unavailable
+    if _encoding is None and not _encoding_unavailable:
+        try:
+            # Imported here: tiktoken is slow to import and only needed once text arrives
+            import tiktoken
+            _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+        except Exception as e:
+            # tiktoken fetches encodings on first use; estimate instead of failing offline
+            logger.warning("Token encoding unavailable, estimating token counts: %s", e)
+            _encoding_unavailable = True
+    if _encoding is None:
+        return -(-len(text) // FALLBACK_CHARS_PER_TOKEN)
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse whitespace runs, strip lines and drop consecutive blank lines."""
+    text = text.replace("\u00a0", " ").replace("\u200b", "")
+    lines = [re.sub(r"[ \t\r\v]+", " ", line).strip() for line in text.split("\n")]
+
+    normalized = []
+    for line in lines:
+        if not line and (not normalized or not normalized[-1]):
+            continue
+        normalized.append(line)
+    return "\n".join(normalized).strip()
+
+
+def join_hyphenated(text: str) -> str:
+    """
+    Join words split across lines by hyphenation (e.g. "develop-\\nment"). Compounds broken at
+    their own hyphen ("full-\\nstack") keep it: when the hyphenated form appears elsewhere in the
+    text, or a piece is a known compound part and the joined word does not appear.
+    """
+    lowered = text.lower()
+
+    def rejoin(match: re.Match) -> str:
+        left, right = match.group(1), match.group(2)
+        hyphenated, joined = f"{left}-{right}".lower(), f"{left}{right}".lower()
+        if hyphenated in lowered:
+            return f"{left}-{right}"
+        if joined not in lowered and (left.lower() in COMPOUND_PREFIXES or right.lower() in COMPOUND_SUFFIXES):
+            return f"{left}-{right}"
+        return left + right
+
+    return _HYPHENATED_PATTERN.sub(rejoin, text)
+
+
+def remove_repeated_lines(pages: List[str]) -> List[str]:
+    """Remove header/footer lines repeated at the top or bottom of several pages."""
+    if len(pages) < 2:
+        return pages
+
+    page_counts = Counter()
+    for page in pages:
+        lines = page.split("\n")
+        edges = lines[:HEADER_FOOTER_LINES] + lines[-HEADER_FOOTER_LINES:]
+        page_counts.update({line for line in edges if len(line) >= MIN_REPEATED_LINE_LENGTH})
+
+    repeated = {line for line, count in page_counts.items() if count > 1}
+    if not repeated:
+        return pages
+
+    # Keep the first occurrence so a repeated name/contact header is not lost entirely
+    seen = set()
+    compacted_pages = []
+    for page in pages:
+        lines = page.split("\n")
+        kept = []
+        for i, line in enumerate(lines):
+            is_edge = i < HEADER_FOOTER_LINES or i >= len(lines) - HEADER_FOOTER_LINES
+            if is_edge and line in repeated:
+                if line in seen:
+                    continue
+                seen.add(line)
+            kept.append(line)
+        compacted_pages.append("\n".join(kept))
+    return compacted_pages
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drop lines matching known CV boilerplate (page numbers, titles, legal clauses)."""
+    return "\n".join(
+        line for line in text.split("\n")
+        if not any(pattern.match(line) for pattern in BOILERPLATE_PATTERNS)
+    )
+
+
+def compact_cv_text(text: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Compact raw CV text before sending it to the LLM.
+
+    Args:
+        text (str): Raw text as produced by pdf_conversion (pages separated by PAGE_SEPARATOR)
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: Compacted text and token accounting for the CV
+    """
+    pages = [normalize_whitespace(join_hyphenated(page)) for page in text.split(PAGE_SEPARATOR)]
+    pages = remove_repeated_lines(pages)
+    compacted = normalize_whitespace(strip_boilerplate("\n\n".join(pages)))
+
+    tokens_before = count_tokens(text)
+    tokens_after = count_tokens(compacted)
+    stats = {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "savings_ratio": round((tokens_before - tokens_after) / tokens_before, 4) if tokens_before else 0.0,
+        "chars_before": len(text),
+        "chars_after": len(compacted),
+    }
+    return compacted, stats
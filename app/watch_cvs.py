@@ -0,0 +1,29 @@
+import asyncio
+import logging
+import os
+
+from app.config import LOG_LEVEL, WATCH_DEBOUNCE_SECONDS, WATCH_CONCURRENCY
+from app.create_db import process_single_cv_to_db, run_dead_letter_worker
+from app.services.cv_watcher import CVWatcher
+
+
+async def watch_cvs():
+    """Ingest CVs as they land in data/cv_storage, and keep retrying the dead-lettered ones."""
+    # Get the project root directory
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cv_directory = os.path.join(project_root, "data", "cv_storage")
+    # Kept outside cv_storage so writing it never triggers the watcher
+    cursor_path = os.path.join(project_root, "data", "cv_watch_cursor.json")
+
+    watcher = CVWatcher(cv_directory, cursor_path, process_single_cv_to_db,
+                        debounce=WATCH_DEBOUNCE_SECONDS, concurrency=WATCH_CONCURRENCY)
+    print("Watching data/cv_storage for new CVs (Ctrl+C to stop)")
+    await asyncio.gather(watcher.run(), run_dead_letter_worker(cv_directory))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=LOG_LEVEL)
+    try:
+        asyncio.run(watch_cvs())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,67 @@
+"""
+Compare two benchmark result files (e.g. main vs a feature branch).
+
+Usage:
+    python -m benchmarks.compare base.json head.json [--threshold 10]
+
+Prints the change in p50/p95 latency and peak memory per benchmark and exits with
+status 1 when any p95 latency regressed by more than the threshold percentage.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Any, Optional
+
+
+def _change(base: Optional[float], head: Optional[float]) -> Optional[float]:
+    if base is None or head is None or base == 0:
+        return None
+    return (head - base) / base * 100
+
+
+def _format(base: Optional[float], head: Optional[float]) -> str:
+    change = _change(base, head)
+    if change is None:
+        return f"{'-':>28}"
+    return f"{base:>10.2f} → {head:>10.2f} {change:>+6.1f}%"
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float) -> bool:
+    """Print the comparison table; returns False if a p95 regression exceeds the threshold."""
+    print(f"base: {base['meta']['git'].get('branch')} {base['meta']['git'].get('commit', '')[:8]}"
+          f"   head: {head['meta']['git'].get('branch')} {head['meta']['git'].get('commit', '')[:8]}")
+    print(f"{'benchmark':<26} {'p50 ms':>28} {'p95 ms':>28} {'peak KB':>28}")
+
+    ok = True
+    for name in dict.fromkeys(list(base["results"]) + list(head["results"])):
+        base_result = base["results"].get(name, {})
+        head_result = head["results"].get(name, {})
+        if base_result.get("status") != "ok" or head_result.get("status") != "ok":
+            print(f"{name:<26} not comparable (base: {base_result.get('status', 'missing')}, "
+                  f"head: {head_result.get('status', 'missing')})")
+            continue
+
+        base_latency, head_latency = base_result["latency_ms"], head_result["latency_ms"]
+        print(f"{name:<26} {_format(base_latency['p50'], head_latency['p50'])} "
+              f"{_format(base_latency['p95'], head_latency['p95'])} "
+              f"{_format(base_result['peak_memory_kb'], head_result['peak_memory_kb'])}")
+
+        p95_change = _change(base_latency["p95"], head_latency["p95"])
+        if p95_change is not None and p95_change > threshold:
+            ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed p95 regression in percent")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base_report = json.load(f)
+    with open(args.head) as f:
+        head_report = json.load(f)
+
+    sys.exit(0 if compare(base_report, head_report, args.threshold) else 1)
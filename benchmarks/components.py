@@ -0,0 +1,293 @@
+"""
+Component micro-benchmarks over a synthetic CV corpus.
+
+Usage:
+    python -m benchmarks.components --cvs 50 --output results.json
+    python -m benchmarks.compare base.json head.json
+
+Benchmarks file_path_to_text, DatabaseService.store_cv_data, QueryGenerator.execute_query,
+SkillMatrix.top_n, the RAG index build and CVRagSystem.smart_query_cv_database for latency
+and peak Python memory. The RAG stages run once per document mode and report the node
+count and embedded tokens of the index. LLM and embedding calls go to the local fakes in benchmarks.fakes; the database
+stages need the Postgres from docker-compose and are reported as skipped without it.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import uuid
+from typing import Dict, Any, List, Callable, Awaitable
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fakes import FakeEmbedding, fake_cv_extraction, CANNED_SQL
+from app.utils.pdf_conversion import file_path_to_text
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SQL_QUERIES = [
+    CANNED_SQL["sql"],
+    "SELECT id, name, email, country, candidate_skills, candidate_companies FROM cv_aggregated "
+    "WHERE skills @> ARRAY['docker', 'aws']::varchar[] AND country ILIKE '%spain%' "
+    "ORDER BY candidate_skills DESC LIMIT 10;",
+    "SELECT id, name, email, country, candidate_skills, candidate_companies FROM cv_aggregated "
+    "WHERE EXISTS (SELECT 1 FROM unnest(companies) company WHERE company ILIKE '%vaughan%') "
+    "ORDER BY candidate_skills DESC LIMIT 10;",
+]
+
+SKILL_FILTERS = [
+    ({"python": 1.0}, {"python": 70}),
+    ({"docker": 1.0, "aws": 0.5}, {"docker": 50}),
+    ({"react": 1.0, "typescript": 1.0, "jest": 0.5}, {}),
+]
+
+# RAG document modes (app.services.rag_service.build_cv_documents)
+DOCUMENT_MODES = ["full", "sections", "summary"]
+
+SEARCH_QUERIES = [
+    "Someone who has experience with Vue",
+    "Someone with experience in DDD",
+    "Someone who has worked in Vaughan Systems",
+    "The person with the most machine learning skill",
+    "Someone with storybook experience",
+    "Has worked in Venezuela",
+    "Has worked in Poland",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(timings_ms: List[float]) -> Dict[str, float]:
+    return {
+        "mean": round(statistics.mean(timings_ms), 3),
+        "p50": round(percentile(timings_ms, 50), 3),
+        "p95": round(percentile(timings_ms, 95), 3),
+        "p99": round(percentile(timings_ms, 99), 3),
+        "max": round(max(timings_ms), 3),
+        "total": round(sum(timings_ms), 3),
+    }
+
+
+async def measure(items: List[Any], fn: Callable[[Any], Awaitable[Any]],
+                  memory_items: List[Any] = None) -> Dict[str, Any]:
+    """
+    Time fn over every item, then re-run it under tracemalloc for the peak allocation.
+
+    The two passes are separate so tracemalloc overhead never shows up in the latencies.
+    """
+    timings_ms = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for item in items:
+            start = time.perf_counter()
+            await fn(item)
+            timings_ms.append((time.perf_counter() - start) * 1000)
+
+        tracemalloc.start()
+        try:
+            for item in (memory_items if memory_items is not None else items):
+                await fn(item)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "status": "ok",
+        "iterations": len(items),
+        "latency_ms": summarize(timings_ms),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def extraction_for(profile: Dict[str, Any], cv_text: str, filename: str) -> Dict[str, Any]:
+    """What extract_fields_user_v1 would return for a synthetic CV."""
+    extracted = fake_cv_extraction(cv_text)
+    extracted["skills"] = {skill["name"]: skill["score"] for skill in extracted["skills"]}
+    extracted.update({"cv_text": cv_text, "filename": filename})
+    return extracted
+
+
+async def bench_file_path_to_text(files: List[str]) -> Dict[str, Any]:
+    async def run(file_path):
+        file_path_to_text(file_path)
+    return await measure(files, run)
+
+
+async def bench_database(texts: Dict[str, str], profiles: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """store_cv_data and execute_query share a database; rows are removed afterwards."""
+    from app.services.db_service import DatabaseService
+    from app.services.query_generator import QueryGenerator
+
+    try:
+        db_service = DatabaseService()
+    except Exception as e:
+        skipped = {"status": "skipped", "reason": f"Database unavailable: {str(e).strip()}"}
+        return {"store_cv_data": skipped, "execute_query": skipped}
+
+    prefix = f"bench_{uuid.uuid4().hex[:8]}_"
+    results = {}
+    try:
+        # The memory pass inserts the CVs again, so every insert gets its own filename
+        sequence = itertools.count()
+
+        async def store(profile):
+            filename = f"{prefix}{next(sequence)}_{profile['filename']}"
+            await db_service.store_cv_data(extraction_for(profile, texts[profile["filename"]], filename))
+
+        results["store_cv_data"] = await measure(profiles, store, memory_items=profiles[:max(1, len(profiles) // 5)])
+
+        with db_service.conn.cursor() as cur:
+            cur.execute("REFRESH MATERIALIZED VIEW cv_aggregated")
+        db_service.conn.commit()
+
+        generator = QueryGenerator()
+
+        async def execute(sql):
+            await generator.execute_query(sql)
+        results["execute_query"] = await measure(SQL_QUERIES * 5, execute, memory_items=SQL_QUERIES)
+    except Exception as e:
+        db_service.conn.rollback()
+        for name in ("store_cv_data", "execute_query"):
+            results.setdefault(name, {"status": "error", "error": str(e)})
+    finally:
+        with db_service.conn.cursor() as cur:
+            cur.execute("DELETE FROM cv WHERE filename LIKE %s", (prefix + "%",))
+        db_service.conn.commit()
+    return results
+
+
+async def bench_skill_matrix(texts: Dict[str, str], profiles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from app.services.skill_matrix import SkillMatrix
+
+    matrix = SkillMatrix()
+    for cv_id, profile in enumerate(profiles, 1):
+        matrix.upsert_cv(cv_id, extraction_for(profile, texts[profile["filename"]], profile["filename"])["skills"])
+
+    async def rank(query):
+        weights, min_scores = query
+        matrix.top_n(weights, 10, min_scores)
+    return await measure(SKILL_FILTERS * 20, rank, memory_items=SKILL_FILTERS)
+
+
+async def bench_rag(texts: Dict[str, str], profiles: List[Dict[str, Any]],
+                    document_mode: str = "full") -> Dict[str, Dict[str, Any]]:
+    from llama_index.core import Settings
+    from llama_index.core.llms import MockLLM
+    from llama_index.core.schema import MetadataMode
+    from app.services.rag_service import CVRagSystem, build_cv_documents
+    from app.utils.text_compaction import count_tokens
+
+    documents = [
+        document
+        for cv_id, profile in enumerate(profiles, 1)
+        for document in build_cv_documents(extraction_for(profile, texts[profile["filename"]], profile["filename"]),
+                                           cv_id, profile["filename"], texts[profile["filename"]], document_mode)
+    ]
+
+    def new_rag_system():
+        rag_system = CVRagSystem(embed_model=FakeEmbedding(), document_mode=document_mode)
+        Settings.llm = MockLLM()
+        return rag_system
+
+    # "full" keeps the historic result names, so runs stay comparable with older ones
+    suffix = "" if document_mode == "full" else f"_{document_mode}"
+    results = {}
+    rag_system = None
+
+    async def build(_):
+        nonlocal rag_system
+        rag_system = new_rag_system()
+        rag_system.build_index(documents)
+
+    build_result = await measure([None], build)
+    nodes = list(rag_system.index.docstore.docs.values())
+    build_result.update({
+        "documents": len(documents),
+        "nodes": len(nodes),
+        "embedded_tokens": sum(count_tokens(node.get_content(metadata_mode=MetadataMode.EMBED)) for node in nodes),
+        # What the index keeps besides the vectors: docstore nodes, vector-store metadata and CV cards
+        "node_store_bytes": len(json.dumps(rag_system.storage_context.docstore.to_dict()))
+        + len(json.dumps(rag_system.storage_context.vector_store.data.metadata_dict))
+        + len(json.dumps([card.to_dict() for card in rag_system.cards.values()])),
+    })
+    results[f"rag_index_build{suffix}"] = build_result
+
+    async def search(query):
+        await rag_system.smart_query_cv_database(query, top_k=3)
+    results[f"smart_query_cv_database{suffix}"] = await measure(SEARCH_QUERIES * 3, search, memory_items=SEARCH_QUERIES)
+    return results
+
+
+def git_revision() -> Dict[str, str]:
+    def git(*args):
+        try:
+            return subprocess.check_output(["git", *args], cwd=PROJECT_ROOT, text=True,
+                                           stderr=subprocess.DEVNULL).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+    return {"commit": git("rev-parse", "HEAD"), "branch": git("rev-parse", "--abbrev-ref", "HEAD")}
+
+
+async def run(cv_count: int, seed: int, corpus_dir: str = None) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus_dir = corpus_dir or temp_dir
+        profiles = generate_corpus(corpus_dir, cv_count, seed)
+        files = [os.path.join(corpus_dir, profile["filename"]) for profile in profiles]
+        with contextlib.redirect_stdout(io.StringIO()):
+            texts = {profile["filename"]: file_path_to_text(path) for profile, path in zip(profiles, files)}
+
+        results = {"file_path_to_text": await bench_file_path_to_text(files)}
+        results.update(await bench_database(texts, profiles))
+        results["skill_matrix_top_n"] = await bench_skill_matrix(texts, profiles)
+        for document_mode in DOCUMENT_MODES:
+            suffix = "" if document_mode == "full" else f"_{document_mode}"
+            try:
+                results.update(await bench_rag(texts, profiles, document_mode))
+            except Exception as e:
+                for name in ("rag_index_build", "smart_query_cv_database"):
+                    results.setdefault(name + suffix, {"status": "error", "error": str(e)})
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cvs": cv_count,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cvs", type=int, default=50, help="Number of synthetic CVs to generate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--corpus-dir", help="Keep the generated corpus in this directory")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.cvs, args.seed, args.corpus_dir))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    for name, result in report["results"].items():
+        if result["status"] == "ok":
+            latency = result["latency_ms"]
+            print(f"{name:<26} p50 {latency['p50']:>10.3f} ms   p95 {latency['p95']:>10.3f} ms   "
+                  f"peak {result['peak_memory_kb']} KB")
+        else:
+            print(f"{name:<26} {result['status']}: {result.get('reason') or result.get('error')}")
@@ -0,0 +1,118 @@
+"""
+Benchmark the local contact-field extraction that runs before the LLM call.
+
+Usage:
+    python -m benchmarks.contact_extraction --cvs 30 --output results.json
+    python -m benchmarks.contact_extraction --corpus data/cv_storage
+
+Runs extract_fields_user_v1 on every CV twice, with LOCAL_CONTACT_EXTRACTION off and on,
+against the fake chat model of benchmarks.fakes. The fake sleeps a fixed latency plus a
+per-token decoding time, so fewer generated tokens show up as lower latency. Reports
+completion tokens and latency per CV for both runs and, on the synthetic corpus, how
+often the local email, phone and country match the generated CV.
+"""
+import os
+
+# Every CV is extracted twice; cached completions would hide the second run
+os.environ["CACHE_BACKEND"] = "none"
+
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from typing import Dict, Any, List, Optional
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fakes import FakeOpenAIClient
+from app.services import file_info_extraction
+from app.utils.contact_extraction import extract_contact_fields
+from app.utils.pdf_conversion import file_path_to_text
+from app.utils.text_compaction import compact_cv_text
+
+
+async def extract_all(texts: List[str], local: bool, latency: float, seconds_per_token: float) -> Dict[str, Any]:
+    client = FakeOpenAIClient(latency, seconds_per_token)
+    file_info_extraction.client = client
+    file_info_extraction.LOCAL_CONTACT_EXTRACTION = local
+
+    completion_tokens, latencies, failures = [], [], 0
+    for text in texts:
+        start = time.perf_counter()
+        try:
+            result = await file_info_extraction.extract_fields_user_v1(text)
+        except Exception:
+            failures += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+        # The fake answers with exactly the requested fields, so the response is the whole completion
+        completion_tokens.append(file_info_extraction.count_tokens(result["response"]))
+
+    return {
+        "local_contact_extraction": local,
+        "cvs": len(texts),
+        "failures": failures,
+        "llm_calls": client.chat.completions.calls,
+        "completion_tokens_per_cv": round(statistics.mean(completion_tokens), 1) if completion_tokens else 0,
+        "median_ms_per_cv": round(statistics.median(latencies), 1) if latencies else 0,
+    }
+
+
+def local_accuracy(texts: List[str], profiles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Share of CVs whose local fields equal the generated values, and local extraction time."""
+    matches = {"email": 0, "phone": 0, "country": 0}
+    elapsed = []
+    for text, profile in zip(texts, profiles):
+        compacted, _ = compact_cv_text(text)
+        start = time.perf_counter()
+        fields = extract_contact_fields(compacted)
+        elapsed.append((time.perf_counter() - start) * 1000)
+        for field in matches:
+            matches[field] += fields.get(field) == profile[field]
+    return {
+        **{f"{field}_accuracy": round(count / len(texts), 4) for field, count in matches.items()},
+        "median_local_ms": round(statistics.median(elapsed), 3),
+    }
+
+
+def run(texts: List[str], profiles: Optional[List[Dict[str, Any]]], latency: float,
+        seconds_per_token: float) -> Dict[str, Any]:
+    runs = [asyncio.run(extract_all(texts, local, latency, seconds_per_token)) for local in (False, True)]
+    baseline, local = runs
+    summary = {
+        "cvs": len(texts),
+        "completion_tokens_saved_per_cv": round(baseline["completion_tokens_per_cv"] - local["completion_tokens_per_cv"], 1),
+        "completion_tokens_saved_ratio": round(
+            1 - local["completion_tokens_per_cv"] / baseline["completion_tokens_per_cv"], 4
+        ) if baseline["completion_tokens_per_cv"] else 0.0,
+        "median_ms_saved_per_cv": round(baseline["median_ms_per_cv"] - local["median_ms_per_cv"], 1),
+    }
+    if profiles:
+        summary.update(local_accuracy(texts, profiles))
+    return {"benchmark": "contact_extraction", "summary": summary, "runs": runs}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cvs", type=int, default=30, help="Synthetic corpus size")
+    parser.add_argument("--corpus", help="Use the CVs in this directory instead of a synthetic corpus")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake model latency per request (s)")
+    parser.add_argument("--ms-per-token", type=float, default=10.0, help="Fake model decoding time per completion token")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    if args.corpus:
+        files = sorted(os.path.join(args.corpus, f) for f in os.listdir(args.corpus) if f.endswith(('.pdf', '.txt', '.md')))
+        texts, profiles = [t for t in map(file_path_to_text, files) if t], None
+    else:
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            profiles = generate_corpus(corpus_dir, args.cvs, args.seed)
+            texts = [file_path_to_text(os.path.join(corpus_dir, p["filename"])) for p in profiles]
+
+    report = run(texts, profiles, args.latency, args.ms_per_token / 1000)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,169 @@
+"""
+Generate a synthetic CV corpus as PDF files.
+
+Usage:
+    python -m benchmarks.corpus 100 /tmp/cv_corpus [--seed 42]
+
+Each CV has a contact block, a summary, several jobs at real-sounding companies, a
+skills list and an education section, spread over one to three pages with a repeated
+header and page-numbered footer, like the PDFs recruiters actually receive.
+"""
+import argparse
+import os
+import random
+import unicodedata
+from typing import Dict, Any, List
+
+import pymupdf
+
+FIRST_NAMES = [
+    "Ana", "Carlos", "Lucía", "Javier", "María", "David", "Elena", "Pablo", "Sofia", "Daniel",
+    "Laura", "Miguel", "Paula", "Alejandro", "Carmen", "Jorge", "Marta", "Andrés", "Irene", "Sergio",
+    "Emily", "James", "Olivia", "Liam", "Chloe", "Noah", "Anna", "Piotr", "Katarzyna", "Tomasz",
+]
+LAST_NAMES = [
+    "García", "Fernández", "López", "Martínez", "Sánchez", "Pérez", "Gómez", "Martín", "Jiménez", "Ruiz",
+    "Hernández", "Díaz", "Moreno", "Álvarez", "Romero", "Smith", "Johnson", "Brown", "Kowalski", "Nowak",
+]
+COUNTRIES = ["Spain", "Venezuela", "Poland", "Argentina", "Mexico", "Colombia", "United Kingdom", "Portugal"]
+PHONE_PREFIXES = {"Spain": "+34", "Venezuela": "+58", "Poland": "+48", "Argentina": "+54", "Mexico": "+52",
+                  "Colombia": "+57", "United Kingdom": "+44", "Portugal": "+351"}
+COMPANIES = [
+    "Vaughan Systems", "Accenture", "Indra", "Telefónica", "BBVA", "Santander", "Everis", "Capgemini",
+    "Deloitte", "Glovo", "Cabify", "Wallapop", "Idealista", "Amadeus", "Inditex", "Mercadona Tech",
+    "Allegro", "CD Projekt", "Globant", "Mercado Libre", "Google", "Amazon", "Microsoft", "IBM",
+]
+ROLES = [
+    "Software Engineer", "Senior Software Engineer", "Frontend Developer", "Backend Developer",
+    "Full Stack Developer", "DevOps Engineer", "Data Engineer", "Machine Learning Engineer",
+    "Mobile Developer", "Tech Lead", "QA Engineer",
+]
+SKILLS = [
+    "python", "java", "javascript", "typescript", "react", "vue", "angular", "node", "django", "flask",
+    "spring", "c#", "dotnet", "go", "rust", "kotlin", "android", "ios", "docker", "kubernetes", "aws",
+    "azure", "gcp", "terraform", "postgresql", "mysql", "mongodb", "redis", "kafka", "graphql",
+    "machine_learning", "pytorch", "tensorflow", "pandas", "spark", "storybook", "jest", "cypress",
+    "ddd", "microservices", "devops", "git", "linux", "html", "css", "sass", "webpack",
+]
+DEGREES = [
+    "B.S. in Computer Science", "M.S. in Software Engineering", "B.S. in Telecommunications Engineering",
+    "M.S. in Data Science", "B.A. in Mathematics",
+]
+UNIVERSITIES = [
+    "Universidad Politécnica de Madrid", "Universitat de Barcelona", "Universidad de Sevilla",
+    "Universidad Central de Venezuela", "Warsaw University of Technology", "University of Manchester",
+]
+ACHIEVEMENTS = [
+    "Designed and maintained services handling {n}k requests per minute using {skill}",
+    "Led the migration of a legacy monolith to {skill}, cutting deployment time by {n}%",
+    "Built internal tooling with {skill} adopted by {n} teams",
+    "Mentored {n} junior developers and ran weekly {skill} knowledge-sharing sessions",
+    "Reduced infrastructure costs by {n}% through {skill} optimisation",
+    "Implemented end-to-end test suites with {skill}, raising coverage to {n}%",
+]
+
+PAGE_WIDTH, PAGE_HEIGHT = pymupdf.paper_size("a4")
+MARGIN = 50
+LINE_HEIGHT = 14
+# Fewer lines than fit on A4 so most CVs span several pages
+LINES_PER_PAGE = 32
+
+
+def _ascii(value: str) -> str:
+    return unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode().lower()
+
+
+def generate_profile(rng: random.Random, index: int) -> Dict[str, Any]:
+    """Random but plausible CV content; the same seed and index always give the same CV."""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    country = rng.choice(COUNTRIES)
+    skills = rng.sample(SKILLS, rng.randint(5, 14))
+    jobs = []
+    year = 2024
+    for _ in range(rng.randint(1, 5)):
+        years = rng.randint(1, 4)
+        jobs.append({
+            "company": rng.choice(COMPANIES),
+            "role": rng.choice(ROLES),
+            "start": year - years,
+            "end": year,
+            "achievements": [
+                rng.choice(ACHIEVEMENTS).format(n=rng.randint(2, 90), skill=rng.choice(skills))
+                for _ in range(rng.randint(2, 5))
+            ],
+        })
+        year -= years
+    return {
+        "name": f"{first} {last}",
+        "email": f"{_ascii(first)}.{_ascii(last)}{index}@example.com",
+        "phone": f"{PHONE_PREFIXES[country]} {rng.randint(600, 699)} {rng.randint(100, 999)} {rng.randint(100, 999)}",
+        "country": country,
+        "skills": skills,
+        "jobs": jobs,
+        "education": {"degree": rng.choice(DEGREES), "university": rng.choice(UNIVERSITIES), "year": year},
+    }
+
+
+def profile_to_lines(profile: Dict[str, Any]) -> List[str]:
+    lines = [
+        profile["name"],
+        f"Email: {profile['email']}",
+        f"Phone: {profile['phone']}",
+        f"Country: {profile['country']}",
+        "",
+        "Summary:",
+        f"Software professional with {2024 - profile['jobs'][-1]['start']} years of experience in "
+        f"{', '.join(profile['skills'][:3])}.",
+        "",
+        "Experience:",
+    ]
+    for job in profile["jobs"]:
+        lines.append(f"{job['role']}, {job['company']} ({job['start']}-{job['end']})")
+        lines.extend(f"- {achievement}" for achievement in job["achievements"])
+        lines.append("")
+    lines.append(f"Skills: {', '.join(profile['skills'])}")
+    lines.append("")
+    lines.append("Education:")
+    education = profile["education"]
+    lines.append(f"{education['degree']}, {education['university']} ({education['year']})")
+    lines.append("")
+    lines.append("References available upon request")
+    return lines
+
+
+def write_cv_pdf(profile: Dict[str, Any], file_path: str) -> None:
+    """Render a profile to a PDF with a repeated header and numbered footer on every page."""
+    lines = profile_to_lines(profile)
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+    doc = pymupdf.open()
+    for page_number, page_lines in enumerate(pages, 1):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        page.insert_text((MARGIN, MARGIN), f"{profile['name']} - Curriculum Vitae", fontsize=9)
+        page.insert_text((MARGIN, MARGIN + 2 * LINE_HEIGHT), "\n".join(page_lines), fontsize=10)
+        page.insert_text((MARGIN, PAGE_HEIGHT - MARGIN), f"Page {page_number} of {len(pages)}", fontsize=9)
+    doc.save(file_path)
+    doc.close()
+
+
+def generate_corpus(directory: str, count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Write `count` synthetic CV PDFs into `directory` and return their profiles."""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    profiles = []
+    for index in range(count):
+        profile = generate_profile(rng, index)
+        profile["filename"] = f"synthetic_cv_{index:05d}.pdf"
+        write_cv_pdf(profile, os.path.join(directory, profile["filename"]))
+        profiles.append(profile)
+    return profiles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("count", type=int)
+    parser.add_argument("directory")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate_corpus(args.directory, args.count, args.seed)
+    print(f"Wrote {args.count} synthetic CVs to {args.directory}")
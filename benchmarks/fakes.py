@@ -0,0 +1,123 @@
+"""
+Local stand-ins for the OpenAI chat and embedding backends.
+
+The fake chat model answers the CV extraction prompt by reading the synthetic CVs from
+benchmarks.corpus back out of the text, and the SQL generation prompt with a canned
+query, so every pipeline stage runs end to end without network access or API costs.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import re
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+
+from app.utils.text_compaction import count_tokens
+
+CANNED_SQL = {
+    "sql": "SELECT id, name, email, country, candidate_skills, candidate_companies "
+           "FROM cv_aggregated WHERE skills @> ARRAY['python']::varchar[] "
+           "ORDER BY candidate_skills DESC LIMIT 10;",
+    "explanation": "Candidates with python experience",
+}
+
+
+def _stable_hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+def _find(pattern: str, text: str) -> str:
+    match = re.search(pattern, text, re.MULTILINE)
+    return match.group(1).strip() if match else ""
+
+
+def fake_cv_extraction(cv_text: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Extract the fields of a synthetic CV the way the real model would answer."""
+    lines = [line.strip() for line in cv_text.split("\n") if line.strip()]
+    skills_line = _find(r"^Skills:\s*(.+)$", cv_text)
+    skills = [skill.strip() for skill in skills_line.split(",") if skill.strip()]
+    result = {
+        "name": next((line for line in lines if "Curriculum Vitae" not in line), ""),
+        "email": _find(r"([\w.+-]+@[\w-]+\.[\w.-]+)", cv_text),
+        "country": _find(r"^Country:\s*(.+)$", cv_text),
+        "phone": _find(r"^Phone:\s*(.+)$", cv_text),
+        "companies": list(dict.fromkeys(re.findall(r"^[^,\n]+,\s*(.+?)\s*\(\d{4}-\d{4}\)$", cv_text, re.MULTILINE))),
+        "skills": [{"name": skill, "score": 30 + _stable_hash(skill + cv_text[:50]) % 70} for skill in skills],
+        "comment": "Synthetic candidate generated for benchmarking.",
+    }
+    if fields:
+        result = {field: result[field] for field in fields}
+    return result
+
+
+def fake_chat_content(messages: List[Dict[str, str]], response_format: Optional[Dict[str, Any]] = None) -> str:
+    """Answer a chat completion request the way the app's prompts expect."""
+    system_prompt = messages[0]["content"]
+    user_text = messages[1]["content"] if len(messages) > 1 else ""
+
+    if "SQL query generator" in system_prompt:
+        return json.dumps(CANNED_SQL)
+
+    fields = None
+    if response_format and response_format.get("type") == "json_schema":
+        fields = list(response_format["json_schema"]["schema"]["properties"])
+    return json.dumps(fake_cv_extraction(user_text, fields))
+
+
+class FakeChatCompletions:
+    """latency per request plus seconds_per_token per generated token, like a real model decoding."""
+
+    def __init__(self, latency: float = 0.0, seconds_per_token: float = 0.0):
+        self.latency = latency
+        self.seconds_per_token = seconds_per_token
+        self.calls = 0
+
+    async def create(self, model: str, messages: List[Dict[str, str]], max_tokens: int = 1000,
+                     response_format: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+        self.calls += 1
+        content = fake_chat_content(messages, response_format)
+        prompt_tokens = sum(count_tokens(message["content"]) for message in messages)
+        completion_tokens = count_tokens(content)
+        if self.latency or self.seconds_per_token:
+            await asyncio.sleep(self.latency + completion_tokens * self.seconds_per_token)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  total_tokens=prompt_tokens + completion_tokens),
+        )
+
+
+class FakeOpenAIClient:
+    """Drop-in for the (async) `client` object in file_info_extraction."""
+
+    def __init__(self, latency: float = 0.0, seconds_per_token: float = 0.0):
+        self.chat = SimpleNamespace(completions=FakeChatCompletions(latency, seconds_per_token))
+
+
+def fake_embedding(text: str, dimensions: int = 1536) -> List[float]:
+    """Deterministic hashed bag-of-words vector, so similar texts get similar embeddings."""
+    vector = [0.0] * dimensions
+    for word in re.findall(r"\w+", text.lower()):
+        hashed = _stable_hash(word)
+        vector[hashed % dimensions] += 1.0 if (hashed >> 32) & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class FakeEmbedding(BaseEmbedding):
+    """llama_index embedding model backed by fake_embedding."""
+
+    dimensions: int = 1536
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return fake_embedding(query, self.dimensions)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return fake_embedding(query, self.dimensions)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return fake_embedding(text, self.dimensions)
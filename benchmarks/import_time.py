@@ -0,0 +1,94 @@
+"""
+Import-time budget for the API, to keep container cold starts fast.
+
+Usage:
+    python -m benchmarks.import_time --budget-ms 800 --runs 5
+
+Imports app.main in fresh interpreters, reports the median wall time and the slowest
+modules from `python -X importtime`, and exits non-zero when the median exceeds the
+budget or a module that must load lazily (openai, pymupdf, tiktoken, llama_index, nltk)
+is imported eagerly. Run it in CI on the same image the service ships in.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, Any, List
+
+# Not imported from benchmarks.components, which pulls in llama_index
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use or in the lifespan pre-warm, never while importing the app
+LAZY_MODULES = ["openai", "pymupdf", "tiktoken", "llama_index", "nltk"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "modules": sorted({name.split(".")[0] for name in sys.modules})}))
+"""
+
+
+def child_env() -> Dict[str, str]:
+    # The OpenAI key is only read at import time, never used
+    return {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "import-time-check")}
+
+
+def time_import() -> Dict[str, Any]:
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT], cwd=PROJECT_ROOT,
+                                     env=child_env(), text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_modules(limit: int) -> List[Dict[str, Any]]:
+    """Top-level modules by cumulative import time, from -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], cwd=PROJECT_ROOT,
+                            env=child_env(), capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Two spaces of indentation per nesting level; only report direct imports of app.main
+        if len(name) - len(name.lstrip()) <= 3:
+            modules.append({"module": name.strip(), "cumulative_ms": round(int(cumulative) / 1000, 1)})
+    modules.sort(key=lambda module: module["cumulative_ms"], reverse=True)
+    return modules[:limit]
+
+
+def run(runs: int, budget_ms: float, top: int) -> Dict[str, Any]:
+    samples = [time_import() for _ in range(runs)]
+    median_ms = statistics.median(sample["seconds"] for sample in samples) * 1000
+    eager = [name for name in LAZY_MODULES if any(name in sample["modules"] for sample in samples)]
+    return {
+        "runs": runs,
+        "median_ms": round(median_ms, 1),
+        "budget_ms": budget_ms,
+        "eager_modules": eager,
+        "slowest": slowest_modules(top),
+        "passed": median_ms <= budget_ms and not eager,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=800.0, help="Maximum median import time of app.main")
+    parser.add_argument("--top", type=int, default=10, help="How many of the slowest imports to report")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    report = run(args.runs, args.budget_ms, args.top)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    for module in report["slowest"]:
+        print(f"{module['module']:<40} {module['cumulative_ms']:>8.1f} ms")
+    print(f"\nimport app.main: {report['median_ms']} ms (median of {report['runs']}, budget {report['budget_ms']} ms)")
+    if report["eager_modules"]:
+        print(f"Imported eagerly, should load lazily: {', '.join(report['eager_modules'])}")
+    sys.exit(0 if report["passed"] else 1)
@@ -0,0 +1,271 @@
+"""
+End-to-end load test of the API against a local OpenAI stub.
+
+Usage:
+    python -m benchmarks.load_test --endpoint cv_processing --levels 1,2,4,8,16,32 \\
+        --requests-per-level 64 --stub-latency lognormal:0.8:0.4 --output load.json
+
+Starts benchmarks.openai_stub and the FastAPI app (uvicorn) on local ports, then drives
+/v1/cv_processing/ (synthetic CV uploads) and/or /v1/smart_search/search with a closed
+loop of N concurrent clients per level. Reports throughput, p50/p95/p99 latency and error
+rate per level, and the saturation point: the first level after which more concurrency
+stops buying throughput (or errors/latency exceed the limits). Smart search needs the
+Postgres from docker-compose. Use --app-url to load an already running node instead.
+
+Both endpoints make interactive, hedged LLM calls. Each level also reports the stub's chat
+calls per request, so the p99 gained with --hedge-percentile / --hedge-budget can be weighed
+against the extra calls. --duplicates N sends every request N times in a row, so concurrent
+clients send bursts of identical requests; compare with --no-coalesce to see what request
+coalescing saves.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.components import SEARCH_QUERIES, percentile, PROJECT_ROOT
+from benchmarks.corpus import generate_corpus
+
+# A level saturates when it adds less than this much throughput over the best level so far
+MIN_THROUGHPUT_GAIN = 0.10
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Server did not come up: {url}")
+
+
+def start_servers(args) -> Tuple[List[subprocess.Popen], str, str]:
+    """Start the stub and the app as subprocesses; returns them and the app base URL."""
+    stub_port, app_port = free_port(), free_port()
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.openai_stub", "--port", str(stub_port),
+         "--latency", args.stub_latency, "--embedding-latency", args.stub_embedding_latency,
+         "--error-rate", str(args.stub_error_rate)] + (["--responses", args.stub_responses] if args.stub_responses else []),
+        cwd=PROJECT_ROOT,
+    )
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        # The stub has no account limits; only throttle the app if asked to
+        "OPENAI_REQUESTS_PER_MINUTE": str(args.openai_rpm),
+        "OPENAI_TOKENS_PER_MINUTE": str(args.openai_tpm),
+        # The same few CVs are uploaded over and over; with a cache every level would measure cache hits
+        "CACHE_BACKEND": args.cache_backend,
+        "CACHE_PATH": os.path.join(args.cache_dir, "clerk_cache.sqlite3"),
+        "WEB_CONCURRENCY": str(args.workers),
+        "HEDGE_PERCENTILE": str(args.hedge_percentile),
+        "HEDGE_BUDGET": str(args.hedge_budget),
+        "COALESCE_REQUESTS": "false" if args.no_coalesce else "true",
+    }
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(app_port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL,
+    )
+    processes = [stub, app]
+    try:
+        wait_until_up(f"http://127.0.0.1:{stub_port}/stats")
+        wait_until_up(f"http://127.0.0.1:{app_port}/health")
+    except TimeoutError:
+        stop_servers(processes)
+        raise
+    return processes, f"http://127.0.0.1:{app_port}", f"http://127.0.0.1:{stub_port}"
+
+
+def stop_servers(processes: List[subprocess.Popen]) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def build_requests(endpoint: str, pdfs: List[str], duplicates: int = 1) -> List[Dict[str, Any]]:
+    cv_requests = [{"endpoint": "cv_processing", "file": path} for path in pdfs]
+    search_requests = [{"endpoint": "smart_search", "question": question} for question in SEARCH_QUERIES]
+    if endpoint == "cv_processing":
+        requests = cv_requests
+    elif endpoint == "smart_search":
+        requests = search_requests
+    else:
+        # Mixed traffic: one upload per three searches
+        searches = itertools.cycle(search_requests)
+        requests = [item for cv_request in cv_requests for item in [cv_request] + [next(searches) for _ in range(3)]]
+    return [request for request in requests for _ in range(duplicates)]
+
+
+async def send(client: httpx.AsyncClient, request: Dict[str, Any], pdf_bytes: Dict[str, bytes]) -> int:
+    if request["endpoint"] == "cv_processing":
+        files = {"file": (os.path.basename(request["file"]), pdf_bytes[request["file"]], "application/pdf")}
+        response = await client.post("/v1/cv_processing/", files=files)
+    else:
+        response = await client.get("/v1/smart_search/search", params={"question": request["question"]})
+    return response.status_code
+
+
+async def stub_chat_calls(stub_url: Optional[str]) -> Optional[int]:
+    if not stub_url:
+        return None
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{stub_url}/stats")).json()["chat"]
+
+
+async def run_level(app_url: str, concurrency: int, total: int, requests: List[Dict[str, Any]],
+                    pdf_bytes: Dict[str, bytes], timeout: float, stub_url: Optional[str] = None) -> Dict[str, Any]:
+    """Closed loop: `concurrency` clients each send their next request as soon as the last one finishes."""
+    latencies = []
+    statuses: Dict[str, int] = {}
+    counter = iter(range(total))
+
+    async with httpx.AsyncClient(base_url=app_url, timeout=timeout,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def worker():
+            for index in counter:
+                start = time.perf_counter()
+                try:
+                    status = str(await send(client, requests[index % len(requests)], pdf_bytes))
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        chat_calls = await stub_chat_calls(stub_url)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        if chat_calls is not None:
+            chat_calls = await stub_chat_calls(stub_url) - chat_calls
+
+    ok = statuses.get("200", 0)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 3),
+        "error_rate": round(1 - ok / total, 4),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+        },
+        "statuses": statuses,
+        "llm_calls_per_request": round(chat_calls / total, 3) if chat_calls is not None else None,
+    }
+
+
+def find_saturation(levels: List[Dict[str, Any]], max_error_rate: float, max_p95_ms: Optional[float]) -> Dict[str, Any]:
+    """The highest level that still added throughput while staying inside the error and latency limits."""
+    best = None
+    for level in levels:
+        if level["error_rate"] > max_error_rate or (max_p95_ms and level["latency_ms"]["p95"] > max_p95_ms):
+            break
+        if best and level["throughput_rps"] < best["throughput_rps"] * (1 + MIN_THROUGHPUT_GAIN):
+            break
+        best = level
+    if best is None:
+        return {"concurrency": None, "throughput_rps": 0.0}
+    return {"concurrency": best["concurrency"], "throughput_rps": best["throughput_rps"],
+            "p95_ms": best["latency_ms"]["p95"]}
+
+
+async def load_test(args) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        profiles = generate_corpus(corpus_dir, args.cvs, args.seed)
+        pdfs = [os.path.join(corpus_dir, profile["filename"]) for profile in profiles]
+        pdf_bytes = {}
+        for path in pdfs:
+            with open(path, "rb") as f:
+                pdf_bytes[path] = f.read()
+
+        processes = []
+        app_url, stub_url = args.app_url, None
+        if not app_url:
+            args.cache_dir = corpus_dir
+            processes, app_url, stub_url = start_servers(args)
+        try:
+            requests = build_requests(args.endpoint, pdfs, args.duplicates)
+            levels = []
+            for concurrency in args.levels:
+                level = await run_level(app_url, concurrency, max(args.requests_per_level, concurrency),
+                                        requests, pdf_bytes, args.timeout, stub_url)
+                levels.append(level)
+                print(f"concurrency {concurrency:>4}: {level['throughput_rps']:>8.2f} req/s   "
+                      f"p50 {level['latency_ms']['p50']:>8.1f} ms   p95 {level['latency_ms']['p95']:>8.1f} ms   "
+                      f"p99 {level['latency_ms']['p99']:>8.1f} ms   errors {level['error_rate']:.1%}"
+                      + (f"   LLM calls/req {level['llm_calls_per_request']:.2f}" if stub_url else ""))
+        finally:
+            stop_servers(processes)
+
+    return {
+        "endpoint": args.endpoint,
+        "workers": args.workers,
+        "cache_backend": args.cache_backend,
+        "hedge": {"percentile": args.hedge_percentile, "budget": args.hedge_budget},
+        "duplicates": args.duplicates,
+        "coalesce": not args.no_coalesce,
+        "stub": {"latency": args.stub_latency, "embedding_latency": args.stub_embedding_latency,
+                 "error_rate": args.stub_error_rate},
+        "levels": levels,
+        "saturation": find_saturation(levels, args.max_error_rate, args.max_p95_ms),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", choices=["cv_processing", "smart_search", "mixed"], default="cv_processing")
+    parser.add_argument("--levels", type=lambda v: [int(x) for x in v.split(",")], default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--requests-per-level", type=int, default=64)
+    parser.add_argument("--cvs", type=int, default=20, help="Synthetic CVs to upload")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Client timeout per request in seconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--max-p95-ms", type=float, help="Latency SLO; levels above it count as saturated")
+    parser.add_argument("--stub-latency", default="lognormal:0.8:0.4")
+    parser.add_argument("--stub-embedding-latency", default="constant:0.05")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--stub-responses", help="JSON file with canned/recorded chat responses")
+    parser.add_argument("--openai-rpm", type=int, default=1_000_000, help="Limiter requests/min for the app")
+    parser.add_argument("--openai-tpm", type=int, default=1_000_000_000, help="Limiter tokens/min for the app")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes for the app")
+    parser.add_argument("--cache-backend", choices=["none", "memory", "sqlite"], default="none",
+                        help="App cache; sqlite shares one cache file between the workers")
+    parser.add_argument("--hedge-percentile", type=float, default=95, help="App HEDGE_PERCENTILE, 0 disables hedging")
+    parser.add_argument("--hedge-budget", type=float, default=0.05, help="App HEDGE_BUDGET")
+    parser.add_argument("--duplicates", type=int, default=1, help="Send each request this many times in a row")
+    parser.add_argument("--no-coalesce", action="store_true", help="Start the app with COALESCE_REQUESTS=false")
+    parser.add_argument("--app-url", help="Load an already running app instead of starting one")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(load_test(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    saturation = report["saturation"]
+    print(f"\nSaturation point: concurrency {saturation['concurrency']} "
+          f"at {saturation['throughput_rps']} req/s")
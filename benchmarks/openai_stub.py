@@ -0,0 +1,147 @@
+"""
+Local OpenAI-compatible stub server for chat completions and embeddings.
+
+Usage:
+    python -m benchmarks.openai_stub --port 8100 --latency lognormal:0.8:0.4 --error-rate 0.02
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8100/v1. Latency specs are
+in seconds: "constant:0.5", "uniform:0.2:1.5" or "lognormal:<median>:<sigma>", optionally
+followed by ":<stall probability>:<stall seconds>" for rare stalled responses. Chat
+answers come from a responses file when a rule matches (see --responses), otherwise
+from the synthetic-CV fakes in benchmarks.fakes, so nothing ever leaves the machine.
+
+A responses file is a JSON list of {"match": "<substring of any message>", "content": "..."},
+e.g. real completions recorded from production for a few representative CVs.
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import math
+import random
+import struct
+import time
+from typing import Dict, List, Callable
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.fakes import fake_chat_content, fake_embedding
+from app.utils.text_compaction import count_tokens
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Turn a latency spec into a sampler returning seconds."""
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "constant":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        # lognormal:median:sigma[:stall_probability:stall_seconds] adds rare stalled responses
+        median, sigma, stall_probability, stall_seconds = (values + [0.0, 0.0])[:4]
+        return lambda: random.lognormvariate(math.log(median), sigma) + (
+            stall_seconds if random.random() < stall_probability else 0.0)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def create_stub_app(latency: str = "constant:0", embedding_latency: str = "constant:0", error_rate: float = 0.0,
+                    error_status: int = 429, responses: List[Dict[str, str]] = None) -> FastAPI:
+    chat_latency = parse_latency(latency)
+    embed_latency = parse_latency(embedding_latency)
+    responses = responses or []
+    ids = itertools.count(1)
+    stats = {"chat": 0, "embeddings": 0, "errors": 0}
+
+    app = FastAPI()
+
+    def injected_error():
+        if error_rate and random.random() < error_rate:
+            stats["errors"] += 1
+            error_type = "rate_limit_error" if error_status == 429 else "server_error"
+            return JSONResponse(status_code=error_status,
+                                content={"error": {"message": "Injected stub error", "type": error_type}})
+        return None
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["chat"] += 1
+        await asyncio.sleep(chat_latency())
+        error = injected_error()
+        if error:
+            return error
+
+        messages = body["messages"]
+        all_text = "\n".join(message.get("content") or "" for message in messages)
+        content = next((rule["content"] for rule in responses if rule["match"] in all_text), None)
+        if content is None:
+            content = fake_chat_content(messages, body.get("response_format"))
+
+        prompt_tokens = count_tokens(all_text)
+        completion_tokens = count_tokens(content)
+        return {
+            "id": f"chatcmpl-stub-{next(ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        stats["embeddings"] += 1
+        await asyncio.sleep(embed_latency())
+        error = injected_error()
+        if error:
+            return error
+
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        dimensions = body.get("dimensions") or 1536
+        data = []
+        for index, text in enumerate(inputs):
+            vector = fake_embedding(str(text), dimensions)
+            if body.get("encoding_format") == "base64":
+                # The openai SDK asks for base64 float32 by default
+                vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode()
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+
+        tokens = sum(count_tokens(str(text)) for text in inputs)
+        return {"object": "list", "data": data, "model": body.get("model", "stub"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="constant:0", help="Chat completion latency distribution")
+    parser.add_argument("--embedding-latency", default="constant:0", help="Embedding latency distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--responses", help="JSON file with canned/recorded chat responses")
+    args = parser.parse_args()
+
+    canned = []
+    if args.responses:
+        with open(args.responses) as f:
+            canned = json.load(f)
+
+    stub_app = create_stub_app(args.latency, args.embedding_latency, args.error_rate, args.error_status, canned)
+    uvicorn.run(stub_app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,86 @@
+"""
+Benchmark CV text compaction over a sample corpus.
+
+Usage:
+    python -m benchmarks.text_compaction [corpus_dir] [--output results.json]
+
+Reports per-CV token savings, compaction overhead and whether contact fields
+(emails, phone numbers) survive compaction.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import time
+from typing import Dict, Any, List
+
+from app.utils.pdf_conversion import file_path_to_text
+from app.utils.text_compaction import compact_cv_text
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+
+
+def _digits(value: str) -> str:
+    return re.sub(r"\D", "", value)
+
+
+def benchmark_file(file_path: str) -> Dict[str, Any]:
+    """Compact one CV and check that its contact fields are preserved."""
+    raw_text = file_path_to_text(file_path)
+    if not raw_text:
+        return {"file": os.path.basename(file_path), "status": "error"}
+
+    start = time.perf_counter()
+    compacted, stats = compact_cv_text(raw_text)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    compacted_digits = _digits(compacted)
+    lost_emails = [e for e in set(EMAIL_PATTERN.findall(raw_text)) if e not in compacted]
+    lost_phones = [p for p in set(PHONE_PATTERN.findall(raw_text)) if _digits(p) not in compacted_digits]
+
+    return {
+        "file": os.path.basename(file_path),
+        "status": "success",
+        "compaction_ms": round(elapsed_ms, 3),
+        "lost_fields": lost_emails + lost_phones,
+        **stats,
+    }
+
+
+def run(corpus_dir: str) -> Dict[str, Any]:
+    files = sorted(
+        os.path.join(corpus_dir, f) for f in os.listdir(corpus_dir)
+        if f.endswith(('.pdf', '.txt', '.md'))
+    )
+    results: List[Dict[str, Any]] = [benchmark_file(f) for f in files]
+    ok = [r for r in results if r["status"] == "success"]
+
+    summary = {"files": len(results), "processed": len(ok)}
+    if ok:
+        tokens_before = sum(r["tokens_before"] for r in ok)
+        tokens_after = sum(r["tokens_after"] for r in ok)
+        summary.update({
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "savings_ratio": round((tokens_before - tokens_after) / tokens_before, 4) if tokens_before else 0.0,
+            "median_savings_ratio": statistics.median(r["savings_ratio"] for r in ok),
+            "median_compaction_ms": statistics.median(r["compaction_ms"] for r in ok),
+            "cvs_with_lost_fields": sum(1 for r in ok if r["lost_fields"]),
+        })
+    return {"benchmark": "text_compaction", "summary": summary, "results": results}
+
+
+if __name__ == "__main__":
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus_dir", nargs="?", default=os.path.join(project_root, "data", "cv_storage"))
+    parser.add_argument("--output", help="Write full JSON results to this file")
+    args = parser.parse_args()
+
+    report = run(args.corpus_dir)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report["summary"], indent=2))
@@ -0,0 +1,157 @@
+"""
+Benchmark two-stage reduced-dimension vector search against exact search.
+
+Usage:
+    python -m benchmarks.vector_search --nodes 5000 --output results.json
+    python -m benchmarks.vector_search --index data/rag_index
+
+For each coarse width and shortlist factor, reports recall@k against exact full-dimension
+search, median query latency and the size of the search matrices. The baseline is
+llama_index's SimpleVectorStore, which converts the stored embedding lists on every query.
+
+Without --index the vectors are synthetic: clustered, with energy decaying over the
+dimensions like the Matryoshka-trained text-embedding-3 models, so leading dimensions carry
+most of the signal. With --index, the vectors of an index saved by app.create_rag are used,
+and perturbed copies of stored vectors stand in for queries.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from typing import Dict, Any, List
+
+import numpy as np
+from llama_index.core.vector_stores import SimpleVectorStore
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from app.services.vector_store import TwoStageVectorStore
+
+COARSE_DIMENSIONS = [0, 64, 128, 256, 512]
+SHORTLIST_FACTORS = [5, 10, 20]
+
+
+def synthetic_embeddings(nodes: int, dimensions: int, seed: int) -> np.ndarray:
+    rng = np.random.RandomState(seed)
+    scale = 1.0 / np.sqrt(np.arange(1, dimensions + 1))
+    centers = rng.randn(max(1, nodes // 50), dimensions) * scale
+    vectors = centers[rng.randint(len(centers), size=nodes)] + 0.5 * rng.randn(nodes, dimensions) * scale
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def load_index_embeddings(index_dir: str) -> np.ndarray:
+    return TwoStageVectorStore.from_persist_dir(index_dir).matrix()
+
+
+def make_queries(vectors: np.ndarray, count: int, seed: int) -> np.ndarray:
+    """Perturbed copies of stored vectors, so every query has real near neighbours."""
+    rng = np.random.RandomState(seed + 1)
+    picked = vectors[rng.randint(len(vectors), size=count)]
+    # Same per-dimension spread as the vectors themselves: a query is about as far from its
+    # source as two CVs of the same cluster are from each other
+    noise = rng.randn(*picked.shape).astype(np.float32) * vectors.std(axis=0)
+    return picked + noise
+
+
+def fill_store(store: SimpleVectorStore, vectors: np.ndarray) -> None:
+    for i, vector in enumerate(vectors):
+        store.data.embedding_dict[f"node-{i}"] = vector.tolist()
+
+
+def time_queries(store: SimpleVectorStore, queries: np.ndarray, top_k: int) -> Dict[str, Any]:
+    latencies = []
+    results = []
+    store.query(VectorStoreQuery(query_embedding=queries[0].tolist(), similarity_top_k=top_k))  # build caches
+    for query in queries:
+        request = VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=top_k)
+        start = time.perf_counter()
+        result = store.query(request)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(result.ids)
+    return {"median_ms": round(statistics.median(latencies), 3), "ids": results}
+
+
+def recall(results: List[List[str]], exact: List[List[str]]) -> float:
+    return round(statistics.mean(len(set(r) & set(e)) / len(e) for r, e in zip(results, exact)), 4)
+
+
+def run(vectors: np.ndarray, queries: int, top_k: int, seed: int, baseline: bool) -> Dict[str, Any]:
+    query_vectors = make_queries(vectors, queries, seed)
+
+    exact_store = TwoStageVectorStore(coarse_dimensions=0)
+    fill_store(exact_store, vectors)
+    exact = time_queries(exact_store, query_vectors, top_k)
+    full_bytes = exact_store.memory_bytes()["full"]
+
+    runs = [{
+        "coarse_dimensions": 0,
+        "shortlist_factor": None,
+        "recall": 1.0,
+        "median_ms": exact["median_ms"],
+        "coarse_bytes": 0,
+    }]
+    for coarse_dimensions in COARSE_DIMENSIONS[1:]:
+        if coarse_dimensions >= vectors.shape[1]:
+            continue
+        for factor in SHORTLIST_FACTORS:
+            store = TwoStageVectorStore(coarse_dimensions=coarse_dimensions, shortlist_factor=factor)
+            fill_store(store, vectors)
+            timed = time_queries(store, query_vectors, top_k)
+            runs.append({
+                "coarse_dimensions": coarse_dimensions,
+                "shortlist_factor": factor,
+                "recall": recall(timed["ids"], exact["ids"]),
+                "median_ms": timed["median_ms"],
+                "coarse_bytes": store.memory_bytes()["coarse"],
+            })
+
+    summary = {
+        "nodes": len(vectors),
+        "dimensions": int(vectors.shape[1]),
+        "queries": queries,
+        "top_k": top_k,
+        "full_matrix_bytes": full_bytes,
+    }
+    if baseline:
+        store = SimpleVectorStore()
+        fill_store(store, vectors)
+        timed = time_queries(store, query_vectors[:max(1, queries // 10)], top_k)
+        summary["simple_vector_store_median_ms"] = timed["median_ms"]
+    return {"benchmark": "vector_search", "summary": summary, "runs": runs}
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    summary = report["summary"]
+    print(f"{summary['nodes']} nodes x {summary['dimensions']} dims, {summary['queries']} queries, top {summary['top_k']}")
+    print(f"full matrix: {summary['full_matrix_bytes'] / 1e6:.1f} MB")
+    if "simple_vector_store_median_ms" in summary:
+        print(f"SimpleVectorStore (baseline): {summary['simple_vector_store_median_ms']:.2f} ms")
+    print(f"\n{'coarse dims':>11} {'shortlist':>9} {'recall':>7} {'median ms':>10} {'coarse MB':>10}")
+    for run_ in report["runs"]:
+        label = run_["coarse_dimensions"] or "exact"
+        factor = f"x{run_['shortlist_factor']}" if run_["shortlist_factor"] else "-"
+        print(f"{label:>11} {factor:>9} {run_['recall']:>7.3f} {run_['median_ms']:>10.3f} {run_['coarse_bytes'] / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=5000, help="Synthetic corpus size")
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--index", help="Use the vectors of a persisted index instead of synthetic ones")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=20, help="Matches per query (smart queries ask for top_k * 2)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-baseline", action="store_true", help="Skip the slow SimpleVectorStore baseline")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    if args.index:
+        vectors = load_index_embeddings(os.path.abspath(args.index))
+    else:
+        vectors = synthetic_embeddings(args.nodes, args.dimensions, args.seed)
+    report = run(vectors, args.queries, args.top_k, args.seed, baseline=not args.no_baseline)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,23 @@
+-- Near-duplicate detection tables for databases created before they were added to init.sql
+
+CREATE TABLE IF NOT EXISTS cv_fingerprint (
+                                              cv_id INTEGER PRIMARY KEY REFERENCES cv(id) ON DELETE CASCADE,
+                                              minhash BYTEA NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS cv_fingerprint_band (
+                                                   band SMALLINT NOT NULL,
+                                                   bucket BIGINT NOT NULL,
+                                                   cv_id INTEGER REFERENCES cv(id) ON DELETE CASCADE,
+                                                   PRIMARY KEY (band, bucket, cv_id)
+);
+
+CREATE TABLE IF NOT EXISTS cv_duplicate (
+                                            filename VARCHAR(255) PRIMARY KEY,
+                                            cv_id INTEGER REFERENCES cv(id) ON DELETE CASCADE,
+                                            similarity REAL NOT NULL,
+                                            created_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_cv_fingerprint_band_cv_id ON cv_fingerprint_band(cv_id);
+CREATE INDEX IF NOT EXISTS idx_cv_duplicate_cv_id ON cv_duplicate(cv_id);
\ No newline at end of file
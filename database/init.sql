@@ -1,4 +1,15 @@
 -- Drop tables if they exist (for clean recreation)
+-- (the cv_aggregated view and the analytics rollups are recreated by the files applied after this one)
+DROP MATERIALIZED VIEW IF EXISTS cv_aggregated;
+DROP TABLE IF EXISTS cv_flat_pending;
+DROP TABLE IF EXISTS cv_flat;
+DROP TABLE IF EXISTS skill_score_histogram;
+DROP TABLE IF EXISTS skill_stats;
+DROP TABLE IF EXISTS company_stats;
+DROP TABLE IF EXISTS country_stats;
+DROP TABLE IF EXISTS cv_duplicate;
+DROP TABLE IF EXISTS cv_fingerprint_band;
+DROP TABLE IF EXISTS cv_fingerprint;
 DROP TABLE IF EXISTS cv_skill;
 DROP TABLE IF EXISTS cv_company;
 DROP TABLE IF EXISTS cv;
@@ -44,10 +55,34 @@ CREATE TABLE cv_company (
                             PRIMARY KEY (cv_id, company_id)
 );
 
+-- MinHash signature of each CV's text, for near-duplicate detection
+CREATE TABLE cv_fingerprint (
+                                cv_id INTEGER PRIMARY KEY REFERENCES cv(id) ON DELETE CASCADE,
+                                minhash BYTEA NOT NULL
+);
+
+-- LSH index: one row per (band, bucket) of each signature
+CREATE TABLE cv_fingerprint_band (
+                                     band SMALLINT NOT NULL,
+                                     bucket BIGINT NOT NULL,
+                                     cv_id INTEGER REFERENCES cv(id) ON DELETE CASCADE,
+                                     PRIMARY KEY (band, bucket, cv_id)
+);
+
+-- Files recognised as near-duplicates of an existing CV and linked to it instead of re-extracted
+CREATE TABLE cv_duplicate (
+                              filename VARCHAR(255) PRIMARY KEY,
+                              cv_id INTEGER REFERENCES cv(id) ON DELETE CASCADE,
+                              similarity REAL NOT NULL,
+                              created_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
 -- Create indexes
 CREATE INDEX idx_cv_email ON cv(email);
 CREATE INDEX idx_cv_name ON cv(name);
 CREATE INDEX idx_skill_name ON skill(name);
 CREATE INDEX idx_company_name ON company(name);
 CREATE INDEX idx_cv_skill_value ON cv_skill(cv_id, value);
-CREATE INDEX idx_cv_company_cv_id ON cv_company(cv_id);
\ No newline at end of file
+CREATE INDEX idx_cv_company_cv_id ON cv_company(cv_id);
+CREATE INDEX idx_cv_fingerprint_band_cv_id ON cv_fingerprint_band(cv_id);
+CREATE INDEX idx_cv_duplicate_cv_id ON cv_duplicate(cv_id);
\ No newline at end of file
@@ -1,3 +1,8 @@
+-- Relevance of a candidate for the requested skills: the sum of their scores (0 for a missing skill)
+CREATE OR REPLACE FUNCTION cv_relevance(scores JSONB, wanted TEXT[]) RETURNS INTEGER
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+$$ SELECT COALESCE(SUM((scores ->> skill)::integer), 0)::integer FROM unnest(wanted) skill $$;
+
 CREATE MATERIALIZED VIEW cv_aggregated AS
 SELECT
     cv.id,
@@ -11,10 +16,19 @@ SELECT
     ARRAY_AGG(DISTINCT concat(skill.name, ': ', cv_skill.value)) as skills_with_values,
     ARRAY_AGG(DISTINCT company.name) as companies,
     STRING_AGG(DISTINCT concat(skill.name, ': ', cv_skill.value), ', ') as candidate_skills,
-    STRING_AGG(DISTINCT company.name, ', ') as candidate_companies
+    STRING_AGG(DISTINCT company.name, ', ') as candidate_companies,
+    jsonb_object_agg(skill.name, cv_skill.value) as skill_scores,
+    (SELECT COALESCE(SUM(value), 0) FROM cv_skill s WHERE s.cv_id = cv.id)::integer as skill_total
 FROM cv
          INNER JOIN cv_skill ON cv.id = cv_skill.cv_id
          INNER JOIN skill ON cv_skill.skill_id = skill.id
          INNER JOIN cv_company ON cv.id = cv_company.cv_id
          INNER JOIN company ON cv_company.company_id = company.id
-GROUP BY cv.id, cv.name, cv.email, cv.phone, cv.country;
\ No newline at end of file
+GROUP BY cv.id, cv.name, cv.email, cv.phone, cv.country;
+
+-- Skill filters (skills @> ARRAY[...], skill_scores ?& ARRAY[...]) use the GIN indexes; the
+-- unfiltered top-N (ORDER BY skill_total DESC LIMIT n) is read straight off the btree index
+CREATE UNIQUE INDEX idx_cv_aggregated_id ON cv_aggregated(id);
+CREATE INDEX idx_cv_aggregated_skills ON cv_aggregated USING GIN (skills);
+CREATE INDEX idx_cv_aggregated_skill_scores ON cv_aggregated USING GIN (skill_scores);
+CREATE INDEX idx_cv_aggregated_skill_total ON cv_aggregated(skill_total DESC);
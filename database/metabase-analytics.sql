@@ -0,0 +1,32 @@
+-- Dashboard questions over the rollup tables of database/rollups.sql.
+-- Each reads a few small rows per skill, company or country, whatever the number of CVs.
+
+-- Most frequent skills with their average score
+SELECT skill.name, s.cv_count, round(s.score_sum::numeric / s.cv_count, 1) AS avg_score
+FROM skill_stats s
+JOIN skill ON skill.id = s.skill_id
+WHERE s.cv_count > 0
+ORDER BY s.cv_count DESC
+LIMIT 50;
+
+-- Score distribution of one skill ({{skill}} is a text variable)
+SELECT h.bucket * 10 AS score_from, LEAST(h.bucket * 10 + 9, 100) AS score_to, h.cv_count
+FROM skill_score_histogram h
+JOIN skill ON skill.id = h.skill_id
+WHERE skill.name = {{skill}}
+  AND h.cv_count > 0
+ORDER BY h.bucket;
+
+-- Companies by number of candidates who worked there
+SELECT company.name, c.cv_count
+FROM company_stats c
+JOIN company ON company.id = c.company_id
+WHERE c.cv_count > 0
+ORDER BY c.cv_count DESC
+LIMIT 50;
+
+-- Candidates per country
+SELECT NULLIF(country, '') AS country, cv_count
+FROM country_stats
+WHERE cv_count > 0
+ORDER BY cv_count DESC;
@@ -0,0 +1,222 @@
+-- Analytics rollups for the Metabase dashboards, kept up to date by triggers.
+-- Safe to re-apply: tables are created if missing, functions and triggers are replaced,
+-- and the rollups are rebuilt from scratch at the end.
+
+-- One flattened row per CV (what database/metabasequery.sql used to join on every load)
+CREATE TABLE IF NOT EXISTS cv_flat (
+                                       cv_id INTEGER PRIMARY KEY REFERENCES cv(id) ON DELETE CASCADE,
+                                       name VARCHAR(255) NOT NULL,
+                                       email VARCHAR(255) NOT NULL,
+                                       phone VARCHAR(50),
+                                       country VARCHAR(100),
+                                       comment TEXT,
+                                       filename VARCHAR(255) NOT NULL,
+                                       skills VARCHAR(100)[] NOT NULL DEFAULT '{}',
+                                       companies VARCHAR(255)[] NOT NULL DEFAULT '{}',
+                                       candidate_skills TEXT,
+                                       candidate_companies TEXT
+);
+
+-- Skill frequency and score totals (average = score_sum / cv_count)
+CREATE TABLE IF NOT EXISTS skill_stats (
+                                           skill_id INTEGER PRIMARY KEY REFERENCES skill(id) ON DELETE CASCADE,
+                                           cv_count INTEGER NOT NULL DEFAULT 0,
+                                           score_sum BIGINT NOT NULL DEFAULT 0
+);
+
+-- Score distribution per skill in buckets of 10 (bucket 10 holds the 100s)
+CREATE TABLE IF NOT EXISTS skill_score_histogram (
+                                                     skill_id INTEGER REFERENCES skill(id) ON DELETE CASCADE,
+                                                     bucket SMALLINT NOT NULL,
+                                                     cv_count INTEGER NOT NULL DEFAULT 0,
+                                                     PRIMARY KEY (skill_id, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS company_stats (
+                                             company_id INTEGER PRIMARY KEY REFERENCES company(id) ON DELETE CASCADE,
+                                             cv_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- '' stands for CVs without a country
+CREATE TABLE IF NOT EXISTS country_stats (
+                                             country VARCHAR(100) PRIMARY KEY,
+                                             cv_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- CVs whose cv_flat row must be rebuilt when the transaction commits
+CREATE TABLE IF NOT EXISTS cv_flat_pending (
+                                               cv_id INTEGER PRIMARY KEY
+);
+
+CREATE INDEX IF NOT EXISTS idx_cv_flat_skills ON cv_flat USING GIN (skills);
+CREATE INDEX IF NOT EXISTS idx_cv_flat_companies ON cv_flat USING GIN (companies);
+CREATE INDEX IF NOT EXISTS idx_cv_flat_country ON cv_flat(country);
+
+
+-- cv_flat --------------------------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION refresh_cv_flat(target_id INTEGER) RETURNS VOID LANGUAGE sql AS $$
+    DELETE FROM cv_flat WHERE cv_id = target_id;
+    INSERT INTO cv_flat (cv_id, name, email, phone, country, comment, filename,
+                         skills, companies, candidate_skills, candidate_companies)
+    SELECT cv.id, cv.name, cv.email, cv.phone, cv.country, cv.comment, cv.filename,
+           COALESCE(s.skills, '{}'), COALESCE(c.companies, '{}'), s.candidate_skills, c.candidate_companies
+    FROM cv
+    LEFT JOIN LATERAL (
+        SELECT ARRAY_AGG(skill.name ORDER BY skill.name) AS skills,
+               STRING_AGG(concat(skill.name, ': ', cv_skill.value), ', ' ORDER BY skill.name) AS candidate_skills
+        FROM cv_skill JOIN skill ON skill.id = cv_skill.skill_id
+        WHERE cv_skill.cv_id = cv.id
+    ) s ON TRUE
+    LEFT JOIN LATERAL (
+        -- Lowercase for the case-insensitive company filter; candidate_companies keeps the spelling
+        SELECT ARRAY_AGG(lower(company.name) ORDER BY company.name) AS companies,
+               STRING_AGG(company.name, ', ' ORDER BY company.name) AS candidate_companies
+        FROM cv_company JOIN company ON company.id = cv_company.company_id
+        WHERE cv_company.cv_id = cv.id
+    ) c ON TRUE
+    WHERE cv.id = target_id;
+$$;
+
+-- Row triggers only mark the CV; the row is rebuilt once per CV at commit, however many
+-- skills and companies the transaction inserted. The trigger argument names the CV id column.
+CREATE OR REPLACE FUNCTION mark_cv_flat_pending() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        INSERT INTO cv_flat_pending (cv_id) VALUES ((to_jsonb(OLD) ->> TG_ARGV[0])::integer)
+        ON CONFLICT DO NOTHING;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        INSERT INTO cv_flat_pending (cv_id) VALUES ((to_jsonb(NEW) ->> TG_ARGV[0])::integer)
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Renaming a skill or company (app.merge_duplicates does) touches every CV that has it
+CREATE OR REPLACE FUNCTION mark_cv_flat_pending_for_rename() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'skill' THEN
+        INSERT INTO cv_flat_pending (cv_id) SELECT cv_id FROM cv_skill WHERE skill_id = NEW.id
+        ON CONFLICT DO NOTHING;
+    ELSE
+        INSERT INTO cv_flat_pending (cv_id) SELECT cv_id FROM cv_company WHERE company_id = NEW.id
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION flush_cv_flat_pending() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM cv_flat_pending WHERE cv_id = NEW.cv_id;
+    PERFORM refresh_cv_flat(NEW.cv_id);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS cv_flat_mark ON cv;
+CREATE TRIGGER cv_flat_mark AFTER INSERT OR UPDATE OR DELETE ON cv
+    FOR EACH ROW EXECUTE FUNCTION mark_cv_flat_pending('id');
+DROP TRIGGER IF EXISTS cv_flat_mark ON cv_skill;
+CREATE TRIGGER cv_flat_mark AFTER INSERT OR UPDATE OR DELETE ON cv_skill
+    FOR EACH ROW EXECUTE FUNCTION mark_cv_flat_pending('cv_id');
+DROP TRIGGER IF EXISTS cv_flat_mark ON cv_company;
+CREATE TRIGGER cv_flat_mark AFTER INSERT OR UPDATE OR DELETE ON cv_company
+    FOR EACH ROW EXECUTE FUNCTION mark_cv_flat_pending('cv_id');
+DROP TRIGGER IF EXISTS cv_flat_mark_rename ON skill;
+CREATE TRIGGER cv_flat_mark_rename AFTER UPDATE OF name ON skill
+    FOR EACH ROW EXECUTE FUNCTION mark_cv_flat_pending_for_rename();
+DROP TRIGGER IF EXISTS cv_flat_mark_rename ON company;
+CREATE TRIGGER cv_flat_mark_rename AFTER UPDATE OF name ON company
+    FOR EACH ROW EXECUTE FUNCTION mark_cv_flat_pending_for_rename();
+DROP TRIGGER IF EXISTS cv_flat_flush ON cv_flat_pending;
+CREATE CONSTRAINT TRIGGER cv_flat_flush AFTER INSERT ON cv_flat_pending
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION flush_cv_flat_pending();
+
+
+-- Counters -------------------------------------------------------------------------------
+
+-- Decrements only UPDATE: when a skill or company is deleted its stats row is already gone
+-- (ON DELETE CASCADE) and must not be re-created
+CREATE OR REPLACE FUNCTION update_skill_stats() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        UPDATE skill_stats SET cv_count = cv_count - 1, score_sum = score_sum - COALESCE(OLD.value, 0)
+        WHERE skill_id = OLD.skill_id;
+        UPDATE skill_score_histogram SET cv_count = cv_count - 1
+        WHERE skill_id = OLD.skill_id AND bucket = COALESCE(OLD.value, 0) / 10;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        INSERT INTO skill_stats (skill_id, cv_count, score_sum) VALUES (NEW.skill_id, 1, COALESCE(NEW.value, 0))
+        ON CONFLICT (skill_id) DO UPDATE
+            SET cv_count = skill_stats.cv_count + 1, score_sum = skill_stats.score_sum + EXCLUDED.score_sum;
+        INSERT INTO skill_score_histogram (skill_id, bucket, cv_count) VALUES (NEW.skill_id, COALESCE(NEW.value, 0) / 10, 1)
+        ON CONFLICT (skill_id, bucket) DO UPDATE SET cv_count = skill_score_histogram.cv_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION update_company_stats() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        UPDATE company_stats SET cv_count = cv_count - 1 WHERE company_id = OLD.company_id;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        INSERT INTO company_stats (company_id, cv_count) VALUES (NEW.company_id, 1)
+        ON CONFLICT (company_id) DO UPDATE SET cv_count = company_stats.cv_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION update_country_stats() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        UPDATE country_stats SET cv_count = cv_count - 1 WHERE country = COALESCE(OLD.country, '');
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        INSERT INTO country_stats (country, cv_count) VALUES (COALESCE(NEW.country, ''), 1)
+        ON CONFLICT (country) DO UPDATE SET cv_count = country_stats.cv_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS skill_stats_update ON cv_skill;
+CREATE TRIGGER skill_stats_update AFTER INSERT OR UPDATE OF skill_id, value OR DELETE ON cv_skill
+    FOR EACH ROW EXECUTE FUNCTION update_skill_stats();
+DROP TRIGGER IF EXISTS company_stats_update ON cv_company;
+CREATE TRIGGER company_stats_update AFTER INSERT OR UPDATE OF company_id OR DELETE ON cv_company
+    FOR EACH ROW EXECUTE FUNCTION update_company_stats();
+DROP TRIGGER IF EXISTS country_stats_update ON cv;
+CREATE TRIGGER country_stats_update AFTER INSERT OR UPDATE OF country OR DELETE ON cv
+    FOR EACH ROW EXECUTE FUNCTION update_country_stats();
+
+
+-- Full rebuild (first install, or to check the counters) ---------------------------------
+
+CREATE OR REPLACE FUNCTION rebuild_analytics_rollups() RETURNS VOID LANGUAGE plpgsql AS $$
+BEGIN
+    TRUNCATE cv_flat, skill_stats, skill_score_histogram, company_stats, country_stats, cv_flat_pending;
+
+    PERFORM refresh_cv_flat(id) FROM cv;
+
+    INSERT INTO skill_stats (skill_id, cv_count, score_sum)
+    SELECT skill_id, COUNT(*), COALESCE(SUM(value), 0) FROM cv_skill GROUP BY skill_id;
+
+    INSERT INTO skill_score_histogram (skill_id, bucket, cv_count)
+    SELECT skill_id, COALESCE(value, 0) / 10, COUNT(*) FROM cv_skill GROUP BY 1, 2;
+
+    INSERT INTO company_stats (company_id, cv_count)
+    SELECT company_id, COUNT(*) FROM cv_company GROUP BY company_id;
+
+    INSERT INTO country_stats (country, cv_count)
+    SELECT COALESCE(country, ''), COUNT(*) FROM cv GROUP BY 1;
+END;
+$$;
+
+SELECT rebuild_analytics_rollups();
@@ -0,0 +1,82 @@
+"""
+Incremental export against a live Postgres (DATABASE_* settings); skipped when none is reachable.
+
+    python -m pytest tests
+"""
+import asyncio
+import threading
+
+import psycopg2
+import pytest
+
+from app.config import DATABASE_NAME, DATABASE_USER, DATABASE_PASSWORD, DATABASE_HOST, DATABASE_PORT
+from app.services.cv_export import export_cvs
+from app.services.db_service import CV_INSERT_LOCK, DatabaseService
+
+PREFIX = "test_cv_export_"
+
+
+def connect():
+    return psycopg2.connect(dbname=DATABASE_NAME, user=DATABASE_USER, password=DATABASE_PASSWORD,
+                            host=DATABASE_HOST, port=DATABASE_PORT)
+
+
+def cv_data(tag: str) -> dict:
+    return {"name": tag, "email": f"{PREFIX}{tag}@example.com", "phone": "", "country": f"{PREFIX}{tag}",
+            "cv_text": "", "comment": "", "filename": f"{PREFIX}{tag}.pdf", "skills": {}, "companies": []}
+
+
+@pytest.fixture
+def conn():
+    try:
+        conn = connect()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"No database: {e}")
+    yield conn
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM cv WHERE filename LIKE %s", (PREFIX + "%",))
+    conn.commit()
+    conn.close()
+
+
+def exported_ids(path):
+    import pyarrow.parquet as pq
+    return pq.read_table(path).column("id").to_pylist() if path else []
+
+
+def test_lower_id_committing_late_is_not_skipped(conn, tmp_path):
+    """
+    T draws id k and is still running when U stores a CV. U must not commit id k+1 before T
+    commits, or an export taken in between would make k+1 the high-water mark and skip k.
+    """
+    directory = str(tmp_path)
+    export_cvs(conn, directory)
+
+    # T: an insert in progress, holding the lock as store_cv_data does
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (CV_INSERT_LOCK,))
+        cur.execute("""
+            INSERT INTO cv (name, email, phone, country, cv_text, comment, filename)
+            VALUES (%(name)s, %(email)s, %(phone)s, %(country)s, %(cv_text)s, %(comment)s, %(filename)s)
+            RETURNING id
+        """, cv_data("t"))
+        t_id = cur.fetchone()[0]
+
+    # U: a second connection storing a CV meanwhile
+    stored = {}
+    u = threading.Thread(target=lambda: stored.update(id=asyncio.run(DatabaseService().store_cv_data(cv_data("u")))))
+    u.start()
+    u.join(timeout=1)
+    assert u.is_alive(), "store_cv_data committed while a lower id was still in flight"
+
+    export_conn = connect()
+    try:
+        assert not [cv_id for cv_id in exported_ids(export_cvs(export_conn, directory)) if cv_id >= t_id]
+
+        conn.commit()
+        u.join(timeout=10)
+        assert stored["id"] > t_id
+        assert {t_id, stored["id"]} <= set(exported_ids(export_cvs(export_conn, directory)))
+    finally:
+        export_conn.close()
@@ -0,0 +1,64 @@
+"""
+AIMD adaptation of the OpenAI limiter.
+
+    python -m pytest tests
+"""
+import asyncio
+
+import pytest
+
+from app.services.rate_limiter import AdaptiveRateLimiter
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def limiter() -> AdaptiveRateLimiter:
+    limiter = AdaptiveRateLimiter(requests_per_minute=1000, tokens_per_minute=100000, max_concurrency=8,
+                                  target_latency=10)
+    limiter.concurrency_limit = 4.0
+    return limiter
+
+
+def test_completed_call_raises_limit():
+    rl = limiter()
+    with rl.limit():
+        pass
+    assert rl.concurrency_limit == 4.25
+
+
+def test_rate_limited_call_halves_limit():
+    rl = limiter()
+    with pytest.raises(RateLimitError):
+        with rl.limit():
+            raise RateLimitError()
+    assert rl.concurrency_limit == 2.0
+
+
+def test_failed_call_leaves_limit_unchanged():
+    rl = limiter()
+    with pytest.raises(TimeoutError):
+        with rl.limit():
+            raise TimeoutError()
+    assert rl.concurrency_limit == 4.0
+    assert rl.get_metrics()["in_flight"] == 0
+
+
+def test_cancelled_call_leaves_limit_unchanged():
+    rl = limiter()
+
+    async def call():
+        async with rl.limit_async():
+            await asyncio.sleep(10)
+
+    async def main():
+        task = asyncio.create_task(call())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert rl.concurrency_limit == 4.0
+    assert rl.get_metrics()["in_flight"] == 0